@@ -0,0 +1,99 @@
+"""Compares the old one-request-per-file install path with downloader.download_files
+against a local HTTP stand-in that adds a fixed per-request latency.
+
+    python benchmarks/bench_downloads.py --latency 0.05 --sizes 10 100 1000
+"""
+import argparse
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import downloader
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    latency = 0.02
+    payload = b"x" * 4096
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(len(self.payload)))
+        self.end_headers()
+        self.wfile.write(self.payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(latency, port_queue):
+    StandInHandler.latency = latency
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+    port_queue.put(server.server_address[1])
+    server.serve_forever()
+
+
+def sequential_download(files, target_dir):
+    for file_info in files:
+        local_path = os.path.join(target_dir, file_info['path'])
+        os.makedirs(os.path.dirname(local_path), exist_ok=True)
+        response = requests.get(file_info['url'], timeout=downloader.REQUEST_TIMEOUT)
+        response.raise_for_status()
+        with open(local_path, 'wb') as f:
+            f.write(response.content)
+
+
+def pooled_download(files, target_dir, workers):
+    session = downloader.create_session(pool_size=workers)
+    try:
+        downloader.download_files(session, files, target_dir, max_workers=workers)
+    finally:
+        session.close()
+
+
+def time_run(func, files, *extra_args):
+    target_dir = tempfile.mkdtemp(prefix="ima_bench_")
+    try:
+        start = time.perf_counter()
+        func(files, target_dir, *extra_args)
+        return time.perf_counter() - start
+    finally:
+        shutil.rmtree(target_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--latency', type=float, default=0.05, help="Seconds of server latency per request (roughly one RTT to GitHub).")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000], help="Files per synthetic plugin.")
+    parser.add_argument('--workers', type=int, default=downloader.MAX_DOWNLOAD_WORKERS)
+    args = parser.parse_args()
+
+    # The stand-in runs in its own process so it does not compete with the client for the GIL.
+    port_queue = multiprocessing.Queue()
+    server = multiprocessing.Process(target=serve, args=(args.latency, port_queue), daemon=True)
+    server.start()
+    base_url = f"http://127.0.0.1:{port_queue.get(timeout=10)}"
+
+    print(f"{'files':>6} {'sequential (s)':>15} {'pooled (s)':>11} {'speedup':>8}")
+    try:
+        for size in args.sizes:
+            files = [{'url': f"{base_url}/plugin/dir{i % 10}/file{i}.bin", 'path': os.path.join(f"dir{i % 10}", f"file{i}.bin")}
+                     for i in range(size)]
+            sequential = time_run(sequential_download, files)
+            pooled = time_run(pooled_download, files, args.workers)
+            print(f"{size:>6} {sequential:>15.3f} {pooled:>11.3f} {sequential / pooled:>7.1f}x")
+    finally:
+        server.terminate()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""Measures the model/view plugin grid against synthetic catalogs: time to populate
+the model, time to the first painted frame, and per-frame time while scrolling
+through the whole catalog. Runs offscreen, so no display is needed.
+
+    python benchmarks/bench_plugin_grid.py --sizes 100 1000 10000 --budget-ms 16
+"""
+import argparse
+import os
+import sys
+import time
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt5.QtWidgets import QApplication
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from plugin_grid import PluginListModel, PluginCardDelegate, PluginGridView, STATE_AVAILABLE, STATE_INSTALLED, STATE_OUTDATED
+from utils import resource_path
+
+STATES = [STATE_AVAILABLE, STATE_INSTALLED, STATE_OUTDATED]
+
+
+def synthetic_catalog(size):
+    return [{'name': f"Plugin{i:05d}", 'version': "1.0",
+             'description': f"Synthetic plugin number {i} with a description long enough to wrap over a few lines."}
+            for i in range(size)]
+
+
+def paint_frame(app, view):
+    start = time.perf_counter()
+    view.viewport().repaint()
+    app.processEvents()
+    return (time.perf_counter() - start) * 1000
+
+
+def run(app, size, frames):
+    model = PluginListModel(lambda plugin: STATES[hash(plugin['name']) % len(STATES)])
+    view = PluginGridView()
+    view.setItemDelegate(PluginCardDelegate(resource_path(os.path.join('icons', 'icon.png')), view))
+    view.setModel(model)
+    view.resize(760, 540)
+    view.show()
+    app.processEvents()
+
+    start = time.perf_counter()
+    model.set_plugins(synthetic_catalog(size))
+    populate_ms = (time.perf_counter() - start) * 1000
+    first_frame_ms = populate_ms + paint_frame(app, view)
+
+    # Batched layout finishes in the background; scroll once it has.
+    while view.verticalScrollBar().maximum() == 0 and size > 8:
+        app.processEvents()
+    scroll_bar = view.verticalScrollBar()
+    frame_times = []
+    for step in range(frames):
+        scroll_bar.setValue(scroll_bar.maximum() * step // max(1, frames - 1))
+        frame_times.append(paint_frame(app, view))
+    view.close()
+    view.deleteLater()
+    frame_times.sort()
+    return populate_ms, first_frame_ms, frame_times[len(frame_times) // 2], frame_times[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000], help="Plugins per synthetic catalog.")
+    parser.add_argument('--frames', type=int, default=120, help="Scroll positions sampled across the catalog.")
+    parser.add_argument('--budget-ms', type=float, default=16.0, help="Frame-time budget for scrolling.")
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    print(f"{'plugins':>8} {'populate (ms)':>14} {'first frame (ms)':>17} {'median frame (ms)':>18} {'worst frame (ms)':>17}")
+    over_budget = False
+    for size in args.sizes:
+        populate_ms, first_frame_ms, median_ms, worst_ms = run(app, size, args.frames)
+        over_budget |= median_ms > args.budget_ms
+        print(f"{size:>8} {populate_ms:>14.1f} {first_frame_ms:>17.1f} {median_ms:>18.2f} {worst_ms:>17.2f}")
+    sys.exit(1 if over_budget else 0)
+
+
+if __name__ == '__main__':
+    main()
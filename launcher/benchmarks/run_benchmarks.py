@@ -0,0 +1,449 @@
+"""Headless benchmark suite for the launcher. Builds a throwaway project tree
+(synthetic catalogs, a large modify.nss, a theme directory) under a temporary
+directory, points the launcher at it and times each scenario offscreen:
+
+    time_to_first_frame       fresh process: launcher import to the first painted frame
+    manager_init              PluginManager construction
+    display_plugins[N]        display_plugins() up to the first painted frame
+    scroll[N]                 one frame of a scripted scroll, check_visible_cards included
+    modify_widget_load        ModifyWidget loading the generated modify.nss
+    parse_nss[FILE]           nss_parser.parse() of the generated modify.nss and the shipped images.nss
+    id_search[N]              one keystroke of a typed Modify page search over N extra shell IDs
+    theme_switcher[N]         ThemeSwitcherWidget with N themes, up to the first frame
+
+Results are written as JSON and can be compared against a stored baseline; the
+exit status is 1 when a scenario's median regresses by more than --threshold.
+
+    python benchmarks/run_benchmarks.py --output results.json
+    python benchmarks/run_benchmarks.py --baseline benchmarks/baseline.json --threshold 0.2
+
+winreg is replaced by an inert module when it is missing, so the suite runs on
+Linux and macOS as well as Windows.
+"""
+import argparse
+import importlib.machinery
+import importlib.util
+import json
+import mimetypes
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import types
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+LAUNCHER_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, LAUNCHER_DIR)
+
+from PyQt5.QtCore import QT_VERSION_STR, PYQT_VERSION_STR
+from PyQt5.QtGui import QImage, QColor
+from PyQt5.QtWidgets import QApplication
+
+SHIPPED_IMAGES_NSS = os.path.join(LAUNCHER_DIR, '..', 'iMA Menu', 'imports', 'images.nss')
+
+DEFAULT_SIZES = [100, 1000, 10000]
+DEFAULT_THEMES = 200
+DEFAULT_MODIFY_IDS = 2000
+DEFAULT_SHELL_IDS = 20000
+ID_SEARCH_QUERY = "synthetic item 12"
+SCROLL_FRAMES = 60
+
+THEME_TEMPLATE = """theme
+{{
+  name = "{name}"
+  view = view.medium
+  border.enabled = false
+  border.radius = 3
+  background.color = {color}
+  background.opacity = 0
+  item.radius = 3
+  font.size = auto
+  font.name = "Segoe UI Variable Text"
+  dark = true
+}}
+"""
+
+
+def stub_windows_modules():
+    # mimetypes reads the registry when winreg is importable; let it initialise first.
+    mimetypes.init()
+    if 'winreg' not in sys.modules:
+        try:
+            import winreg
+        except ImportError:
+            winreg = types.ModuleType('winreg')
+            winreg.HKEY_CURRENT_USER = 0
+            winreg.REG_EXPAND_SZ = 2
+
+            def unavailable(*args, **kwargs):
+                raise OSError("winreg is not available on this platform")
+            winreg.CreateKey = winreg.OpenKey = winreg.QueryValueEx = winreg.SetValueEx = winreg.CloseKey = unavailable
+            sys.modules['winreg'] = winreg
+
+
+def load_pyw(name):
+    """Imports LAUNCHER_DIR/<name>.pyw; only Windows treats .pyw as importable source."""
+    if name in sys.modules:
+        return sys.modules[name]
+    loader = importlib.machinery.SourceFileLoader(name, os.path.join(LAUNCHER_DIR, f"{name}.pyw"))
+    spec = importlib.util.spec_from_loader(name, loader)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+def synthetic_catalog(size):
+    return [{'name': f"Plugin{i:05d}", 'version': "1.0", 'tags': ["synthetic", f"group{i % 50}"],
+             'description': f"Synthetic plugin number {i} with a description long enough to wrap over a few lines."}
+            for i in range(size)]
+
+
+def write_modify_nss(path, id_count):
+    ids = [f"id.synthetic_item_{i}" for i in range(id_count)]
+    third = max(1, id_count // 3)
+    sections = [
+        ("hide", "mode.multiple", ids[:third], "vis=vis.remove"),
+        ("more", "mode.multiple", ids[third:2 * third], "menu=title.options"),
+        ("shift", "single", ids[2 * third:], "vis=key.shift()"),
+    ]
+    parts = []
+    for title, mode, section_ids, action in sections:
+        parts.append(f"// {title}\nmodify(mode={mode}\nwhere=this.id(\n" + ",\n".join(section_ids) + f") {action})\n")
+    parts.append('remove(find="' + "|".join(f"entry {i}" for i in range(id_count // 10)) + '")\n')
+    parts.extend(f"modify(find='Entry {i}' title='Entry {i} renamed' icon=\\uE113)\n" for i in range(id_count // 4))
+    with open(path, 'w') as f:
+        f.write("\n".join(parts))
+
+
+def build_project(root, theme_count, modify_ids):
+    """Creates the layout the launcher expects around PROJECT_ROOT."""
+    for directory in ('imports', 'theme', 'plugins', os.path.join('launcher', 'cache'), os.path.join('launcher', 'lib'), 'mirror'):
+        os.makedirs(os.path.join(root, directory), exist_ok=True)
+
+    with open(os.path.join(root, 'shell.nss'), 'w') as f:
+        f.write("settings\n{\n\tpriority=1\n}\n\nimport 'imports/theme.nss'\nimport 'imports/modify.nss'\n")
+    write_modify_nss(os.path.join(root, 'imports', 'modify.nss'), modify_ids)
+    with open(os.path.join(root, 'imports', 'theme.nss'), 'w') as f:
+        f.write(THEME_TEMPLATE.format(name="modern", color="default"))
+
+    thumbnail = QImage(140, 166, QImage.Format_ARGB32)
+    for i in range(theme_count):
+        name = f"Theme{i:03d}"
+        with open(os.path.join(root, 'theme', f"{name}.nss"), 'w') as f:
+            f.write(THEME_TEMPLATE.format(name=name, color=f"#{i * 40503 % 0xffffff:06x}"))
+        thumbnail.fill(QColor.fromHsv(i * 7 % 360, 160, 200))
+        thumbnail.save(os.path.join(root, 'theme', f"{name}.png"))
+
+    # The catalog is cached as after a previous run, so construction takes the warm-start path.
+    for catalog_path in (os.path.join(root, 'mirror', 'plugins.json'), os.path.join(root, 'launcher', 'cache', 'plugins.json')):
+        with open(catalog_path, 'w') as f:
+            json.dump(synthetic_catalog(DEFAULT_SIZES[0]), f)
+    with open(os.path.join(root, 'mirror', 'tree.json'), 'w') as f:
+        json.dump({'files': []}, f)
+
+
+def point_launcher_at(launcher, root):
+    """Redirects the launcher's module-level paths into the benchmark project so
+    nothing outside it is read or written, and serves the catalog from a local
+    mirror so no scenario touches the network."""
+    app_base = os.path.join(root, 'launcher')
+    launcher.APP_BASE_PATH = app_base
+    launcher.PROJECT_ROOT = root
+    launcher.PLUGINS_DIR = os.path.join(root, 'plugins')
+    launcher.LIB_DIR = os.path.join(app_base, 'lib')
+    launcher.CACHE_DIR = os.path.join(app_base, 'cache')
+    launcher.PLUGINS_CACHE_FILE = os.path.join(launcher.CACHE_DIR, 'plugins.json')
+    launcher.PLUGINS_CACHE_META_FILE = os.path.join(launcher.CACHE_DIR, 'plugins.meta.json')
+    launcher.ICONS_CACHE_DIR = os.path.join(launcher.CACHE_DIR, 'icons')
+    launcher.THEME_THUMBNAILS_CACHE_DIR = os.path.join(launcher.CACHE_DIR, 'theme_thumbnails')
+    launcher.THEME_INDEX_FILE = os.path.join(launcher.CACHE_DIR, 'themes.json')
+    launcher.THEME_PREVIEWS_CACHE_DIR = os.path.join(launcher.CACHE_DIR, 'theme_previews')
+    launcher.REPOSITORY = launcher.create_repository(os.path.join(root, 'mirror'))
+
+
+def first_frame_probe(root):
+    """Run in a child process by the time_to_first_frame scenario, so module
+    imports are measured cold. Prints milliseconds from importing the launcher
+    to the first painted frame of the plugins page."""
+    stub_windows_modules()
+    app = QApplication(sys.argv[:1])
+    with open(os.path.join(LAUNCHER_DIR, 'style.css'), 'r') as f:
+        app.setStyleSheet(f.read())
+    start = time.perf_counter()
+    for name in ('theme_editor_widget', 'theme_switcher_widget'):
+        load_pyw(name)
+    launcher = load_pyw('launcher')
+    point_launcher_at(launcher, root)
+    manager = launcher.PluginManager()
+    manager.show()
+    manager.repaint()
+    app.processEvents()
+    print(f"first_frame_ms={elapsed_ms(start):.3f}", flush=True)
+    wait_for_threads(app, manager)
+    manager.close()
+
+
+def wait_for_threads(app, manager, timeout=30):
+    deadline = time.perf_counter() + timeout
+    while (manager.active_threads or manager.installed_state.scan_threads) and time.perf_counter() < deadline:
+        app.processEvents()
+        time.sleep(0.001)
+    app.processEvents()
+
+
+def elapsed_ms(start):
+    return (time.perf_counter() - start) * 1000
+
+
+class Suite:
+    def __init__(self, app, root, args):
+        self.app = app
+        self.root = root
+        self.args = args
+        for name in ('theme_editor_widget', 'theme_switcher_widget'):
+            load_pyw(name)
+        self.launcher = load_pyw('launcher')
+        point_launcher_at(self.launcher, root)
+        self.manager = None
+
+    def new_manager(self):
+        start = time.perf_counter()
+        manager = self.launcher.PluginManager()
+        took = elapsed_ms(start)
+        wait_for_threads(self.app, manager)
+        return manager, took
+
+    def close_manager(self, manager):
+        wait_for_threads(self.app, manager)
+        manager.close()
+        manager.deleteLater()
+        self.app.processEvents()
+
+    def time_to_first_frame(self):
+        output = subprocess.run([sys.executable, os.path.abspath(__file__), '--first-frame-probe', self.root],
+                                check=True, capture_output=True, text=True).stdout
+        return [float(line.split('=', 1)[1]) for line in output.splitlines() if line.startswith('first_frame_ms=')]
+
+    def manager_init(self):
+        manager, took = self.new_manager()
+        self.close_manager(manager)
+        return [took]
+
+    def shown_manager(self):
+        if self.manager is None:
+            self.manager, _ = self.new_manager()
+            self.manager.show()
+            self.app.processEvents()
+        return self.manager
+
+    def display_plugins(self, size):
+        manager = self.shown_manager()
+        catalog = synthetic_catalog(size)
+        manager.display_plugins([])
+        self.app.processEvents()
+        start = time.perf_counter()
+        manager.display_plugins(catalog)
+        manager.plugin_view.viewport().repaint()
+        self.app.processEvents()
+        took = elapsed_ms(start)
+        wait_for_threads(self.app, manager)
+        return [took]
+
+    def scroll(self, size):
+        manager = self.shown_manager()
+        if manager.plugin_model.rowCount() != size:
+            manager.display_plugins(synthetic_catalog(size))
+            wait_for_threads(self.app, manager)
+        view = manager.plugin_view
+        scroll_bar = view.verticalScrollBar()
+        deadline = time.perf_counter() + 10
+        while scroll_bar.maximum() == 0 and size > 12 and time.perf_counter() < deadline:
+            self.app.processEvents()
+
+        samples = []
+        for step in range(SCROLL_FRAMES):
+            start = time.perf_counter()
+            scroll_bar.setValue(scroll_bar.maximum() * step // (SCROLL_FRAMES - 1))
+            manager.check_visible_cards()
+            view.viewport().repaint()
+            self.app.processEvents()
+            samples.append(elapsed_ms(start))
+        return samples
+
+    def modify_widget_load(self):
+        from modify_widget import ModifyWidget
+        start = time.perf_counter()
+        widget = ModifyWidget(os.path.join(self.root, 'imports', 'modify.nss'), self.root)
+        took = elapsed_ms(start)
+        widget.deleteLater()
+        self.app.processEvents()
+        return [took]
+
+    def id_search(self, count):
+        from modify_widget import ModifyWidget
+        widget = ModifyWidget(os.path.join(self.root, 'imports', 'modify.nss'), self.root)
+        widget.shell_ids.add(f"id.plugin_{i % 97}.synthetic_item_{i}" for i in range(count))
+        widget.ids_list.id_model.set_ids(widget.shell_ids.available())
+        widget.show()
+        self.app.processEvents()
+        samples = []
+        for end in range(1, len(ID_SEARCH_QUERY) + 1):
+            widget.search_input.setText(ID_SEARCH_QUERY[:end])
+            start = time.perf_counter()
+            widget.filter_lists()
+            self.app.processEvents()
+            samples.append(elapsed_ms(start))
+        widget.close()
+        widget.deleteLater()
+        self.app.processEvents()
+        return samples
+
+    def parse_nss(self, path):
+        import nss_parser
+        with open(path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        start = time.perf_counter()
+        nss_parser.parse(content)
+        return [elapsed_ms(start)]
+
+    def theme_switcher(self, count):
+        theme_switcher_widget = load_pyw('theme_switcher_widget')
+        start = time.perf_counter()
+        widget = theme_switcher_widget.ThemeSwitcherWidget(os.path.join(self.root, 'theme'),
+                                                           os.path.join(self.root, 'imports', 'theme.nss'),
+                                                           os.path.join(self.root, 'launcher', 'cache', 'theme_thumbnails'),
+                                                           os.path.join(self.root, 'launcher', 'cache', 'themes.json'))
+        widget.resize(860, 500)
+        widget.show()
+        widget.repaint()
+        self.app.processEvents()
+        took = elapsed_ms(start)
+        widget.thumbnail_loader.shutdown()
+        widget.close()
+        widget.deleteLater()
+        self.app.processEvents()
+        return [took]
+
+    def scenarios(self):
+        scenarios = [('time_to_first_frame', self.time_to_first_frame), ('manager_init', self.manager_init)]
+        for size in self.args.sizes:
+            scenarios.append((f"display_plugins[{size}]", lambda size=size: self.display_plugins(size)))
+            scenarios.append((f"scroll[{size}]", lambda size=size: self.scroll(size)))
+        scenarios.append(('modify_widget_load', self.modify_widget_load))
+        scenarios.append((f"id_search[{self.args.shell_ids}]", lambda: self.id_search(self.args.shell_ids)))
+        for path in (os.path.join(self.root, 'imports', 'modify.nss'), SHIPPED_IMAGES_NSS):
+            if os.path.exists(path):
+                scenarios.append((f"parse_nss[{os.path.basename(path)}]", lambda path=path: self.parse_nss(path)))
+        scenarios.append((f"theme_switcher[{self.args.themes}]", lambda: self.theme_switcher(self.args.themes)))
+        return scenarios
+
+    def shutdown(self):
+        if self.manager is not None:
+            self.close_manager(self.manager)
+            self.manager = None
+
+
+def summarize(samples):
+    ordered = sorted(samples)
+    return {
+        'median_ms': round(statistics.median(ordered), 3),
+        'p95_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+        'min_ms': round(ordered[0], 3),
+        'max_ms': round(ordered[-1], 3),
+        'samples': len(ordered),
+    }
+
+
+def compare(results, baseline, threshold):
+    """Prints each scenario against the baseline; returns the regressed names."""
+    regressions = []
+    print(f"\n{'scenario':<26} {'baseline (ms)':>14} {'now (ms)':>10} {'change':>9}")
+    for name, result in results.items():
+        before = baseline.get(name)
+        if not before:
+            print(f"{name:<26} {'-':>14} {result['median_ms']:>10.2f} {'new':>9}")
+            continue
+        change = (result['median_ms'] - before['median_ms']) / before['median_ms'] if before['median_ms'] else 0.0
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  REGRESSED"
+        print(f"{name:<26} {before['median_ms']:>14.2f} {result['median_ms']:>10.2f} {change:>+9.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="Plugins per synthetic catalog.")
+    parser.add_argument('--themes', type=int, default=DEFAULT_THEMES, help="Themes for the theme switcher scenario.")
+    parser.add_argument('--modify-ids', type=int, default=DEFAULT_MODIFY_IDS, help="Shell IDs in the generated modify.nss.")
+    parser.add_argument('--shell-ids', type=int, default=DEFAULT_SHELL_IDS, help="Extra shell IDs for the ID search scenario.")
+    parser.add_argument('--repeat', type=int, default=5, help="Runs per scenario.")
+    parser.add_argument('--only', nargs='+', default=None, help="Run only scenarios whose name starts with one of these.")
+    parser.add_argument('--output', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results.json'),
+                        help="Where to write the JSON results.")
+    parser.add_argument('--baseline', default=None, help="Results file to compare against.")
+    parser.add_argument('--threshold', type=float, default=0.2, help="Allowed median slowdown before a scenario counts as regressed.")
+    parser.add_argument('--first-frame-probe', metavar='ROOT', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.first_frame_probe:
+        first_frame_probe(args.first_frame_probe)
+        return
+
+    stub_windows_modules()
+    app = QApplication.instance() or QApplication(sys.argv)
+    with open(os.path.join(LAUNCHER_DIR, 'style.css'), 'r') as f:
+        app.setStyleSheet(f.read())
+
+    root = tempfile.mkdtemp(prefix='ima-bench-')
+    results = {}
+    try:
+        build_project(root, args.themes, args.modify_ids)
+        suite = Suite(app, root, args)
+        try:
+            for name, run in suite.scenarios():
+                if args.only and not any(name.startswith(prefix) for prefix in args.only):
+                    continue
+                samples = []
+                for _ in range(args.repeat):
+                    samples.extend(run())
+                results[name] = summarize(samples)
+                print(f"{name:<26} median {results[name]['median_ms']:>9.2f} ms   p95 {results[name]['p95_ms']:>9.2f} ms")
+        finally:
+            suite.shutdown()
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    report = {
+        'environment': {
+            'platform': platform.platform(),
+            'python': platform.python_version(),
+            'qt': QT_VERSION_STR,
+            'pyqt': PYQT_VERSION_STR,
+            'qpa': os.environ.get('QT_QPA_PLATFORM'),
+        },
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=4)
+    print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f).get('results', {})
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} scenario(s) regressed by more than {args.threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
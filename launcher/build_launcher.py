@@ -9,6 +9,7 @@ if __name__ == '__main__':
         f'--icon={os.path.join("icons", "icon.png")}',
         '--name=launcher',
         f'--add-data=style.css;.',
+        f'--add-data=shell_ids.json;.',
         f'--add-data=icons;icons',
         f'--add-data={os.path.join("..", "imports")};imports',
         f'--add-data={os.path.join("..", "theme")};theme',
@@ -16,6 +17,23 @@ if __name__ == '__main__':
         '--hidden-import=theme_editor_widget',
         '--hidden-import=theme_switcher_widget',
         '--hidden-import=utils',
+        '--hidden-import=downloader',
+        '--hidden-import=icon_loader',
+        '--hidden-import=icon_atlas',
+        '--hidden-import=details_cache',
+        '--hidden-import=plugin_grid',
+        '--hidden-import=plugin_state',
+        '--hidden-import=nss_imports',
+        '--hidden-import=plugin_search',
+        '--hidden-import=plugin_repository',
+        '--hidden-import=tracing',
+        '--hidden-import=theme_thumbnails',
+        '--hidden-import=nss_parser',
+        '--hidden-import=modify_document',
+        '--hidden-import=shell_ids',
+        '--hidden-import=theme_schema',
+        '--hidden-import=theme_store',
+        '--hidden-import=theme_preview',
         '--exclude-module=PyQt5.QtWebEngineWidgets',
         '--exclude-module=PyQt5.QtMultimedia',
         '--exclude-module=PyQt5.QtSql',
@@ -0,0 +1,136 @@
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import threading
+
+from utils import safe_file_write
+
+DETAILS_CACHE_MAX_BYTES = 64 * 1024 * 1024
+# Images in a rendered details page: the "!(alt)(url)" form and <img> tags.
+MARKDOWN_IMG_PATTERN = re.compile(r'!\((.*?)\)\((.*?)\)')
+IMG_TAG_PATTERN = re.compile(r'<img[^>]+src="(.*?)"[^>]*>')
+
+
+def image_urls(html_content):
+    """The URLs of the images html_content embeds, without data: URLs."""
+    urls = {m.group(2) for m in MARKDOWN_IMG_PATTERN.finditer(html_content)}
+    urls.update(m.group(1) for m in IMG_TAG_PATTERN.finditer(html_content))
+    return {url for url in urls if url and not url.startswith('data:')}
+
+
+class DetailsCache:
+    """Rendered details pages, keyed by plugin name and validated by the details.md
+    ETag and content hash. Embedded images are stored once as content-addressed blobs
+    and shared between pages. Entries and blobs are evicted least recently used first
+    once the cache grows past max_bytes."""
+
+    def __init__(self, cache_dir, max_bytes=DETAILS_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.details_dir = os.path.join(cache_dir, 'details')
+        self.blobs_dir = os.path.join(cache_dir, 'blobs')
+        self.url_index_path = os.path.join(self.blobs_dir, 'urls.json')
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(self.details_dir, exist_ok=True)
+        os.makedirs(self.blobs_dir, exist_ok=True)
+        self.url_index = self._load_json(self.url_index_path) or {}
+
+    def _load_json(self, path):
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (json.JSONDecodeError, IOError) as e:
+            print(f"Error reading details cache file {path}: {e}")
+            return None
+
+    def _entry_path(self, plugin_name):
+        return os.path.join(self.details_dir, f"{plugin_name}.json")
+
+    def _touch(self, path):
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+    def load(self, plugin_name):
+        entry_path = self._entry_path(plugin_name)
+        entry = self._load_json(entry_path)
+        if not isinstance(entry, dict) or 'html' not in entry:
+            return None
+        if any(not os.path.exists(os.path.join(self.blobs_dir, blob)) for blob in entry.get('blobs', [])):
+            return None
+        self._touch(entry_path)
+        for blob in entry.get('blobs', []):
+            self._touch(os.path.join(self.blobs_dir, blob))
+        return entry
+
+    def store(self, plugin_name, etag, content_hash, html, blobs):
+        entry = {'etag': etag, 'content_hash': content_hash, 'html': html, 'blobs': sorted(set(blobs))}
+        with self._lock:
+            safe_file_write(self._entry_path(plugin_name), json.dumps(entry))
+        self.evict()
+
+    def update_etag(self, plugin_name, entry, etag):
+        entry = dict(entry, etag=etag)
+        with self._lock:
+            safe_file_write(self._entry_path(plugin_name), json.dumps(entry))
+
+    def blob_for_url(self, url):
+        blob = self.url_index.get(url)
+        if blob and os.path.exists(os.path.join(self.blobs_dir, blob)):
+            return blob
+        return None
+
+    def store_blob(self, url, data, content_type):
+        extension = mimetypes.guess_extension((content_type or '').split(';')[0].strip()) or '.bin'
+        blob = hashlib.sha256(data).hexdigest() + extension
+        blob_path = os.path.join(self.blobs_dir, blob)
+        with self._lock:
+            if not os.path.exists(blob_path):
+                safe_file_write(blob_path, data)
+            self.url_index[url] = blob
+            safe_file_write(self.url_index_path, json.dumps(self.url_index))
+        return blob
+
+    def evict(self):
+        with self._lock:
+            # Pages rendered by older versions were written straight into the cache root.
+            for filename in os.listdir(self.cache_dir):
+                if filename.endswith('_details.html'):
+                    os.remove(os.path.join(self.cache_dir, filename))
+
+            entries = []
+            for filename in os.listdir(self.details_dir):
+                path = os.path.join(self.details_dir, filename)
+                entry = self._load_json(path) or {}
+                entries.append((os.path.getmtime(path), path, set(entry.get('blobs', []))))
+            blob_sizes = {}
+            for filename in os.listdir(self.blobs_dir):
+                path = os.path.join(self.blobs_dir, filename)
+                if path != self.url_index_path:
+                    blob_sizes[filename] = os.path.getsize(path)
+
+            referenced = set().union(*(blobs for _, _, blobs in entries)) if entries else set()
+            for blob in set(blob_sizes) - referenced:
+                os.remove(os.path.join(self.blobs_dir, blob))
+                del blob_sizes[blob]
+
+            total_bytes = sum(blob_sizes.values()) + sum(os.path.getsize(path) for _, path, _ in entries)
+            entries.sort()
+            while entries and total_bytes > self.max_bytes:
+                _, path, blobs = entries.pop(0)
+                total_bytes -= os.path.getsize(path)
+                os.remove(path)
+                still_referenced = set().union(*(b for _, _, b in entries)) if entries else set()
+                for blob in blobs - still_referenced:
+                    if blob in blob_sizes:
+                        total_bytes -= blob_sizes.pop(blob)
+                        os.remove(os.path.join(self.blobs_dir, blob))
+
+            if set(self.url_index.values()) - set(blob_sizes):
+                self.url_index = {url: blob for url, blob in self.url_index.items() if blob in blob_sizes}
+                safe_file_write(self.url_index_path, json.dumps(self.url_index))
@@ -0,0 +1,314 @@
+import functools
+import hashlib
+import io
+import mimetypes
+import os
+import tarfile
+import tempfile
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urljoin, urlparse
+
+REQUEST_TIMEOUT = 15
+MAX_DOWNLOAD_WORKERS = 8
+DOWNLOAD_CHUNK_SIZE = 256 * 1024
+RESUMABLE_CHUNK_SIZE = 1024 * 1024
+PART_SUFFIX = '.part'
+
+
+class _ProgressReader:
+    def __init__(self, raw, total_bytes, on_progress):
+        self.raw = raw
+        self.total_bytes = total_bytes
+        self.on_progress = on_progress
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        data = self.raw.read(size)
+        self.bytes_read += len(data)
+        if self.on_progress and self.total_bytes:
+            self.on_progress(min(self.bytes_read, self.total_bytes), self.total_bytes)
+        return data
+
+
+def safe_join(target_dir, relative_path):
+    """target_dir joined with relative_path, as an absolute path. Raises ValueError
+    if the result would lie outside target_dir."""
+    target_dir = os.path.abspath(target_dir)
+    local_path = os.path.abspath(os.path.join(target_dir, relative_path))
+    if os.path.commonpath([target_dir, local_path]) != target_dir:
+        raise ValueError(f"Path escapes the target directory: {relative_path}")
+    return local_path
+
+
+def _copy_with_blob_sha(source, local_path, size):
+    # Same digest git uses for blob objects, so archive installs produce a manifest
+    # that can be compared against the trees API on the next update.
+    digest = hashlib.sha1(b"blob %d\0" % size)
+    with open(local_path, 'wb') as f:
+        while True:
+            chunk = source.read(DOWNLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+            f.write(chunk)
+    return digest.hexdigest()
+
+
+def _requests():
+    # requests and the urllib3/http.client stack under it take over 100 ms to import,
+    # so they are loaded with the first session instead of at launcher startup.
+    import requests
+    import requests.adapters
+    return requests
+
+
+@functools.lru_cache(maxsize=None)
+def _local_file_adapter_class():
+    # Defined on first use, since its base class comes from the lazily imported requests.
+    requests = _requests()
+
+    class LocalFileAdapter(requests.adapters.BaseAdapter):
+        """Serves file:// URLs so a repository mirror on a local or network drive can be
+        read through the same session code as an HTTP one. Supports single-range
+        "bytes=N-" requests for resumable downloads."""
+
+        def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+            from urllib.request import url2pathname
+            response = requests.Response()
+            response.request = request
+            response.url = request.url
+            response.headers = requests.structures.CaseInsensitiveDict()
+            path = url2pathname(urlparse(request.url).path)
+            if request.method not in ('GET', 'HEAD') or not os.path.isfile(path):
+                response.status_code = 404 if request.method in ('GET', 'HEAD') else 405
+                response.reason = "Not Found" if response.status_code == 404 else "Method Not Allowed"
+                response.raw = io.BytesIO(b'')
+                return response
+
+            size = os.path.getsize(path)
+            offset = 0
+            range_header = request.headers.get('Range', '')
+            if range_header.startswith('bytes=') and range_header.endswith('-'):
+                offset = int(range_header[len('bytes='):-1] or 0)
+                if offset >= size:
+                    response.status_code = 416
+                    response.reason = "Range Not Satisfiable"
+                    response.raw = io.BytesIO(b'')
+                    return response
+            f = open(path, 'rb')
+            f.seek(offset)
+            response.status_code = 206 if offset else 200
+            response.reason = "Partial Content" if offset else "OK"
+            response.headers['Content-Length'] = str(size - offset)
+            content_type = mimetypes.guess_type(path)[0]
+            if content_type:
+                response.headers['Content-Type'] = content_type
+            response.raw = f if request.method == 'GET' else io.BytesIO(b'')
+            if request.method != 'GET':
+                f.close()
+            return response
+
+        def close(self):
+            pass
+
+    return LocalFileAdapter
+
+
+class ReleaseCache:
+    """Release metadata fetched at most once and shared by every install in a batch.
+    get() returns None when the repository has no release. Failed lookups are not
+    cached, so a later caller retries. Relative asset URLs (as written by mirrors)
+    are resolved against the metadata URL."""
+
+    def __init__(self, url):
+        self.url = url
+        self._lock = threading.Lock()
+        self._fetched = False
+        self._release = None
+
+    def get(self, session):
+        with self._lock:
+            if not self._fetched:
+                response = session.get(self.url, timeout=REQUEST_TIMEOUT)
+                if response.status_code != 404:
+                    response.raise_for_status()
+                    self._release = response.json()
+                    for asset in self._release.get('assets', []):
+                        asset['browser_download_url'] = urljoin(self.url, asset['browser_download_url'])
+                self._fetched = True
+            return self._release
+
+    def find_asset(self, session, name):
+        release = self.get(session)
+        for asset in (release or {}).get('assets', []):
+            if asset['name'] == name:
+                return asset
+        return None
+
+
+def asset_sha256(asset):
+    digest = (asset or {}).get('digest') or ''
+    return digest[len('sha256:'):] if digest.startswith('sha256:') else None
+
+
+def create_session(headers=None, pool_size=MAX_DOWNLOAD_WORKERS):
+    requests = _requests()
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.mount('file://', _local_file_adapter_class()())
+    if headers:
+        session.headers.update(headers)
+    return session
+
+
+def download_files(session, files, target_dir, max_workers=MAX_DOWNLOAD_WORKERS, is_cancelled=None, on_progress=None):
+    """Downloads files ({'url', 'path'} dicts) into target_dir with up to max_workers
+    requests in flight over the shared session. on_progress(done, total) is called from
+    the calling thread, so callers can emit Qt signals from it directly."""
+    total_files = len(files)
+    if not total_files:
+        return
+    makedirs_lock = threading.Lock()
+
+    def fetch(file_info):
+        if is_cancelled and is_cancelled():
+            return
+        local_path = safe_join(target_dir, file_info['path'])
+        with makedirs_lock:
+            os.makedirs(os.path.dirname(local_path), exist_ok=True)
+        response = session.get(file_info['url'], timeout=REQUEST_TIMEOUT)
+        response.raise_for_status()
+        with open(local_path, 'wb') as f:
+            f.write(response.content)
+
+    completed = 0
+    with ThreadPoolExecutor(max_workers=min(max_workers, total_files)) as executor:
+        futures = [executor.submit(fetch, file_info) for file_info in files]
+        try:
+            for future in as_completed(futures):
+                future.result()
+                completed += 1
+                if on_progress:
+                    on_progress(completed, total_files)
+                if is_cancelled and is_cancelled():
+                    break
+        finally:
+            for future in futures:
+                future.cancel()
+
+
+def extract_tarball(session, url, prefix, target_dir, is_cancelled=None, on_progress=None):
+    """Streams a repository tarball and writes only the entries under prefix into
+    target_dir. The top-level "<repo>-<sha>/" directory is stripped, and since git
+    archives list each directory contiguously the download stops once the prefix
+    has been passed. Returns {relative_path: git blob sha} for the files written."""
+    extracted = {}
+    with session.get(url, stream=True, timeout=REQUEST_TIMEOUT) as response:
+        response.raise_for_status()
+        total_bytes = int(response.headers.get('Content-Length') or 0)
+        reader = _ProgressReader(response.raw, total_bytes, on_progress)
+        with tarfile.open(fileobj=reader, mode='r|*') as archive:
+            for member in archive:
+                if is_cancelled and is_cancelled():
+                    break
+                parts = member.name.split('/', 1)
+                archive_path = parts[1] if len(parts) > 1 else ''
+                if not archive_path.startswith(prefix):
+                    if extracted:
+                        break
+                    continue
+                if not member.isfile():
+                    continue
+
+                relative_path = archive_path[len(prefix):]
+                local_path = safe_join(target_dir, relative_path)
+                os.makedirs(os.path.dirname(local_path), exist_ok=True)
+                with archive.extractfile(member) as source:
+                    extracted[relative_path] = _copy_with_blob_sha(source, local_path, member.size)
+    return extracted
+
+
+def extract_zip(session, url, prefix, target_dir, is_cancelled=None, on_progress=None):
+    """Downloads a zip archive to a temporary file (zip needs its trailing central
+    directory, so it cannot be read as a stream) and extracts the entries under
+    prefix into target_dir. Returns {relative_path: git blob sha} for the files written."""
+    extracted = {}
+    with tempfile.TemporaryFile() as archive_file:
+        with session.get(url, stream=True, timeout=REQUEST_TIMEOUT) as response:
+            response.raise_for_status()
+            total_bytes = int(response.headers.get('Content-Length') or 0)
+            bytes_read = 0
+            for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                if is_cancelled and is_cancelled():
+                    return extracted
+                archive_file.write(chunk)
+                bytes_read += len(chunk)
+                if on_progress and total_bytes:
+                    on_progress(min(bytes_read, total_bytes), total_bytes)
+
+        archive_file.seek(0)
+        with zipfile.ZipFile(archive_file) as archive:
+            for info in archive.infolist():
+                if is_cancelled and is_cancelled():
+                    break
+                if info.is_dir() or not info.filename.startswith(prefix):
+                    continue
+                relative_path = info.filename[len(prefix):]
+                local_path = safe_join(target_dir, relative_path)
+                os.makedirs(os.path.dirname(local_path), exist_ok=True)
+                with archive.open(info) as source:
+                    extracted[relative_path] = _copy_with_blob_sha(source, local_path, info.file_size)
+    return extracted
+
+
+def download_resumable(session, url, target_path, expected_size=None, expected_sha256=None, is_cancelled=None, on_progress=None):
+    """Downloads url into target_path through a "<target>.part" file. An existing
+    part file is resumed with an HTTP Range request, and the finished file is
+    checked against expected_size/expected_sha256 before it is atomically renamed
+    into place, so target_path only ever holds a complete file. Returns False if
+    cancelled (the part file is kept for the next attempt)."""
+    part_path = target_path + PART_SUFFIX
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    if expected_size is not None and offset > expected_size:
+        os.remove(part_path)
+        offset = 0
+
+    if expected_size is None or offset < expected_size:
+        headers = {'Range': f"bytes={offset}-"} if offset else {}
+        with session.get(url, headers=headers, stream=True, timeout=REQUEST_TIMEOUT) as response:
+            if response.status_code == 416:
+                # The server has nothing past our offset; fall through to verification.
+                pass
+            else:
+                response.raise_for_status()
+                if response.status_code != 206:
+                    offset = 0
+                total_bytes = expected_size or (offset + int(response.headers.get('Content-Length') or 0))
+                bytes_read = offset
+                with open(part_path, 'ab' if offset else 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=RESUMABLE_CHUNK_SIZE):
+                        if is_cancelled and is_cancelled():
+                            return False
+                        f.write(chunk)
+                        bytes_read += len(chunk)
+                        if on_progress and total_bytes:
+                            on_progress(min(bytes_read, total_bytes), total_bytes)
+
+    actual_size = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    if expected_size is not None and actual_size != expected_size:
+        os.remove(part_path)
+        raise ValueError(f"Downloaded {actual_size} bytes for {os.path.basename(target_path)}, expected {expected_size}.")
+    if expected_sha256:
+        digest = hashlib.sha256()
+        with open(part_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(RESUMABLE_CHUNK_SIZE), b''):
+                digest.update(chunk)
+        if digest.hexdigest() != expected_sha256.lower():
+            os.remove(part_path)
+            raise ValueError(f"Checksum mismatch for {os.path.basename(target_path)}.")
+    os.replace(part_path, target_path)
+    return True
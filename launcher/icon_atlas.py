@@ -0,0 +1,119 @@
+import json
+import os
+import threading
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QImage
+
+from utils import safe_file_write
+
+ATLAS_FILE = 'icons.atlas'
+ATLAS_INDEX_FILE = 'icons.atlas.json'
+ATLAS_FORMAT = QImage.Format_ARGB32_Premultiplied
+ATLAS_VERSION = 1
+
+
+class IconAtlas:
+    """Plugin icons pre-scaled to tile_size and packed as raw ARGB32 tiles into one
+    file, with a JSON index mapping plugin name to slot, image size and the icon_url
+    it was fetched from. The whole atlas is read once when opened, so a cold start
+    costs two file reads however many icons are cached. Entries whose icon_url has
+    changed are treated as missing. Tiles are written in place as they arrive; the
+    index is only rewritten by flush()."""
+
+    def __init__(self, cache_dir, tile_size):
+        self.cache_dir = cache_dir
+        self.tile_size = tile_size
+        self.tile_bytes = tile_size * tile_size * 4
+        self.atlas_path = os.path.join(cache_dir, ATLAS_FILE)
+        self.index_path = os.path.join(cache_dir, ATLAS_INDEX_FILE)
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.entries = {}
+        self.free_slots = []
+        self.data = bytearray()
+        self._open()
+
+    def _open(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        try:
+            with open(self.index_path, 'r') as f:
+                index = json.load(f)
+            with open(self.atlas_path, 'rb') as f:
+                self.data = bytearray(f.read())
+        except (OSError, ValueError):
+            return
+        if index.get('version') != ATLAS_VERSION or index.get('tile_size') != self.tile_size:
+            self.data = bytearray()
+            return
+        slots = len(self.data) // self.tile_bytes
+        self.entries = {name: entry for name, entry in index.get('entries', {}).items() if entry['slot'] < slots}
+        used = {entry['slot'] for entry in self.entries.values()}
+        self.free_slots = [slot for slot in range(slots) if slot not in used]
+
+    def contains(self, plugin_name):
+        with self._lock:
+            return plugin_name in self.entries
+
+    def get(self, plugin_name, url=None):
+        """The cached icon, or None when it is missing or was fetched from a URL
+        other than url. url=None accepts whatever is cached."""
+        with self._lock:
+            entry = self.entries.get(plugin_name)
+            if entry is None or (url is not None and entry.get('url') != url):
+                return None
+            offset = entry['slot'] * self.tile_bytes
+            tile = bytes(self.data[offset:offset + self.tile_bytes])
+        width, height = entry['width'], entry['height']
+        # copy() detaches the image from the tile buffer.
+        return QImage(tile, width, height, width * 4, ATLAS_FORMAT).copy()
+
+    def put(self, plugin_name, url, image):
+        """Scales image to fit a tile and stores it. Returns the stored image."""
+        if image.width() > self.tile_size or image.height() > self.tile_size:
+            image = image.scaled(self.tile_size, self.tile_size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        image = image.convertToFormat(ATLAS_FORMAT)
+        width, height = image.width(), image.height()
+        rows = image.constBits().asstring(image.sizeInBytes())
+        stride = image.bytesPerLine()
+        tile = b''.join(rows[y * stride:y * stride + width * 4] for y in range(height))
+        tile = tile.ljust(self.tile_bytes, b'\0')
+
+        with self._lock:
+            entry = self.entries.get(plugin_name)
+            slot = entry['slot'] if entry else self._free_slot()
+            offset = slot * self.tile_bytes
+            if offset >= len(self.data):
+                self.data.extend(b'\0' * (offset + self.tile_bytes - len(self.data)))
+            self.data[offset:offset + self.tile_bytes] = tile
+            mode = 'r+b' if os.path.exists(self.atlas_path) else 'wb'
+            with open(self.atlas_path, mode) as f:
+                f.seek(offset)
+                f.write(tile)
+            self.entries[plugin_name] = {'slot': slot, 'width': width, 'height': height, 'url': url}
+            self._dirty = True
+        return image
+
+    def _free_slot(self):
+        if self.free_slots:
+            return self.free_slots.pop()
+        return len(self.data) // self.tile_bytes
+
+    def retain(self, plugin_names):
+        """Drops entries for plugins no longer in the catalog; their slots are reused."""
+        with self._lock:
+            stale = [name for name in self.entries if name not in plugin_names]
+            for name in stale:
+                self.free_slots.append(self.entries.pop(name)['slot'])
+            self._dirty = self._dirty or bool(stale)
+
+    def flush(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            index = {'version': ATLAS_VERSION, 'tile_size': self.tile_size, 'entries': dict(self.entries)}
+            self._dirty = False
+        try:
+            safe_file_write(self.index_path, json.dumps(index))
+        except OSError as e:
+            print(f"Error writing icon atlas index: {e}")
@@ -0,0 +1,129 @@
+import os
+import threading
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+from PyQt5.QtGui import QImage
+
+import downloader
+from icon_atlas import IconAtlas
+import tracing
+
+ICON_SIZE = 70
+MAX_ICON_WORKERS = 4
+
+
+class _IconTaskSignals(QObject):
+    finished = pyqtSignal(str, QImage)
+
+
+class IconLoadTask(QRunnable):
+    def __init__(self, plugin_name, url, atlas, legacy_path, get_session, signals):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.plugin_name = plugin_name
+        self.url = url
+        self.atlas = atlas
+        self.legacy_path = legacy_path
+        self.get_session = get_session
+        self.signals = signals
+
+    @tracing.traced(category='icon')
+    def run(self):
+        # Only QImage is touched here; QPixmap must stay on the GUI thread.
+        image = QImage()
+        try:
+            if os.path.exists(self.legacy_path):
+                # Icons cached as one PNG per plugin move into the atlas once.
+                image.load(self.legacy_path)
+                os.remove(self.legacy_path)
+            if image.isNull() and self.url:
+                response = self.get_session().get(self.url, timeout=downloader.REQUEST_TIMEOUT)
+                response.raise_for_status()
+                image.loadFromData(response.content)
+            if not image.isNull():
+                image = self.atlas.put(self.plugin_name, self.url, image)
+        except Exception as e:
+            print(f"Error loading icon for {self.plugin_name}: {e}")
+            # Fall back to the icon cached for a previous icon_url, if any.
+            image = self.atlas.get(self.plugin_name) or QImage()
+        self.signals.finished.emit(self.plugin_name, image)
+
+
+class IconLoader(QObject):
+    """Loads plugin icons on a fixed-size thread pool. Icons already in the atlas
+    for the same icon_url are delivered straight from memory; the rest are fetched,
+    scaled to ICON_SIZE and added to the atlas. Requests for an icon that is already
+    queued are coalesced, and queued requests can be withdrawn when their card
+    scrolls out of view. icon_loaded carries a null QImage on failure."""
+    icon_loaded = pyqtSignal(str, QImage)
+
+    def __init__(self, cache_dir, headers=None, max_workers=MAX_ICON_WORKERS, parent=None):
+        super().__init__(parent)
+        self.cache_dir = cache_dir
+        self.atlas = IconAtlas(cache_dir, ICON_SIZE)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_workers)
+        self.headers = headers
+        self.max_workers = max_workers
+        # Created by the first task that has to download, so icons served from the
+        # cache never pay for importing requests.
+        self.session = None
+        self._session_lock = threading.Lock()
+        self.signals = _IconTaskSignals()
+        self.signals.finished.connect(self._on_task_finished)
+        self.pending = {}
+        self.flush_timer = QTimer(self)
+        self.flush_timer.setSingleShot(True)
+        self.flush_timer.setInterval(1000)
+        self.flush_timer.timeout.connect(self.atlas.flush)
+
+    def get_session(self):
+        with self._session_lock:
+            if self.session is None:
+                self.session = downloader.create_session(self.headers, pool_size=self.max_workers)
+            return self.session
+
+    def legacy_path(self, plugin_name):
+        return os.path.join(self.cache_dir, f"{plugin_name}.png")
+
+    def has_cached(self, plugin_name):
+        return self.atlas.contains(plugin_name) or os.path.exists(self.legacy_path(plugin_name))
+
+    def request(self, plugin_name, url, priority=0):
+        if plugin_name in self.pending:
+            return
+        image = self.atlas.get(plugin_name, url)
+        if image is None and not url and not os.path.exists(self.legacy_path(plugin_name)):
+            # Nothing to download from; keep showing the last icon we had.
+            image = self.atlas.get(plugin_name)
+        if image is not None:
+            self.icon_loaded.emit(plugin_name, image)
+            return
+        task = IconLoadTask(plugin_name, url, self.atlas, self.legacy_path(plugin_name), self.get_session, self.signals)
+        self.pending[plugin_name] = task
+        self.pool.start(task, priority)
+
+    def cancel(self, plugin_name):
+        task = self.pending.get(plugin_name)
+        if task and self.pool.tryTake(task):
+            del self.pending[plugin_name]
+
+    def is_pending(self, plugin_name):
+        return plugin_name in self.pending
+
+    def retain(self, plugin_names):
+        self.atlas.retain(plugin_names)
+        self.flush_timer.start()
+
+    def _on_task_finished(self, plugin_name, image):
+        self.pending.pop(plugin_name, None)
+        self.flush_timer.start()
+        self.icon_loaded.emit(plugin_name, image)
+
+    def shutdown(self):
+        self.pool.clear()
+        self.pending.clear()
+        self.pool.waitForDone(2000)
+        self.flush_timer.stop()
+        self.atlas.flush()
+        if self.session is not None:
+            self.session.close()
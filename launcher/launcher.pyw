@@ -1,31 +1,41 @@
+# Imported first so --trace / IMA_MENU_TRACE also cover the imports below.
+import tracing
 import sys
 import os
-import requests
 import threading
 import json
 import shutil
-import zipfile
-import re
-import base64
+import hashlib
 import subprocess
 import winreg
 from collections import deque
-import markdown
-from PyQt5.QtWidgets import (QApplication, QWidget, QLabel, QPushButton, QVBoxLayout, QHBoxLayout, QGridLayout,
-                             QScrollArea, QGraphicsDropShadowEffect, QProgressBar, QTextBrowser, QStackedWidget, QTabWidget, QDialog, QDialogButtonBox)
+from concurrent.futures import ThreadPoolExecutor
+from PyQt5.QtWidgets import (QApplication, QWidget, QLabel, QPushButton, QVBoxLayout, QHBoxLayout, QLineEdit,
+                             QGraphicsDropShadowEffect, QTextBrowser, QStackedWidget, QTabWidget, QDialog, QDialogButtonBox, QMessageBox)
 from PyQt5.QtGui import QColor, QPixmap, QFont, QPainter, QPainterPath, QPen, QTextOption, QIcon
-from PyQt5.QtCore import Qt, pyqtSignal, QObject, QThread, QTimer, QPropertyAnimation, QEasingCurve, QSize, QEvent
+from PyQt5.QtCore import Qt, pyqtSignal, QObject, QThread, QTimer, QPropertyAnimation, QEasingCurve, QSize, QEvent, QRect
 from modify_widget import ModifyWidget, CustomMessageBox
 from theme_switcher_widget import ThemeSwitcherWidget
 from theme_editor_widget import ThemeEditorWidget
 from utils import resource_path, safe_file_write
+import downloader
+from downloader import REQUEST_TIMEOUT
+from icon_loader import IconLoader
+from details_cache import DetailsCache, image_urls, MARKDOWN_IMG_PATTERN, IMG_TAG_PATTERN
+from nss_imports import get_import_manager
+from plugin_repository import create_repository
+from plugin_search import SearchIndexWorker
+from plugin_state import InstalledStateIndex, NOT_INSTALLED, PARTIALLY_INSTALLED
+from plugin_grid import (PluginListModel, PluginCardDelegate, PluginGridView, STATE_AVAILABLE, STATE_INSTALLED,
+                         STATE_OUTDATED, STATE_QUEUED, STATE_INSTALLING)
 import ctypes
 
-_GITHUB_REPO = "iMAboud/iMA-Menu-Plugins"
-GITHUB_PLUGINS_JSON_URL = f"https://raw.githubusercontent.com/{_GITHUB_REPO}/main/plugins.json"
-GITHUB_API_BASE_URL = f"https://api.github.com/repos/{_GITHUB_REPO}"
-GITHUB_RELEASES_API_URL = f"{GITHUB_API_BASE_URL}/releases/latest"
-REQUEST_TIMEOUT = 15
+# GitHub by default; IMA_MENU_REPOSITORY can point at a LAN mirror or a local directory.
+REPOSITORY = create_repository(os.environ.get('IMA_MENU_REPOSITORY'))
+PLUGIN_FETCH_MODE = os.environ.get('IMA_MENU_FETCH_MODE', 'archive')
+MAX_PARALLEL_INSTALLS = max(1, int(os.environ.get('IMA_MENU_MAX_PARALLEL_INSTALLS', '3')))
+MAX_DETAILS_IMAGE_WORKERS = 6
+NSS_IMPORTS_WRITE_DELAY_MS = 300
 
 def get_app_base_path():
     if getattr(sys, 'frozen', False):
@@ -40,14 +50,34 @@ PLUGINS_DIR = os.path.join(PROJECT_ROOT, 'plugins')
 LIB_DIR = os.path.join(APP_BASE_PATH, 'lib')
 CACHE_DIR = os.path.join(APP_BASE_PATH, 'cache')
 PLUGINS_CACHE_FILE = os.path.join(CACHE_DIR, 'plugins.json')
+PLUGINS_CACHE_META_FILE = os.path.join(CACHE_DIR, 'plugins.meta.json')
 ICONS_CACHE_DIR = os.path.join(CACHE_DIR, 'icons')
+THEME_THUMBNAILS_CACHE_DIR = os.path.join(CACHE_DIR, 'theme_thumbnails')
+THEME_INDEX_FILE = os.path.join(CACHE_DIR, 'themes.json')
+THEME_PREVIEWS_CACHE_DIR = os.path.join(CACHE_DIR, 'theme_previews')
+PLUGIN_MANIFEST_FILE = '.manifest.json'
 
 
 DEFAULT_ICON_PATH = resource_path('icon.ico')
 
+# Installs run in parallel; shell.nss writes are serialized by its import manager.
+LIB_DIR_LOCK = threading.Lock()
+
 
 def get_auth_headers(token):
-    return {'Authorization': f'token {token}'} if token else {}
+    # The GitHub token is never sent to mirrors.
+    return {'Authorization': f'token {token}'} if token and REPOSITORY.sends_token else {}
+
+def load_catalog_validators():
+    if not os.path.exists(PLUGINS_CACHE_FILE) or not os.path.exists(PLUGINS_CACHE_META_FILE):
+        return {}
+    try:
+        with open(PLUGINS_CACHE_META_FILE, 'r') as f:
+            meta = json.load(f)
+        return meta if isinstance(meta, dict) else {}
+    except (json.JSONDecodeError, IOError) as e:
+        print(f"Error loading catalog cache metadata: {e}")
+        return {}
 
 def resolve_path(path_str):
     resolved_path_str = os.path.expandvars(path_str.replace('/', os.sep))
@@ -59,55 +89,36 @@ def resolve_path(path_str):
         return os.path.abspath(os.path.join(PROJECT_ROOT, resolved_path_str))
     return resolved_path_str
 
+def load_plugin_manifest(plugin_dir):
+    manifest_path = os.path.join(plugin_dir, PLUGIN_MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return {}
+    try:
+        with open(manifest_path, 'r') as f:
+            manifest = json.load(f)
+        return manifest if isinstance(manifest, dict) else {}
+    except (json.JSONDecodeError, IOError) as e:
+        print(f"Error loading plugin manifest {manifest_path}: {e}")
+        return {}
+
+def save_plugin_manifest(plugin_dir, manifest):
+    safe_file_write(os.path.join(plugin_dir, PLUGIN_MANIFEST_FILE), json.dumps(manifest, indent=4, sort_keys=True))
+
 def get_plugin_install_path(plugin_data):
     install_path_str = plugin_data.get('install_path')
     if not install_path_str:
         return os.path.join(PLUGINS_DIR, plugin_data['name'])
     return resolve_path(install_path_str)
 
-def add_nss_import(plugin_data):
-    nss_file_path = os.path.join(PROJECT_ROOT, 'shell.nss')
+def get_plugin_import_path(plugin_data):
+    # Import paths in shell.nss are relative to the project root
     nss_path = resolve_path(plugin_data['nss_path'])
-    nss_file = plugin_data['nss_file']
-    
-    # Make the nss_path relative to the project root for the import statement
     relative_nss_path = os.path.relpath(nss_path, PROJECT_ROOT).replace(os.sep, '/')
-    import_statement = f"import \'{relative_nss_path}/{nss_file}\'\n"
+    return f"{relative_nss_path}/{plugin_data['nss_file']}"
 
+def update_nss_imports(add=(), remove=()):
     try:
-        with open(nss_file_path, 'r') as f:
-            lines = f.readlines()
-
-        if any(import_statement.strip() in line for line in lines):
-            return
-
-        last_import_index = -1
-        for i, line in enumerate(lines):
-            if line.strip().startswith("import"):
-                last_import_index = i
-        
-        if last_import_index != -1:
-            lines.insert(last_import_index + 1, import_statement)
-        else:
-            lines.append(import_statement)
-
-        safe_file_write(nss_file_path, "".join(lines))
-    except IOError as e:
-        print(f"Error updating shell.nss: {e}")
-
-def remove_nss_import(plugin_data):
-    nss_file_path = os.path.join(PROJECT_ROOT, 'shell.nss')
-    nss_path = resolve_path(plugin_data['nss_path'])
-    nss_file = plugin_data['nss_file']
-    relative_nss_path = os.path.relpath(nss_path, PROJECT_ROOT).replace(os.sep, '/')
-    import_statement = f"import \'{relative_nss_path}/{nss_file}\'"
-    try:
-        with open(nss_file_path, 'r') as f:
-            lines = f.readlines()
-        
-        new_lines = [line for line in lines if import_statement not in line]
-        
-        safe_file_write(nss_file_path, "".join(new_lines))
+        get_import_manager(os.path.join(PROJECT_ROOT, 'shell.nss')).apply(add=add, remove=remove)
     except IOError as e:
         print(f"Error updating shell.nss: {e}")
 
@@ -131,112 +142,97 @@ def add_to_path(directory):
 
 class FetchPluginsThread(QObject):
     finished = pyqtSignal(list)
+    not_modified = pyqtSignal()
     error = pyqtSignal(str)
 
-    def __init__(self, token):
+    def __init__(self, token, validators=None):
         super().__init__()
         self.token = token
+        self.validators = validators or {}
 
+    @tracing.traced(category='worker')
     def run(self):
         try:
             headers = get_auth_headers(self.token)
-            response = requests.get(GITHUB_PLUGINS_JSON_URL, headers=headers, timeout=REQUEST_TIMEOUT)
+            if self.validators.get('etag'):
+                headers['If-None-Match'] = self.validators['etag']
+            if self.validators.get('last_modified'):
+                headers['If-Modified-Since'] = self.validators['last_modified']
+
+            with downloader.create_session() as session:
+                response = session.get(REPOSITORY.catalog_url, headers=headers, timeout=REQUEST_TIMEOUT)
+            if response.status_code == 304:
+                self.not_modified.emit()
+                return
             response.raise_for_status()
             plugins = response.json()
+            if not isinstance(plugins, list):
+                raise ValueError("Invalid plugins.json format")
 
-            with open(PLUGINS_CACHE_FILE, 'w') as f:
-                json.dump(plugins, f, indent=4)
+            safe_file_write(PLUGINS_CACHE_FILE, json.dumps(plugins, indent=4))
+            safe_file_write(PLUGINS_CACHE_META_FILE, json.dumps({
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+            }, indent=4))
 
             self.finished.emit(plugins)
         except Exception as e:
             self.error.emit(str(e))
 
-class IconDownloadWorker(QObject):
-    finished = pyqtSignal(str, QPixmap)
-    error = pyqtSignal(str)
-
-    def __init__(self, plugin_name, url, save_path, headers):
-        super().__init__()
-        self.plugin_name = plugin_name
-        self.url = url
-        self.save_path = save_path
-        self.headers = headers
-
-    def run(self):
-        pixmap = None
-        try:
-            response = requests.get(self.url, headers=self.headers, timeout=REQUEST_TIMEOUT)
-            response.raise_for_status()
-            pixmap = QPixmap()
-            pixmap.loadFromData(response.content)
-            if not pixmap.isNull():
-                pixmap.save(self.save_path)
-            self.finished.emit(self.plugin_name, pixmap)
-        except Exception as e:
-            print(f"Error downloading icon for {self.plugin_name}: {e}")
-            pixmap = None
-            self.error.emit(str(e))
-
 class InstallationWorker(QObject):
     progress = pyqtSignal(str, int)
     finished = pyqtSignal(str, str)
     error = pyqtSignal(str, str, str)
 
-    def __init__(self, plugin_data, headers):
+    def __init__(self, plugin_data, headers, release_cache=None):
         super().__init__()
         self.plugin_data = plugin_data
         self.plugin_name = plugin_data['name']
         self.headers = headers
+        self.release_cache = release_cache or downloader.ReleaseCache(REPOSITORY.release_url)
         self._is_cancelled = False
         self.files_to_download = []
 
+    @tracing.traced(category='worker')
     def run(self):
+        self.session = downloader.create_session(self.headers)
         try:
             target_plugin_dir = get_plugin_install_path(self.plugin_data)
 
-            branch_url = f"{GITHUB_API_BASE_URL}/branches/main"
-            branch_res = requests.get(branch_url, headers=self.headers, timeout=REQUEST_TIMEOUT)
-            branch_res.raise_for_status()
-            root_tree_sha = branch_res.json()['commit']['commit']['tree']['sha']
+            manifest = load_plugin_manifest(target_plugin_dir)
+            is_delta_update = bool(manifest) and os.path.exists(os.path.join(target_plugin_dir, 'version'))
 
-            trees_api_url = f"{GITHUB_API_BASE_URL}/git/trees/{root_tree_sha}?recursive=true"
-            tree_res = requests.get(trees_api_url, headers=self.headers, timeout=REQUEST_TIMEOUT)
-            tree_res.raise_for_status()
-            tree_data = tree_res.json()
+            if is_delta_update:
+                self.update_changed_files(target_plugin_dir, manifest)
+                if self._is_cancelled:
+                    self.finished.emit(self.plugin_name, "cancelled")
+                    return
+            else:
+                installed_from_archive = PLUGIN_FETCH_MODE == 'archive' and self.install_from_archive(target_plugin_dir)
+                if not installed_from_archive and not self._is_cancelled:
+                    self.files_to_download = self.list_plugin_files()
+                    if not self.files_to_download:
+                         raise Exception(f"Could not find any files for plugin '{self.plugin_name}' in the repository.")
 
-            if 'tree' not in tree_data:
-                raise Exception("Malformed response from Git Trees API")
+                    if self._is_cancelled:
+                        self.finished.emit(self.plugin_name, "cancelled")
+                        return
 
-            plugin_path_prefix = f"{self.plugin_name}/"
-            base_download_url = f"https://raw.githubusercontent.com/{_GITHUB_REPO}/main"
+                    self.download_files(target_plugin_dir, self.files_to_download)
+                    if not self._is_cancelled:
+                        save_plugin_manifest(target_plugin_dir, {f['path']: f['sha'] for f in self.files_to_download})
 
-            for item in tree_data['tree']:
                 if self._is_cancelled:
+                    if os.path.exists(target_plugin_dir):
+                        shutil.rmtree(target_plugin_dir)
                     self.finished.emit(self.plugin_name, "cancelled")
                     return
-                if item.get('type') == 'blob' and item['path'].startswith(plugin_path_prefix):
-                    relative_path = item['path'][len(plugin_path_prefix):]
-                    download_url = f"{base_download_url}/{item['path']}"
-                    self.files_to_download.append({'url': download_url, 'path': relative_path})
-            
-            if not self.files_to_download:
-                 raise Exception(f"Could not find any files for plugin '{self.plugin_name}' in the repository.")
-
-            if self._is_cancelled:
-                self.finished.emit(self.plugin_name, "cancelled")
-                return
-
-            self.download_files(target_plugin_dir, self.headers)
-            if self._is_cancelled:
-                if os.path.exists(target_plugin_dir):
-                    shutil.rmtree(target_plugin_dir)
-                self.finished.emit(self.plugin_name, "cancelled")
-                return
 
             if 'dependencies' in self.plugin_data:
                 self.progress.emit(self.plugin_name, 0)
-                self.download_dependencies(self.plugin_data['dependencies'], self.headers)
-                add_to_path(LIB_DIR)
+                with LIB_DIR_LOCK:
+                    self.download_dependencies(self.plugin_data['dependencies'])
+                    add_to_path(LIB_DIR)
 
             version_file_path = os.path.join(target_plugin_dir, 'version')
             with open(version_file_path, 'w') as f:
@@ -250,73 +246,137 @@ class InstallationWorker(QObject):
                     except Exception as e:
                         print(f"Failed to auto-launch {launch_file_path}: {e}")
 
-            add_nss_import(self.plugin_data)
             self.finished.emit(self.plugin_name, "installed")
         except Exception as e:
             self.error.emit(self.plugin_name, "failed", str(e))
+        finally:
+            self.session.close()
 
-    def download_files(self, target_plugin_dir, headers):
+    def list_plugin_files(self):
+        return REPOSITORY.list_plugin_files(self.session, self.plugin_name)
+
+    def find_release_archive_url(self):
+        asset = self.release_cache.find_asset(self.session, f"{self.plugin_name}.zip")
+        return asset['browser_download_url'] if asset else None
+
+    def install_from_archive(self, target_plugin_dir):
         if os.path.exists(target_plugin_dir): shutil.rmtree(target_plugin_dir)
         os.makedirs(target_plugin_dir)
 
-        total_files = len(self.files_to_download)
-        for i, file_info in enumerate(self.files_to_download):
-            if self._is_cancelled:
-                return
-
-            relative_path = file_info['path']
-            local_path = os.path.join(target_plugin_dir, relative_path)
-            os.makedirs(os.path.dirname(local_path), exist_ok=True)
+        def on_progress(bytes_read, total_bytes):
+            self.progress.emit(self.plugin_name, int((bytes_read / total_bytes) * 100))
 
+        plugin_path_prefix = f"{self.plugin_name}/"
+        try:
+            asset_url = self.find_release_archive_url()
+            if asset_url:
+                extracted = downloader.extract_zip(self.session, asset_url, plugin_path_prefix, target_plugin_dir,
+                                                   is_cancelled=lambda: self._is_cancelled, on_progress=on_progress)
+            elif REPOSITORY.tarball_url:
+                extracted = downloader.extract_tarball(self.session, REPOSITORY.tarball_url, plugin_path_prefix, target_plugin_dir,
+                                                       is_cancelled=lambda: self._is_cancelled, on_progress=on_progress)
+            else:
+                extracted = {}
+        except Exception as e:
+            print(f"Archive install failed for {self.plugin_name}, falling back to per-file download: {e}")
+            extracted = {}
+
+        if self._is_cancelled:
+            return True
+        if extracted:
+            save_plugin_manifest(target_plugin_dir, extracted)
+            return True
+        shutil.rmtree(target_plugin_dir)
+        return False
+
+    def update_changed_files(self, target_plugin_dir, manifest):
+        remote_files = self.list_plugin_files()
+        if not remote_files:
+            raise Exception(f"Could not find any files for plugin '{self.plugin_name}' in the repository.")
+        remote_paths = {f['path'] for f in remote_files}
+
+        changed_files = [f for f in remote_files
+                         if manifest.get(f['path']) != f['sha'] or not os.path.exists(os.path.join(target_plugin_dir, f['path']))]
+        changed_paths = {f['path'] for f in changed_files}
+        removed_paths = [path for path in manifest if path not in remote_paths]
+
+        # Drop the entries about to change first, so an interrupted update re-fetches them next time.
+        save_plugin_manifest(target_plugin_dir, {path: sha for path, sha in manifest.items()
+                                                 if path in remote_paths and path not in changed_paths})
+
+        plugin_dir = os.path.abspath(target_plugin_dir)
+        for relative_path in removed_paths:
+            # The manifest is a local file, so a corrupted one must not reach outside the plugin.
             try:
-                response = requests.get(file_info['url'], headers=headers, timeout=REQUEST_TIMEOUT)
-                response.raise_for_status()
-                with open(local_path, 'wb') as f:
-                    f.write(response.content)
-            except Exception as e:
-                shutil.rmtree(target_plugin_dir)
-                raise e
+                local_path = downloader.safe_join(plugin_dir, relative_path)
+            except ValueError as e:
+                print(f"Skipping removal for {self.plugin_name}: {e}")
+                continue
+            if os.path.isfile(local_path):
+                os.remove(local_path)
+            parent_dir = os.path.dirname(local_path)
+            while parent_dir != plugin_dir and os.path.isdir(parent_dir) and not os.listdir(parent_dir):
+                os.rmdir(parent_dir)
+                parent_dir = os.path.dirname(parent_dir)
+
+        print(f"Updating {self.plugin_name}: {len(changed_files)} changed, {len(removed_paths)} removed, "
+              f"{len(remote_files) - len(changed_files)} unchanged.")
+        if changed_files:
+            self.download_files(target_plugin_dir, changed_files, clean=False)
+        if not self._is_cancelled:
+            save_plugin_manifest(target_plugin_dir, {f['path']: f['sha'] for f in remote_files})
+
+    def download_files(self, target_plugin_dir, files, clean=True):
+        if clean:
+            if os.path.exists(target_plugin_dir): shutil.rmtree(target_plugin_dir)
+            os.makedirs(target_plugin_dir)
+
+        def on_progress(completed, total_files):
+            self.progress.emit(self.plugin_name, int((completed / total_files) * 100))
 
-            progress_val = int(((i + 1) / total_files) * 100)
-            self.progress.emit(self.plugin_name, progress_val)
+        try:
+            downloader.download_files(self.session, files, target_plugin_dir,
+                                      is_cancelled=lambda: self._is_cancelled, on_progress=on_progress)
+        except Exception as e:
+            if clean:
+                shutil.rmtree(target_plugin_dir)
+            raise e
 
-    def download_dependencies(self, dependencies, headers):
+    def download_dependencies(self, dependencies):
         self.progress.emit(self.plugin_name, 0)
         total_dependencies = len(dependencies)
+        os.makedirs(LIB_DIR, exist_ok=True)
         for i, dep_info in enumerate(dependencies):
             if self._is_cancelled:
                 return
             dep_name = dep_info['name']
             dep_path = os.path.join(LIB_DIR, dep_name)
 
-            if os.path.exists(dep_path):
-                print(f"Dependency {dep_name} already exists. Skipping download.")
-                self.progress.emit(self.plugin_name, int(((i + 1) / total_dependencies) * 100))
-                continue
+            def on_progress(bytes_read, total_bytes):
+                self.progress.emit(self.plugin_name, int(((i + bytes_read / total_bytes) / total_dependencies) * 100))
 
             try:
-                response = requests.get(GITHUB_RELEASES_API_URL, headers=headers, timeout=REQUEST_TIMEOUT)
-                response.raise_for_status()
-                release_data = response.json()
-
-                asset_url = None
-                for asset in release_data['assets']:
-                    if asset['name'] == dep_name:
-                        asset_url = asset['browser_download_url']
-                        break
-                
-                if not asset_url:
+                try:
+                    asset = self.release_cache.find_asset(self.session, dep_name)
+                except Exception:
+                    if not os.path.exists(dep_path):
+                        raise
+                    asset = None
+
+                # Files from before downloads went through .part files may be truncated,
+                # so an existing dependency only counts when its size matches the asset.
+                if os.path.exists(dep_path) and (asset is None or os.path.getsize(dep_path) == asset.get('size')):
+                    print(f"Dependency {dep_name} already exists. Skipping download.")
+                    self.progress.emit(self.plugin_name, int(((i + 1) / total_dependencies) * 100))
+                    continue
+
+                if not asset:
                     raise Exception(f"Dependency {dep_name} not found in latest release assets.")
 
-                dep_response = requests.get(asset_url, stream=True, headers=headers, timeout=REQUEST_TIMEOUT)
-                dep_response.raise_for_status()
-
-                os.makedirs(LIB_DIR, exist_ok=True)
-                with open(dep_path, 'wb') as f:
-                    for chunk in dep_response.iter_content(chunk_size=8192):
-                        if chunk:
-                            f.write(chunk)
-                print(f"Downloaded dependency: {dep_name}")
+                if downloader.download_resumable(self.session, asset['browser_download_url'], dep_path,
+                                                 expected_size=asset.get('size'), expected_sha256=downloader.asset_sha256(asset),
+                                                 is_cancelled=lambda: self._is_cancelled, on_progress=on_progress):
+                    print(f"Downloaded dependency: {dep_name}")
             except Exception as e:
                 print(f"Error downloading dependency {dep_name}: {e}")
             self.progress.emit(self.plugin_name, int(((i + 1) / total_dependencies) * 100))
@@ -326,68 +386,103 @@ class InstallationWorker(QObject):
 
 class DetailsFetchWorker(QObject):
     finished = pyqtSignal(str)
+    not_modified = pyqtSignal()
     error = pyqtSignal(str)
 
-    def __init__(self, plugin_name, headers):
+    def __init__(self, plugin_name, headers, details_cache, cached_entry=None):
         super().__init__()
         self.plugin_name = plugin_name
         self.headers = headers
+        self.details_cache = details_cache
+        self.cached_entry = cached_entry
 
+    @tracing.traced(category='worker')
     def run(self):
+        session = downloader.create_session(self.headers)
         try:
-            details_url = f"https://raw.githubusercontent.com/iMAboud/iMA-Menu-Plugins/main/{self.plugin_name}/details.md"
-            response = requests.get(details_url, headers=self.headers, timeout=REQUEST_TIMEOUT)
-
-            if response.status_code == 200:
+            details_url = REPOSITORY.details_url(self.plugin_name)
+            request_headers = {}
+            if self.cached_entry and self.cached_entry.get('etag'):
+                request_headers['If-None-Match'] = self.cached_entry['etag']
+            response = session.get(details_url, headers=request_headers, timeout=REQUEST_TIMEOUT)
+
+            if response.status_code == 304:
+                self.not_modified.emit()
+            elif response.status_code == 200:
                 markdown_content = response.text
-                html_content = self.markdown_to_html_with_images(markdown_content)
-                
-                temp_html_path = os.path.join(CACHE_DIR, f"{self.plugin_name}_details.html")
-                with open(temp_html_path, 'w', encoding='utf-8') as f:
-                    f.write(html_content)
+                etag = response.headers.get('ETag')
+                content_hash = hashlib.sha256(markdown_content.encode('utf-8')).hexdigest()
+                if self.cached_entry and self.cached_entry.get('content_hash') == content_hash:
+                    self.details_cache.update_etag(self.plugin_name, self.cached_entry, etag)
+                    self.not_modified.emit()
+                    return
 
+                html_content, blobs = self.markdown_to_html_with_images(markdown_content)
+                self.details_cache.store(self.plugin_name, etag, content_hash, html_content, blobs)
                 self.finished.emit(html_content)
             else:
                 self.finished.emit(f"No details found for {self.plugin_name}.")
         except Exception as e:
-            self.error.emit(str(e))
+            if self.cached_entry:
+                print(f"Error revalidating details for {self.plugin_name}, showing cached copy: {e}")
+                self.not_modified.emit()
+            else:
+                self.error.emit(str(e))
+        finally:
+            session.close()
+
+    def fetch_images(self, urls):
+        # Image hosts are arbitrary, so these requests never carry the GitHub token.
+        image_session = downloader.create_session(pool_size=MAX_DETAILS_IMAGE_WORKERS)
+        try:
+            # A mirror serves its own copies, so details pages work without reaching the original hosts.
+            mirrored = REPOSITORY.image_urls(image_session)
+        except Exception as e:
+            print(f"Failed to load the mirrored image list: {e}")
+            mirrored = {}
+
+        def fetch(url):
+            blob = self.details_cache.blob_for_url(url)
+            if blob:
+                return blob
+            try:
+                response = image_session.get(mirrored.get(url, url), timeout=REQUEST_TIMEOUT)
+                if response.status_code == 200:
+                    return self.details_cache.store_blob(url, response.content, response.headers.get('Content-Type', 'image/png'))
+            except Exception as e:
+                print(f"Failed to download image {url}: {e}")
+            return None
+
+        try:
+            with ThreadPoolExecutor(max_workers=MAX_DETAILS_IMAGE_WORKERS) as executor:
+                return {url: blob for url, blob in zip(urls, executor.map(fetch, urls)) if blob}
+        finally:
+            image_session.close()
 
     def markdown_to_html_with_images(self, markdown_content):
+        # Imported on first use: markdown is only needed once a details popup opens.
+        import markdown
         html_content = markdown.markdown(markdown_content)
+        # Blobs are referenced by bare file name and resolved through the browser's search paths.
+        blobs = self.fetch_images(list(image_urls(html_content)))
 
         def replace_markdown_img(match):
             alt_text = match.group(1)
             src_url = match.group(2)
-            if src_url and not src_url.startswith('data:'):
-                try:
-                    response = requests.get(src_url, timeout=REQUEST_TIMEOUT)
-                    if response.status_code == 200:
-                        encoded_img = base64.b64encode(response.content).decode('utf-8')
-                        mime_type = response.headers.get('Content-Type', 'image/png')
-                        data_uri = f"data:{mime_type};base64,{encoded_img}"
-                        return f'<img alt="{alt_text}" src="{data_uri}">' 
-                except Exception as e:
-                    print(f"Failed to download or embed image {src_url}: {e}")
+            if src_url in blobs:
+                return f'<img alt="{alt_text}" src="{blobs[src_url]}">'
             return match.group(0)
 
-        html_content = re.sub(r'!\((.*?)\)\((.*?)\)', replace_markdown_img, html_content)
+        html_content = MARKDOWN_IMG_PATTERN.sub(replace_markdown_img, html_content)
 
         def replace_img_src(match):
             full_tag = match.group(0)
             src_url = match.group(1)
-            if src_url and not src_url.startswith('data:'):
-                try:
-                    response = requests.get(src_url, timeout=REQUEST_TIMEOUT)
-                    if response.status_code == 200:
-                        encoded_img = base64.b64encode(response.content).decode('utf-8')
-                        mime_type = response.headers.get('Content-Type', 'image/png')
-                        data_uri = f"data:{mime_type};base64,{encoded_img}"
-                        return full_tag.replace(src_url, data_uri)
-                except Exception as e:
-                    print(f"Failed to download or embed image {src_url}: {e}")
+            if src_url in blobs:
+                return full_tag.replace(src_url, blobs[src_url])
             return full_tag
-        
-        html_content = re.sub(r'<img[^>]+src="(.*?)"[^>]*>', replace_img_src, html_content)
+
+        html_content = IMG_TAG_PATTERN.sub(replace_img_src, html_content)
 
         return f'''
         <html><head><style>
@@ -397,23 +492,10 @@ class DetailsFetchWorker(QObject):
             h1, h2, h3, h4, h5, h6 {{ margin-top: 1em; margin-bottom: 0.5em; }}
             ul, ol {{ margin-bottom: 1em; padding-left: 20px; }}
         </style></head><body>{html_content}</body></html>
-        '''
-
-class ClickableWidget(QWidget):
-    plugin_card_clicked = pyqtSignal(str, QWidget)
-
-    def __init__(self, plugin_name, parent=None):
-        super().__init__(parent)
-        self.plugin_name = plugin_name
-        self.setAttribute(Qt.WA_StyledBackground, True)
-        self.setMouseTracking(True)
-
-    def mousePressEvent(self, event):
-        self.plugin_card_clicked.emit(self.plugin_name, self)
-        super().mousePressEvent(event)
+        ''', list(blobs.values())
 
 class DetailsPopup(QWidget):
-    def __init__(self, plugin_data, parent=None, start_geom=None):
+    def __init__(self, plugin_data, parent=None, start_geom=None, icon=None):
         super().__init__(parent)
         self.plugin_data = plugin_data
         self.start_geom = start_geom
@@ -433,9 +515,7 @@ class DetailsPopup(QWidget):
         icon_label = QLabel()
         icon_label.setFixedSize(40, 40)
         icon_label.setScaledContents(True)
-        icon_pixmap = QPixmap(os.path.join(ICONS_CACHE_DIR, f"{self.plugin_data['name']}.png"))
-        if icon_pixmap.isNull():
-            icon_pixmap = QPixmap(DEFAULT_ICON_PATH)
+        icon_pixmap = icon if icon is not None and not icon.isNull() else QPixmap(DEFAULT_ICON_PATH)
         icon_label.setPixmap(icon_pixmap)
         title_layout.addWidget(icon_label)
 
@@ -550,6 +630,7 @@ class UnsavedChangesDialog(QDialog):
 class PluginManager(QWidget):
     operation_signal = pyqtSignal(str, str, str)
 
+    @tracing.traced(category='ui')
     def __init__(self):
         super().__init__()
         self.setWindowTitle("iMA Plugin Manager")
@@ -560,21 +641,39 @@ class PluginManager(QWidget):
 
         self.setup_cache_dirs()
         self.github_token = self.load_github_token()
+        self.details_cache = DetailsCache(CACHE_DIR)
         
         self.active_threads = {}
         self.installation_queue = deque()
-        self.current_installing_plugin = None
+        self.installing_plugins = set()
+        self.release_cache = None
         self.uninstalled_plugins = set()
+        # shell.nss import changes by path (True to add, False to remove). They are
+        # written together once the install batch drains, or after a short delay
+        # when no installs are running.
+        self.pending_imports = {}
+        self.imports_timer = QTimer(self)
+        self.imports_timer.setSingleShot(True)
+        self.imports_timer.setInterval(NSS_IMPORTS_WRITE_DELAY_MS)
+        self.imports_timer.timeout.connect(self.flush_nss_imports)
 
         self.all_plugins_data = {}
-        self.plugin_cards = {}
-        self.plugin_progress_bars = {}
-        self.plugin_buttons = {}
-        self.plugin_update_buttons = {}
-        self.plugin_action_layouts = {}
-        self.plugin_description_labels = {}
-        self.plugin_icon_labels = {}
-        self.icons_loaded = set()
+        self.plugin_model = PluginListModel(self.get_plugin_state, self)
+        self.search_index = None
+        self.search_generation = 0
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(150)
+        self.search_timer.timeout.connect(self.apply_search)
+        self.installed_state = InstalledStateIndex(self)
+        self.installed_state.changed.connect(self.on_installed_state_changed)
+        self.icon_loader = IconLoader(ICONS_CACHE_DIR, self.get_auth_headers(), parent=self)
+        self.icon_loader.icon_loaded.connect(self.on_icon_loaded)
+        self.visible_cards_timer = QTimer(self)
+        self.visible_cards_timer.setSingleShot(True)
+        self.visible_cards_timer.setInterval(50)
+        self.visible_cards_timer.timeout.connect(self.check_visible_cards)
+        self.is_revalidating = False
         self.details_popup = None
         self.ignore_next_click = False
 
@@ -599,20 +698,64 @@ class PluginManager(QWidget):
 
         self.plugins_page = QWidget()
         self.plugins_layout = QVBoxLayout(self.plugins_page)
-        self.scroll_area = QScrollArea(self)
-        self.scroll_area.setWidgetResizable(True)
-        self.scroll_area.setObjectName("scrollArea")
-        self.scroll_content = QWidget()
-        self.grid_layout = QGridLayout(self.scroll_content)
-        self.scroll_area.setWidget(self.scroll_content)
-        self.scroll_area.setStyleSheet("border: 0px;")
-        self.plugins_layout.addWidget(self.scroll_area)
-        self.scroll_area.verticalScrollBar().valueChanged.connect(self.check_visible_cards)
+        self.search_box = QLineEdit()
+        self.search_box.setPlaceholderText("Search plugins...")
+        self.search_box.setClearButtonEnabled(True)
+        self.search_box.setStyleSheet("background-color: rgba(255, 255, 255, 0.1); border-radius: 8px; padding: 5px; color: #FFFFFF;")
+        self.search_box.textChanged.connect(lambda: self.search_timer.start())
+        self.plugins_layout.addWidget(self.search_box)
+        self.plugin_view = PluginGridView(self)
+        self.plugin_view.setItemDelegate(PluginCardDelegate(DEFAULT_ICON_PATH, self.plugin_view))
+        self.plugin_view.setModel(self.plugin_model)
+        self.plugin_view.card_clicked.connect(self.show_details_popup)
+        self.plugin_view.action_triggered.connect(self.on_card_action)
+        self.plugins_layout.addWidget(self.plugin_view)
+        # Connected through lambdas so the signal arguments are not taken as start(msec).
+        self.plugin_view.verticalScrollBar().valueChanged.connect(lambda: self.visible_cards_timer.start())
+        self.plugin_view.verticalScrollBar().rangeChanged.connect(lambda: self.visible_cards_timer.start())
+        self.plugin_model.modelReset.connect(lambda: self.visible_cards_timer.start())
         self.stacked_widget.addWidget(self.plugins_page)
 
+        # Only the plugins page is built up front; the others are created on first switch.
+        self.page_builders = {
+            'modify': self.create_modify_page,
+            'theme': self.create_theme_page,
+            'settings': self.create_settings_page,
+        }
+        self.pages = {'plugins': self.plugins_page}
+        self.modify_page = None
+        self.theme_page = None
+        self.theme_switcher_page = None
+        self.theme_editor_page = None
+        self.settings_page = None
+
+        self.loading_label = QLabel("Loading plugins...", self)
+        self.loading_label.setAlignment(Qt.AlignCenter)
+        self.loading_label.setFont(QFont('Montserrat', 16, QFont.Bold))
+        self.loading_label.setObjectName("loadingLabel")
+        self.loading_label.hide()
+        self.content_layout.addWidget(self.loading_label)
+
+        self.operation_signal.connect(self.on_operation_finished)
+
+        self.load_plugins()
+        self.start_pos = None
+
+        self.installEventFilter(self)
+
+    def show_page(self, name):
+        page = self.pages.get(name)
+        if page is None:
+            with tracing.span(f"build {name} page", 'ui'):
+                page = self.pages[name] = self.page_builders[name]()
+            self.stacked_widget.addWidget(page)
+        self.stacked_widget.setCurrentWidget(page)
+
+    def create_modify_page(self):
         self.modify_page = ModifyWidget(os.path.join(PROJECT_ROOT, 'imports', 'modify.nss'), PROJECT_ROOT)
-        self.stacked_widget.addWidget(self.modify_page)
+        return self.modify_page
 
+    def create_theme_page(self):
         self.theme_page = QWidget()
         self.theme_layout = QVBoxLayout(self.theme_page)
         self.theme_tab_widget = QTabWidget()
@@ -642,7 +785,10 @@ class PluginManager(QWidget):
 
         self.theme_switcher_page = ThemeSwitcherWidget(
             theme_dir=os.path.join(PROJECT_ROOT, 'theme'),
-            theme_nss_path=os.path.join(PROJECT_ROOT, 'imports', 'theme.nss')
+            theme_nss_path=os.path.join(PROJECT_ROOT, 'imports', 'theme.nss'),
+            thumbnail_cache_dir=THEME_THUMBNAILS_CACHE_DIR,
+            theme_index_path=THEME_INDEX_FILE,
+            preview_cache_dir=THEME_PREVIEWS_CACHE_DIR
         )
         self.theme_editor_page = ThemeEditorWidget(
             theme_path=os.path.join(PROJECT_ROOT, 'imports', 'theme.nss'),
@@ -655,30 +801,15 @@ class PluginManager(QWidget):
 
         self.theme_tab_widget.addTab(self.theme_switcher_page, "Theme Switcher")
         self.theme_tab_widget.addTab(self.theme_editor_page, "Theme Editor")
+        return self.theme_page
 
-        self.stacked_widget.addWidget(self.theme_page)
-
+    def create_settings_page(self):
         self.settings_page = QWidget()
         settings_layout = QVBoxLayout(self.settings_page)
         settings_label = QLabel("Settings Page")
         settings_label.setAlignment(Qt.AlignCenter)
         settings_layout.addWidget(settings_label)
-        self.stacked_widget.addWidget(self.settings_page)
-
-
-        self.loading_label = QLabel("Loading plugins...", self)
-        self.loading_label.setAlignment(Qt.AlignCenter)
-        self.loading_label.setFont(QFont('Montserrat', 16, QFont.Bold))
-        self.loading_label.setObjectName("loadingLabel")
-        self.loading_label.hide()
-        self.content_layout.addWidget(self.loading_label)
-
-        self.operation_signal.connect(self.on_operation_finished)
-
-        self.load_plugins()
-        self.start_pos = None
-
-        self.installEventFilter(self)
+        return self.settings_page
 
     def save_theme_and_update_status(self):
         if self.theme_editor_page.save_theme():
@@ -702,7 +833,7 @@ class PluginManager(QWidget):
         return super().eventFilter(obj, event)
 
     def get_auth_headers(self):
-        return {'Authorization': f'token {self.github_token}'} if self.github_token else {}
+        return get_auth_headers(self.github_token)
 
     def load_github_token(self):
         return os.environ.get('IMA_MENU_GITHUB_TOKEN')
@@ -805,7 +936,7 @@ class PluginManager(QWidget):
         plugins_button.setIcon(QIcon(resource_path('icons/plugins.png')))
         plugins_button.setIconSize(QSize(40, 40))
         plugins_button.setFixedSize(60, 60)
-        plugins_button.clicked.connect(lambda: self.stacked_widget.setCurrentWidget(self.plugins_page))
+        plugins_button.clicked.connect(lambda: self.show_page('plugins'))
         side_panel_layout.addWidget(plugins_button)
         self._apply_shadow_effect(plugins_button)
 
@@ -814,7 +945,7 @@ class PluginManager(QWidget):
         modify_button.setIcon(QIcon(resource_path('icons/modify.png')))
         modify_button.setIconSize(QSize(40, 40))
         modify_button.setFixedSize(60, 60)
-        modify_button.clicked.connect(lambda: self.stacked_widget.setCurrentWidget(self.modify_page))
+        modify_button.clicked.connect(lambda: self.show_page('modify'))
         side_panel_layout.addWidget(modify_button)
         self._apply_shadow_effect(modify_button)
 
@@ -823,7 +954,7 @@ class PluginManager(QWidget):
         theme_button.setIcon(QIcon(resource_path('icons/theme.png')))
         theme_button.setIconSize(QSize(40, 40))
         theme_button.setFixedSize(60, 60)
-        theme_button.clicked.connect(lambda: self.stacked_widget.setCurrentWidget(self.theme_page))
+        theme_button.clicked.connect(lambda: self.show_page('theme'))
         side_panel_layout.addWidget(theme_button)
         self._apply_shadow_effect(theme_button)
 
@@ -834,7 +965,7 @@ class PluginManager(QWidget):
         settings_button.setIcon(QIcon(resource_path('icons/settings.png')))
         settings_button.setIconSize(QSize(40, 40))
         settings_button.setFixedSize(60, 60)
-        settings_button.clicked.connect(lambda: self.stacked_widget.setCurrentWidget(self.settings_page))
+        settings_button.clicked.connect(lambda: self.show_page('settings'))
         side_panel_layout.addWidget(settings_button)
         self._apply_shadow_effect(settings_button)
 
@@ -846,12 +977,14 @@ class PluginManager(QWidget):
         except Exception as e:
             print(f"Error opening root folder: {e}")
 
+    @tracing.traced(category='ui')
     def load_plugins(self):
         if os.path.exists(PLUGINS_CACHE_FILE):
             try:
                 with open(PLUGINS_CACHE_FILE, 'r') as f: plugins = json.load(f)
                 if not isinstance(plugins, list): raise ValueError("Invalid cache format")
                 self.display_plugins(plugins)
+                self.fetch_plugins_list(revalidate=True)
                 return
             except (json.JSONDecodeError, IOError, ValueError) as e:
                 print(f"Error loading cache: {e}. Fetching from remote.")
@@ -859,20 +992,26 @@ class PluginManager(QWidget):
         
         self.fetch_plugins_list()
 
-    def fetch_plugins_list(self):
-        self.loading_label.show()
-        self.scroll_area.hide()
+    def fetch_plugins_list(self, revalidate=False):
+        if 'plugin_list' in self.active_threads: return
+        self.is_revalidating = revalidate
+        if not revalidate:
+            self.loading_label.setText("Loading plugins...")
+            self.loading_label.show()
+            self.plugin_view.hide()
 
         thread = QThread(self)
-        worker = FetchPluginsThread(self.github_token)
+        worker = FetchPluginsThread(self.github_token, load_catalog_validators() if revalidate else None)
         worker.moveToThread(thread)
 
         thread.started.connect(worker.run)
         worker.finished.connect(self.on_plugins_fetched)
         worker.error.connect(self.on_fetch_error)
         worker.finished.connect(thread.quit)
+        worker.not_modified.connect(thread.quit)
         worker.error.connect(thread.quit)
         worker.finished.connect(worker.deleteLater)
+        worker.not_modified.connect(worker.deleteLater)
         worker.error.connect(worker.deleteLater)
         thread.finished.connect(lambda: self.cleanup_thread('plugin_list'))
         
@@ -881,130 +1020,83 @@ class PluginManager(QWidget):
 
     def on_plugins_fetched(self, plugins):
         self.loading_label.hide()
-        self.scroll_area.show()
-        self.display_plugins(plugins)
+        self.plugin_view.show()
+        if self.is_revalidating and self.all_plugins_data:
+            self.update_changed_plugins(plugins)
+        else:
+            self.display_plugins(plugins)
 
     def on_fetch_error(self, error_message):
+        if self.is_revalidating and self.all_plugins_data:
+            print(f"Error revalidating plugins list: {error_message}")
+            return
         self.loading_label.setText(f"Error: {error_message}")
 
     def refresh_plugins(self):
-        if self.current_installing_plugin: return
-        if os.path.exists(PLUGINS_CACHE_FILE): os.remove(PLUGINS_CACHE_FILE)
-        self.fetch_plugins_list()
+        if self.installing_plugins: return
+        self.fetch_plugins_list(revalidate=bool(self.all_plugins_data))
 
+    @tracing.traced(category='ui')
     def display_plugins(self, plugins):
-        for i in reversed(range(self.grid_layout.count())):
-            widget = self.grid_layout.itemAt(i).widget()
-            if widget:
-                widget.deleteLater()
-
-        self.plugin_cards.clear()
-        self.plugin_progress_bars.clear()
-        self.plugin_buttons.clear()
-        self.plugin_update_buttons.clear()
-        self.plugin_action_layouts.clear()
-        self.plugin_description_labels.clear()
-        self.plugin_icon_labels.clear()
-        self.icons_loaded.clear()
-
         self.all_plugins_data = {p['name']: p for p in plugins}
+        self.icon_loader.retain(self.all_plugins_data)
+        self.installed_state.set_plugins({p['name']: get_plugin_install_path(p) for p in plugins})
+        self.plugin_model.set_plugins(plugins)
+        self.build_search_index(plugins)
+
+    @tracing.traced(category='ui')
+    def update_changed_plugins(self, plugins):
+        if not self.plugin_model.update_plugins(plugins):
+            self.display_plugins(plugins)
+            return
+        self.all_plugins_data = {p['name']: p for p in plugins}
+        self.icon_loader.retain(self.all_plugins_data)
+        self.installed_state.set_plugins({p['name']: get_plugin_install_path(p) for p in plugins})
+        self.build_search_index(plugins)
+        self.visible_cards_timer.start()
+
+    def build_search_index(self, plugins):
+        # Building the index for a large catalog takes a noticeable fraction of a
+        # second, so it runs off the GUI thread; results for an outdated catalog are dropped.
+        self.search_generation += 1
+        self.search_index = None
+        thread = QThread(self)
+        worker = SearchIndexWorker(self.search_generation, plugins)
+        worker.moveToThread(thread)
+        thread.started.connect(worker.run)
+        worker.finished.connect(self.on_search_index_built)
+        worker.finished.connect(thread.quit)
+        worker.finished.connect(worker.deleteLater)
+        key = f"search_index_{self.search_generation}"
+        thread.finished.connect(lambda: self.cleanup_thread(key))
+        thread.start()
+        self.active_threads[key] = (thread, worker)
 
-        for i, plugin in enumerate(plugins):
-            card = self.create_plugin_card(plugin)
-            self.grid_layout.addWidget(card, i // 4, i % 4)
-
-        QTimer.singleShot(100, self.check_visible_cards)
-
-    def create_plugin_card(self, plugin):
-        plugin_name = plugin['name']
-        card = ClickableWidget(plugin_name)
-        card.setObjectName("plugin_card")
-        card.setFixedSize(180, 250)
-        layout = QVBoxLayout(card)
-        layout.setAlignment(Qt.AlignCenter)
-        layout.setSpacing(10)
-
-        card.plugin_card_clicked.connect(self.show_details_popup)
-
-        title = QLabel(plugin_name)
-        title.setFont(QFont('Montserrat', 14, QFont.Bold))
-        title.setAlignment(Qt.AlignCenter)
-        title.setAttribute(Qt.WA_TransparentForMouseEvents, True)
-        layout.addWidget(title)
-
-        self._apply_shadow_effect(title)
-
-        icon_container = QWidget()
-        icon_container.setObjectName("iconContainer")
-        icon_container.setFixedSize(80, 80)
-        icon_layout = QVBoxLayout(icon_container)
-        icon_layout.setContentsMargins(0,0,0,0)
-        icon_layout.setAlignment(Qt.AlignCenter)
-        icon = QLabel()
-        icon.setFixedSize(70, 70)
-        icon.setScaledContents(True)
-        icon.setObjectName("iconLabel")
-        icon.setAttribute(Qt.WA_TransparentForMouseEvents, True)
-        self.plugin_icon_labels[plugin_name] = icon
-        icon.setPixmap(QPixmap(DEFAULT_ICON_PATH))
-        icon_layout.addWidget(icon)
-        layout.addWidget(icon_container, alignment=Qt.AlignCenter)
-
-        self._apply_shadow_effect(icon_container)
-
-        description = QLabel(plugin.get('description', 'No description available.'))
-        description.setWordWrap(True)
-        description.setAlignment(Qt.AlignCenter)
-        description.setAttribute(Qt.WA_TransparentForMouseEvents, True)
-        layout.addWidget(description)
-
-        shadow = QGraphicsDropShadowEffect()
-        shadow.setBlurRadius(10)
-        shadow.setColor(QColor(0, 0, 0, 160))
-        shadow.setOffset(2, 2)
-        layout.addStretch()
-
-        progress_bar = QProgressBar()
-        progress_bar.setVisible(False)
-        progress_bar.setObjectName(f"progressBar_{plugin_name}")
-        layout.addWidget(progress_bar, alignment=Qt.AlignCenter)
-
-        action_layout = QHBoxLayout()
-        action_layout.setContentsMargins(0, 10, 0, 0)
-        action_layout.setSpacing(10)
-        layout.addLayout(action_layout)
-
-        action_button = QPushButton()
-        action_button.setObjectName("installButton")
-        action_layout.addWidget(action_button, alignment=Qt.AlignCenter)
-
-        shadow = QGraphicsDropShadowEffect()
-        shadow.setBlurRadius(25)
-        shadow.setColor(QColor(0, 0, 0, 180))
-        shadow.setOffset(5, 5)
-        action_button.setGraphicsEffect(shadow)
-
-        self.plugin_cards[plugin_name] = card
-        self.plugin_progress_bars[plugin_name] = progress_bar
-        self.plugin_buttons[plugin_name] = action_button
-        self.plugin_action_layouts[plugin_name] = action_layout
-        self.plugin_description_labels[plugin_name] = description
-
-        self.update_card_ui(plugin_name)
-        self.apply_card_style(card)
-        return card
-
-    def show_details_popup(self, plugin_name, card):
+    def on_search_index_built(self, generation, index):
+        if generation != self.search_generation:
+            return
+        self.search_index = index
+        if self.search_box.text().strip():
+            self.apply_search()
+
+    def apply_search(self):
+        query = self.search_box.text()
+        if not query.strip():
+            self.plugin_model.set_filter(None)
+        elif self.search_index:
+            self.plugin_model.set_filter(self.search_index.search(query))
+
+    def show_details_popup(self, plugin_name, card_rect):
         if self.details_popup:
             self.details_popup.close()
 
         plugin_data = self.all_plugins_data.get(plugin_name)
         if not plugin_data: return
 
-        start_geom = card.geometry()
-        start_geom.moveTopLeft(card.mapTo(self, card.rect().topLeft()))
+        start_geom = QRect(card_rect)
+        start_geom.moveTopLeft(self.plugin_view.viewport().mapTo(self, card_rect.topLeft()))
 
-        self.details_popup = DetailsPopup(plugin_data, self, start_geom=start_geom)
+        self.details_popup = DetailsPopup(plugin_data, self, start_geom=start_geom, icon=self.plugin_model.icons.get(plugin_name))
         self.details_popup.show()
 
         end_geom = self.rect().adjusted(50, 50, -50, -50)
@@ -1024,16 +1116,23 @@ class PluginManager(QWidget):
         self.opacity_animation.setEasingCurve(QEasingCurve.InOutCubic)
         self.opacity_animation.start(QPropertyAnimation.DeleteWhenStopped)
 
+        self.details_popup.details_browser.setSearchPaths([self.details_cache.blobs_dir])
+        cached_entry = self.details_cache.load(plugin_name)
+        if cached_entry:
+            self.details_popup.set_details_content(cached_entry['html'])
+
         thread = QThread(self)
-        worker = DetailsFetchWorker(plugin_name, self.get_auth_headers())
+        worker = DetailsFetchWorker(plugin_name, self.get_auth_headers(), self.details_cache, cached_entry)
         worker.moveToThread(thread)
 
         worker.finished.connect(self.details_popup.set_details_content)
         worker.error.connect(lambda err: self.details_popup.set_details_content(f"Error: {err}"))
         thread.started.connect(worker.run)
         worker.finished.connect(thread.quit)
+        worker.not_modified.connect(thread.quit)
         worker.error.connect(thread.quit)
         worker.finished.connect(worker.deleteLater)
+        worker.not_modified.connect(worker.deleteLater)
         worker.error.connect(worker.deleteLater)
         thread.finished.connect(lambda: self.cleanup_thread(f"details_{plugin_name}"))
 
@@ -1072,158 +1171,98 @@ class PluginManager(QWidget):
         self.details_popup.action_button.style().polish(self.details_popup.action_button)
 
     def check_visible_cards(self):
-        scroll_bar = self.scroll_area.verticalScrollBar()
-        viewport_top = scroll_bar.value()
-        viewport_bottom = viewport_top + self.scroll_area.viewport().height()
-
-        for plugin_name, card in self.plugin_cards.items():
-            if plugin_name not in self.icons_loaded:
-                card_top = card.y()
-                card_bottom = card_top + card.height()
-                if card_top < viewport_bottom and card_bottom > viewport_top:
-                    plugin_data = self.all_plugins_data.get(plugin_name)
-                    if plugin_data:
-                        self.load_icon(plugin_data)
-                        self.icons_loaded.add(plugin_name)
-
-    def get_local_plugin_version(self, plugin_name):
-        plugin_data = self.all_plugins_data.get(plugin_name)
-        if not plugin_data:
-            return None
-        install_path = get_plugin_install_path(plugin_data)
-        version_file = os.path.join(install_path, 'version')
-        if os.path.exists(version_file):
-            with open(version_file, 'r') as f:
-                return f.read().strip()
-        return None
-
-    def update_card_ui(self, plugin_name):
-        action_button = self.plugin_buttons.get(plugin_name)
-        if not action_button: return
+        visible_names = self.plugin_view.visible_plugin_names()
+        for plugin_name in set(self.icon_loader.pending) - set(visible_names):
+            self.icon_loader.cancel(plugin_name)
 
-        action_layout = self.plugin_action_layouts.get(plugin_name)
-        if not action_layout: return
+        for index, plugin_name in enumerate(visible_names):
+            if self.plugin_model.has_icon(plugin_name):
+                continue
+            plugin_data = self.all_plugins_data.get(plugin_name)
+            if plugin_data:
+                self.load_icon(plugin_data, priority=len(visible_names) - index)
 
-        font = action_button.font()
-        font.setBold(True)
-        action_button.setFont(font)
+    def on_card_action(self, plugin_name, action):
+        if action == 'install':
+            self.add_to_installation_queue(plugin_name)
+        elif action == 'update':
+            self.add_to_installation_queue(plugin_name, is_update=True)
+        elif action == 'uninstall':
+            self.uninstall_plugin(plugin_name)
+        elif action == 'cancel':
+            self.cancel_operation(plugin_name)
 
-        if self.plugin_update_buttons.get(plugin_name):
-            button_to_remove = self.plugin_update_buttons.pop(plugin_name)
-            button_to_remove.deleteLater()
+    def get_local_plugin_version(self, plugin_name):
+        return self.installed_state.version(plugin_name) or None
 
-        try: action_button.clicked.disconnect()
-        except TypeError: pass
+    def on_installed_state_changed(self, plugin_names):
+        for plugin_name in plugin_names:
+            self.update_card_ui(plugin_name)
+            if self.details_popup and self.details_popup.plugin_data['name'] == plugin_name:
+                self.update_popup_button(plugin_name)
+
+    def get_plugin_state(self, plugin_data):
+        plugin_name = plugin_data['name']
+        if plugin_name in self.installing_plugins:
+            return STATE_INSTALLING
+        if plugin_name in [p['name'] for p in self.installation_queue]:
+            return STATE_QUEUED
+
+        local_version = self.installed_state.version(plugin_name)
+        remote_version = plugin_data.get('version')
+        if local_version:
+            if remote_version and local_version != remote_version:
+                return STATE_OUTDATED
+            return STATE_INSTALLED
+        if local_version == PARTIALLY_INSTALLED:
+            # No version file: a failed or interrupted install, which Update repairs.
+            return STATE_OUTDATED if remote_version else STATE_INSTALLED
+        return STATE_AVAILABLE
 
-        is_queued = plugin_name in [p['name'] for p in self.installation_queue]
-        is_installing = self.current_installing_plugin == plugin_name
-        local_version = self.get_local_plugin_version(plugin_name)
-        remote_version = self.all_plugins_data.get(plugin_name, {}).get('version')
+    def update_card_ui(self, plugin_name):
+        self.plugin_model.refresh_state(plugin_name)
 
-        is_partially_installed = os.path.exists(get_plugin_install_path(self.all_plugins_data.get(plugin_name, {}))) and not self.get_local_plugin_version(plugin_name)
-
-        if is_installing:
-            action_button.setText("Cancel")
-            action_button.setObjectName("textButton")
-            action_button.setEnabled(True)
-            action_button.clicked.connect(lambda: self.cancel_operation(plugin_name))
-        elif is_queued:
-            action_button.setText("Queued")
-            action_button.setObjectName("textButton")
-            action_button.setEnabled(True)
-            action_button.clicked.connect(lambda: self.cancel_operation(plugin_name))
-        elif local_version or is_partially_installed:
-            action_button.setText("Uninstall")
-            action_button.setObjectName("uninstallButton")
-            action_button.setEnabled(True)
-            action_button.clicked.connect(lambda: self.uninstall_plugin(plugin_name))
-            
-            if remote_version and local_version != remote_version:
-                update_button = QPushButton("Update")
-                update_button.setObjectName("updateButton")
-                update_button.clicked.connect(lambda: self.add_to_installation_queue(plugin_name, is_update=True))
-                action_layout.addWidget(update_button)
-                self.plugin_update_buttons[plugin_name] = update_button
+    def on_icon_loaded(self, plugin_name, image):
+        if not image.isNull():
+            self.plugin_model.set_icon(plugin_name, QPixmap.fromImage(image))
         else:
-            action_button.setText("Install")
-            action_button.setObjectName("installButton")
-            action_button.setEnabled(True)
-            action_button.clicked.connect(lambda: self.add_to_installation_queue(plugin_name))
-        
-        action_button.style().unpolish(action_button)
-        action_button.style().polish(action_button)
-
-    def on_icon_loaded(self, plugin_name, pixmap):
-        if plugin_name in self.plugin_icon_labels:
-            label = self.plugin_icon_labels[plugin_name]
-            if pixmap and not pixmap.isNull():
-                label.setPixmap(pixmap)
-            else:
-                label.setPixmap(QPixmap(DEFAULT_ICON_PATH))
+            self.plugin_model.set_icon(plugin_name, None)
 
-    def load_icon(self, plugin):
+    def load_icon(self, plugin, priority=0):
         plugin_name = plugin['name']
-        label = self.plugin_icon_labels[plugin_name]
-        local_icon_path = os.path.join(ICONS_CACHE_DIR, f"{plugin_name}.png")
-
-        if os.path.exists(local_icon_path):
-            pixmap = QPixmap(local_icon_path)
-            if not pixmap.isNull():
-                label.setPixmap(pixmap)
-                return
-        
-        if plugin.get('icon_url'):
-            thread = QThread(self)
-            worker = IconDownloadWorker(plugin_name, plugin['icon_url'], local_icon_path, get_auth_headers(self.github_token))
-            worker.moveToThread(thread)
-
-            worker.finished.connect(self.on_icon_loaded)
-            worker.error.connect(lambda e: self.on_icon_loaded(plugin_name, QPixmap()))
-            thread.started.connect(worker.run)
-            worker.finished.connect(thread.quit)
-            worker.error.connect(thread.quit)
-            worker.finished.connect(worker.deleteLater)
-            worker.error.connect(worker.deleteLater)
-            thread.finished.connect(lambda: self.cleanup_thread(f"icon_{plugin_name}"))
-            
-            thread.start()
-            self.active_threads[f"icon_{plugin_name}"] = (thread, worker)
+        icon_url = REPOSITORY.icon_url(plugin)
+        if icon_url or self.icon_loader.has_cached(plugin_name):
+            self.icon_loader.request(plugin_name, icon_url, priority)
         else:
-            label.setPixmap(QPixmap(DEFAULT_ICON_PATH))
+            self.plugin_model.set_icon(plugin_name, None)
 
     def add_to_installation_queue(self, plugin_name, is_update=False):
-        if plugin_name in [p['name'] for p in self.installation_queue] or self.current_installing_plugin == plugin_name:
+        if plugin_name in [p['name'] for p in self.installation_queue] or plugin_name in self.installing_plugins:
             return
             
         self.installation_queue.append(self.all_plugins_data[plugin_name])
         self.update_card_ui(plugin_name)
-        
-        if is_update and self.plugin_update_buttons.get(plugin_name):
-            self.plugin_update_buttons[plugin_name].setEnabled(False)
+        self.process_queue()
 
-        if not self.current_installing_plugin:
-            self.process_next_in_queue()
+    def process_queue(self):
+        if not self.installing_plugins:
+            # A new batch starts; release metadata is looked up once and shared by its installs.
+            self.release_cache = downloader.ReleaseCache(REPOSITORY.release_url)
+        while self.installation_queue and len(self.installing_plugins) < MAX_PARALLEL_INSTALLS:
+            self.start_installation(self.installation_queue.popleft())
 
-    def process_next_in_queue(self):
-        if not self.installation_queue:
-            self.current_installing_plugin = None
-            return
+    def start_installation(self, plugin_data):
+        plugin_name = plugin_data['name']
+        self.installing_plugins.add(plugin_name)
 
-        plugin_data = self.installation_queue.popleft()
-        self.current_installing_plugin = plugin_data['name']
-        
-        progress_bar = self.plugin_progress_bars[self.current_installing_plugin]
-        button = self.plugin_buttons[self.current_installing_plugin]
-        
-        progress_bar.setVisible(True)
-        progress_bar.setValue(0)
-        self.update_card_ui(self.current_installing_plugin)
+        self.plugin_model.set_progress(plugin_name, 0)
+        self.update_card_ui(plugin_name)
 
         thread = QThread(self)
-        worker = InstallationWorker(plugin_data, self.get_auth_headers())
+        worker = InstallationWorker(plugin_data, self.get_auth_headers(), self.release_cache)
         worker.moveToThread(thread)
 
-        self.active_threads[self.current_installing_plugin] = (thread, worker)
+        self.active_threads[plugin_name] = (thread, worker)
 
         thread.started.connect(worker.run)
         worker.progress.connect(self.on_install_progress)
@@ -1233,23 +1272,44 @@ class PluginManager(QWidget):
         worker.error.connect(thread.quit)
         worker.finished.connect(worker.deleteLater)
         worker.error.connect(worker.deleteLater)
-        thread.finished.connect(lambda: self.cleanup_thread(self.current_installing_plugin))
+        thread.finished.connect(lambda: self.cleanup_thread(plugin_name))
         
         thread.start()
 
     def on_install_progress(self, plugin_name, value):
-        if plugin_name == self.current_installing_plugin:
-            self.plugin_progress_bars[plugin_name].setValue(value)
+        if plugin_name in self.installing_plugins:
+            self.plugin_model.set_progress(plugin_name, value)
+
+    def finish_installation(self, plugin_name):
+        if plugin_name in self.installing_plugins:
+            self.cleanup_thread(plugin_name)
+            self.installing_plugins.discard(plugin_name)
+            self.process_queue()
+            if not self.installing_plugins:
+                self.flush_nss_imports()
+
+    def queue_nss_import(self, plugin_name, add):
+        plugin_data = self.all_plugins_data.get(plugin_name, {})
+        try:
+            self.pending_imports[get_plugin_import_path(plugin_data)] = add
+        except KeyError as e:
+            print(f"No shell.nss import for {plugin_name}: missing {e}")
+            return
+        if not self.installing_plugins:
+            self.imports_timer.start()
+
+    def flush_nss_imports(self):
+        self.imports_timer.stop()
+        if not self.pending_imports:
+            return
+        pending, self.pending_imports = self.pending_imports, {}
+        update_nss_imports(add=[path for path, add in pending.items() if add],
+                           remove=[path for path, add in pending.items() if not add])
 
     def on_operation_error(self, plugin_name, status, error_message):
         print(f"Operation error for {plugin_name}: {error_message}")
-        if plugin_name in self.plugin_progress_bars:
-            self.plugin_progress_bars[plugin_name].setVisible(False)
-
-        if plugin_name == self.current_installing_plugin:
-            self.cleanup_thread(plugin_name)
-            self.current_installing_plugin = None
-            self.process_next_in_queue()
+        self.finish_installation(plugin_name)
+        self.installed_state.refresh(plugin_name)
 
         self.update_card_ui(plugin_name)
 
@@ -1264,18 +1324,23 @@ class PluginManager(QWidget):
             msgBox.exec_()
 
     def on_operation_finished(self, plugin_name, status):
-        if plugin_name in self.plugin_progress_bars:
-            self.plugin_progress_bars[plugin_name].setVisible(False)
-
-        if plugin_name == self.current_installing_plugin:
-            self.cleanup_thread(plugin_name)
-            self.current_installing_plugin = None
-            self.process_next_in_queue()
+        # Queued before finish_installation, which writes the imports if this ends the batch.
+        if status == "installed":
+            self.queue_nss_import(plugin_name, True)
+        elif status == "uninstalled":
+            self.queue_nss_import(plugin_name, False)
+        self.finish_installation(plugin_name)
+        if status == "installed":
+            self.installed_state.set_state(plugin_name, self.all_plugins_data.get(plugin_name, {}).get('version') or PARTIALLY_INSTALLED)
+        elif status == "uninstalled":
+            self.installed_state.set_state(plugin_name, NOT_INSTALLED)
+        else:
+            self.installed_state.refresh(plugin_name)
 
         self.update_card_ui(plugin_name)
 
     def cancel_operation(self, plugin_name):
-        if self.current_installing_plugin == plugin_name and plugin_name in self.active_threads:
+        if plugin_name in self.installing_plugins and plugin_name in self.active_threads:
             thread, worker = self.active_threads[plugin_name]
             worker.cancel()
         else:
@@ -1292,7 +1357,6 @@ class PluginManager(QWidget):
             target_plugin_dir = get_plugin_install_path(plugin_data)
             if os.path.exists(target_plugin_dir):
                 shutil.rmtree(target_plugin_dir)
-            remove_nss_import(plugin_data)
             self.operation_signal.emit(plugin_name, "uninstalled", "")
         except Exception as e:
             self.operation_signal.emit(plugin_name, "failed", str(e))
@@ -1302,13 +1366,6 @@ class PluginManager(QWidget):
             thread, worker = self.active_threads.pop(key)
             thread.quit()
 
-    def apply_card_style(self, card):
-        shadow = QGraphicsDropShadowEffect()
-        shadow.setBlurRadius(15)
-        shadow.setColor(QColor(0, 0, 0, 160))
-        shadow.setOffset(5, 5)
-        card.setGraphicsEffect(shadow)
-
     def paintEvent(self, event):
         painter = QPainter(self)
         painter.setRenderHint(QPainter.Antialiasing)
@@ -1318,13 +1375,23 @@ class PluginManager(QWidget):
         painter.drawRoundedRect(rect, 15, 15)
 
     def closeEvent(self, event):
-        if self.theme_editor_page.is_dirty:
+        if self.theme_editor_page is not None and self.theme_editor_page.is_dirty:
             dialog = UnsavedChangesDialog(self)
             if dialog.exec_() == QDialog.Accepted:
                 self.theme_editor_page.save_theme()
             else:
                 self.theme_editor_page.revert_changes()
-
+        if self.modify_page is not None:
+            self.modify_page.flush_pending_write()
+        self.flush_nss_imports()
+
+        self.icon_loader.shutdown()
+        if self.theme_switcher_page is not None:
+            self.theme_switcher_page.thumbnail_loader.shutdown()
+            self.theme_switcher_page.preview_renderer.shutdown()
+        if self.theme_editor_page is not None:
+            self.theme_editor_page.preview_renderer.shutdown()
+        self.installed_state.shutdown()
         for key, (thread, worker) in list(self.active_threads.items()):
             thread.quit()
             if not thread.wait(2000):
@@ -5,8 +5,8 @@ a = Analysis(
     ['launcher.pyw'],
     pathex=[],
     binaries=[],
-    datas=[('style.css', '.'), ('icons', 'icons'), ('..\\imports', 'imports'), ('..\\theme', 'theme')],
-    hiddenimports=['modify_widget', 'theme_editor_widget', 'theme_switcher_widget', 'utils'],
+    datas=[('style.css', '.'), ('shell_ids.json', '.'), ('icons', 'icons'), ('..\\imports', 'imports'), ('..\\theme', 'theme')],
+    hiddenimports=['modify_widget', 'theme_editor_widget', 'theme_switcher_widget', 'utils', 'downloader', 'icon_loader', 'icon_atlas', 'details_cache', 'plugin_grid', 'plugin_state', 'nss_imports', 'plugin_search', 'plugin_repository', 'tracing', 'theme_thumbnails', 'nss_parser', 'modify_document', 'shell_ids', 'theme_schema', 'theme_store', 'theme_preview'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
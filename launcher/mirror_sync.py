@@ -0,0 +1,215 @@
+"""Copies the plugin repository into a directory that the launcher can use as an
+offline or LAN mirror (see plugin_repository.MirrorRepository for the layout).
+
+    python mirror_sync.py D:\\ima-mirror
+    python mirror_sync.py D:\\ima-mirror --source github:iMAboud/iMA-Menu-Plugins --workers 8
+
+Syncs are incremental: repository files are compared by blob SHA, icons and the
+images details pages embed by their source URL and release assets by size, so
+only what changed is downloaded. The catalog is written last, so a mirror is
+never advertised with missing files.
+Point the launcher at the result with IMA_MENU_REPOSITORY=<directory or URL>.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import downloader
+from details_cache import image_urls
+from plugin_repository import (create_repository, MIRROR_TREE_FILE, MIRROR_RELEASE_FILE, MIRROR_FILES_DIR,
+                               MIRROR_ICONS_DIR, MIRROR_RELEASES_DIR, MIRROR_IMAGES_DIR, MIRROR_IMAGES_FILE)
+from utils import safe_file_write
+
+MIRROR_ICON_SOURCES_FILE = 'icons.json'
+
+
+def _load_json(path, default):
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def _write_json(path, data):
+    safe_file_write(path, json.dumps(data, indent=4))
+
+
+def _remove_file(target_dir, relative_path):
+    # Paths come from the previous sync's metadata or from the source catalog, so
+    # one that leads outside the mirror is skipped rather than deleted.
+    try:
+        local_path = downloader.safe_join(target_dir, relative_path)
+    except ValueError as e:
+        print(f"Skipping removal: {e}")
+        return
+    if os.path.exists(local_path):
+        os.remove(local_path)
+
+
+def sync_files(session, source, target_dir, workers):
+    files_dir = os.path.join(target_dir, MIRROR_FILES_DIR)
+    tree_path = os.path.join(target_dir, MIRROR_TREE_FILE)
+    old_shas = {item['path']: item['sha'] for item in _load_json(tree_path, {}).get('files', [])}
+    tree = source.list_files(session)
+
+    changed = [item for item in tree
+               if old_shas.get(item['path']) != item['sha'] or not os.path.exists(os.path.join(files_dir, item['path']))]
+    downloader.download_files(session, [{'url': source.file_url(item['path']), 'path': item['path']} for item in changed],
+                              files_dir, max_workers=workers)
+
+    current = {item['path'] for item in tree}
+    removed = [path for path in old_shas if path not in current]
+    for path in removed:
+        _remove_file(files_dir, path)
+
+    _write_json(tree_path, {'files': tree})
+    return len(changed), len(removed)
+
+
+def sync_icons(source, plugins, target_dir, workers):
+    icons_dir = os.path.join(target_dir, MIRROR_ICONS_DIR)
+    sources_path = os.path.join(target_dir, MIRROR_ICON_SOURCES_FILE)
+    old_sources = _load_json(sources_path, {})
+    sources = {plugin['name']: source.icon_url(plugin) for plugin in plugins if source.icon_url(plugin)}
+
+    changed = [{'url': url, 'path': f"{name}.png"} for name, url in sources.items()
+               if old_sources.get(name) != url or not os.path.exists(os.path.join(icons_dir, f"{name}.png"))]
+    # Icons live on arbitrary hosts, so they are fetched without the GitHub token.
+    with downloader.create_session(pool_size=workers) as icon_session:
+        downloader.download_files(icon_session, changed, icons_dir, max_workers=workers)
+
+    for name in old_sources:
+        if name not in sources:
+            _remove_file(icons_dir, f"{name}.png")
+
+    _write_json(sources_path, sources)
+    return len(changed)
+
+
+def _details_image_urls(files_dir, plugins):
+    """The http(s) images linked from the mirrored details.md of each plugin, found
+    the same way the launcher finds them in the rendered page."""
+    import markdown
+    urls = set()
+    for plugin in plugins:
+        try:
+            with open(os.path.join(files_dir, plugin['name'], 'details.md'), 'r', encoding='utf-8') as f:
+                html_content = markdown.markdown(f.read())
+        except OSError:
+            continue
+        urls.update(url for url in image_urls(html_content) if url.startswith(('http://', 'https://')))
+    return urls
+
+
+def _image_path(url):
+    extension = os.path.splitext(urlparse(url).path)[1].lower()
+    if not extension.isascii() or len(extension) > 6:
+        extension = ''
+    return f"{MIRROR_IMAGES_DIR}/{hashlib.sha256(url.encode('utf-8')).hexdigest()}{extension}"
+
+
+def sync_images(plugins, target_dir, workers):
+    images_path = os.path.join(target_dir, MIRROR_IMAGES_FILE)
+    old_paths = _load_json(images_path, {})
+    urls = _details_image_urls(os.path.join(target_dir, MIRROR_FILES_DIR), plugins)
+    wanted = {url: old_paths.get(url) or _image_path(url) for url in urls}
+    changed = [url for url, path in wanted.items() if not os.path.exists(os.path.join(target_dir, path))]
+    os.makedirs(os.path.join(target_dir, MIRROR_IMAGES_DIR), exist_ok=True)
+
+    # Unlike plugin files, a dead link on some details page must not fail the sync:
+    # the image is left out of images.json and tried again next time.
+    failed = set()
+    with downloader.create_session(pool_size=workers) as image_session:
+        def fetch(url):
+            try:
+                response = image_session.get(url, timeout=downloader.REQUEST_TIMEOUT)
+                response.raise_for_status()
+                safe_file_write(downloader.safe_join(target_dir, wanted[url]), response.content)
+            except Exception as e:
+                print(f"Failed to mirror image {url}: {e}")
+                failed.add(url)
+
+        if changed:
+            with ThreadPoolExecutor(max_workers=min(workers, len(changed))) as executor:
+                list(executor.map(fetch, changed))
+
+    paths = {url: path for url, path in wanted.items() if url not in failed}
+    for url, path in old_paths.items():
+        if url not in wanted:
+            _remove_file(target_dir, path)
+
+    _write_json(images_path, paths)
+    return len(changed) - len(failed)
+
+
+def sync_release(session, source, target_dir):
+    releases_dir = os.path.join(target_dir, MIRROR_RELEASES_DIR)
+    release = downloader.ReleaseCache(source.release_url).get(session)
+    if release is None:
+        return 0
+
+    os.makedirs(releases_dir, exist_ok=True)
+    fetched = 0
+    for asset in release.get('assets', []):
+        local_path = downloader.safe_join(releases_dir, asset['name'])
+        if not (os.path.exists(local_path) and os.path.getsize(local_path) == asset.get('size')):
+            downloader.download_resumable(session, asset['browser_download_url'], local_path,
+                                          expected_size=asset.get('size'), expected_sha256=downloader.asset_sha256(asset))
+            fetched += 1
+        asset['browser_download_url'] = f"{MIRROR_RELEASES_DIR}/{asset['name']}"
+
+    kept = {asset['name'] for asset in release.get('assets', [])}
+    for name in os.listdir(releases_dir):
+        if name not in kept and not name.endswith(downloader.PART_SUFFIX):
+            os.remove(os.path.join(releases_dir, name))
+
+    _write_json(os.path.join(target_dir, MIRROR_RELEASE_FILE), release)
+    return fetched
+
+
+def sync_mirror(target_dir, source, token=None, workers=downloader.MAX_DOWNLOAD_WORKERS):
+    os.makedirs(target_dir, exist_ok=True)
+    headers = {'Authorization': f'token {token}'} if token and source.sends_token else None
+    with downloader.create_session(headers=headers, pool_size=workers) as session:
+        response = session.get(source.catalog_url, timeout=downloader.REQUEST_TIMEOUT)
+        response.raise_for_status()
+        plugins = response.json()
+        if not isinstance(plugins, list):
+            raise ValueError("Invalid plugins.json format")
+
+        files_changed, files_removed = sync_files(session, source, target_dir, workers)
+        icons_changed = sync_icons(source, plugins, target_dir, workers)
+        images_changed = sync_images(plugins, target_dir, workers)
+        assets_changed = sync_release(session, source, target_dir)
+
+    _write_json(os.path.join(target_dir, 'plugins.json'), plugins)
+    print(f"Mirrored {len(plugins)} plugins from {source} into {target_dir}: "
+          f"{files_changed} files updated, {files_removed} removed, {icons_changed} icons, {images_changed} images, "
+          f"{assets_changed} release assets.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Create or update an offline mirror of the plugin repository.")
+    parser.add_argument('target_dir', help="Directory to write the mirror into.")
+    parser.add_argument('--source', default=os.environ.get('IMA_MENU_MIRROR_SOURCE'),
+                        help="Repository to copy, in IMA_MENU_REPOSITORY form. Defaults to the GitHub repository.")
+    parser.add_argument('--workers', type=int, default=downloader.MAX_DOWNLOAD_WORKERS,
+                        help="Parallel downloads.")
+    args = parser.parse_args()
+
+    try:
+        sync_mirror(os.path.abspath(args.target_dir), create_repository(args.source),
+                    token=os.environ.get('IMA_MENU_GITHUB_TOKEN'), workers=max(1, args.workers))
+    except Exception as e:
+        print(f"Mirror sync failed: {e}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
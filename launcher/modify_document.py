@@ -0,0 +1,183 @@
+import collections
+import os
+
+import nss_parser
+import tracing
+from utils import safe_file_write
+
+MAX_UNDO = 50
+SECTION_LABELS = ('hide', 'more', 'shift')
+
+
+def _copy(statement):
+    return nss_parser.parse(statement.text).statements()[0]
+
+
+def _rule_arguments(call):
+    return call.arguments.named() if call.arguments else {}
+
+
+class ModifyDocument:
+    """modify.nss parsed once and edited in memory for the Modify page. Edits mark
+    the document dirty and flush() writes it back with a single safe_file_write.
+
+    Statements are never changed in place: an edit parses a copy of the statement,
+    changes the copy and swaps it into the document. A copy of the top-level
+    children list is therefore a complete snapshot, and the undo journal keeps the
+    last max_undo of them."""
+
+    def __init__(self, path, max_undo=MAX_UNDO):
+        self.path = path
+        self.journal = collections.deque(maxlen=max_undo)
+        self.document = None
+        self.dirty = False
+        self._stat = None
+        self.load()
+
+    def _file_stat(self):
+        try:
+            stat = os.stat(self.path)
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
+
+    @tracing.traced(category='io')
+    def load(self):
+        with open(self.path, 'r') as f:
+            self.document = nss_parser.parse(f.read())
+        self._stat = self._file_stat()
+        self.journal.clear()
+        self.dirty = False
+
+    def reload_if_changed(self):
+        """Re-reads the file if it was edited outside the launcher and nothing is
+        waiting to be written. Returns True if it was re-read."""
+        if self.dirty or self._file_stat() == self._stat:
+            return False
+        self.load()
+        return True
+
+    @property
+    def text(self):
+        return self.document.text
+
+    def sections(self, label):
+        """The modify() statements headed by a "// <label>" comment, such as // hide."""
+        return [statement for comment, statement in self.document.commented()
+                if isinstance(statement, nss_parser.Call) and statement.name == 'modify' and (comment or '').lower() == label]
+
+    def section_ids(self, label):
+        ids = []
+        for call in self.sections(label):
+            where = call.argument('where')
+            group = where.value.group() if where else None
+            if group:
+                ids.extend(group.items())
+        return ids
+
+    def rules(self):
+        """(find, title, icon, statement) for every modify(find=... title=...) rule.
+        Only quoted icons are returned; glyphs such as \\uE113 give ""."""
+        rules = []
+        for call in self.document.calls('modify'):
+            arguments = _rule_arguments(call)
+            if 'find' in arguments and 'title' in arguments:
+                icon = arguments.get('icon')
+                icon = icon.value.value if icon and icon.value.is_string() else ""
+                rules.append((arguments['find'].value.value, arguments['title'].value.value, icon, call))
+        return rules
+
+    def removed_items(self):
+        remove = self.document.find('remove')
+        items = remove.get('find', '') if remove else ''
+        return items.split('|') if items else []
+
+    def _record(self, label):
+        self.journal.append((label, list(self.document.children)))
+        self.dirty = True
+
+    def can_undo(self):
+        return bool(self.journal)
+
+    def undo(self):
+        """Reverts the most recent edit. Returns its label, or None if there is
+        nothing to undo."""
+        if not self.journal:
+            return None
+        label, children = self.journal.pop()
+        self.document.children = children
+        for child in children:
+            if isinstance(child, nss_parser.Statement):
+                child.parent = self.document
+        self.dirty = True
+        return label
+
+    def add_rule(self, find, title, icon=""):
+        rule = f"modify(find='{find}' title='{title}'"
+        if icon:
+            rule += f" icon='{icon}'"
+        rule += ")"
+        self._record(f"add '{find}'")
+        return self.document.append(rule)[0]
+
+    def update_rule(self, rule, find, title, icon):
+        """Replaces rule with an edited copy, which is returned. A glyph icon is kept
+        when icon is empty, since the table cannot show or edit it."""
+        updated = _copy(rule)
+        updated.set('find', find)
+        updated.set('title', title)
+        current_icon = updated.argument('icon')
+        if icon:
+            updated.set('icon', icon)
+        elif current_icon and current_icon.value.is_string():
+            updated.remove_argument('icon')
+        if updated.text == rule.text:
+            return rule
+        self._record(f"edit '{find}'")
+        self.document.replace(rule, updated)
+        return updated
+
+    def delete_rule(self, rule):
+        self._record(f"delete '{_rule_arguments(rule)['find'].value.value}'")
+        self.document.remove(rule)
+
+    def set_removed_items(self, items):
+        if list(items) == self.removed_items():
+            return
+        remove = self.document.find('remove')
+        self._record("removed items")
+        if remove and items:
+            updated = _copy(remove)
+            updated.set('find', "|".join(items))
+            self.document.replace(remove, updated)
+        elif remove:
+            self.document.remove(remove)
+        else:
+            self.document.append(f'remove(find="{"|".join(items)}")')
+
+    def set_section_ids(self, ids_by_label):
+        """Rewrites the this.id(...) lists of the given sections as one edit."""
+        changes = []
+        for label, ids in ids_by_label.items():
+            for call in self.sections(label):
+                where = call.argument('where')
+                group = where.value.group() if where else None
+                if group and group.items() != list(ids):
+                    changes.append((call, ids))
+        if not changes:
+            return
+        self._record("sections")
+        for call, ids in changes:
+            updated = _copy(call)
+            updated.argument('where').value.group().set_items(ids)
+            self.document.replace(call, updated)
+
+    @tracing.traced(category='io')
+    def flush(self):
+        """Writes pending edits to disk. Returns True if the file was written."""
+        if not self.dirty:
+            return False
+        safe_file_write(self.path, self.document.text)
+        self.dirty = False
+        self._stat = self._file_stat()
+        return True
@@ -3,9 +3,15 @@ import os
 import re
 from PyQt5.QtWidgets import (QApplication, QWidget, QVBoxLayout, QHBoxLayout, QLabel,
                              QListWidget, QPushButton, QMessageBox, QLineEdit, QFileDialog,
-                             QTableWidget, QTableWidgetItem, QHeaderView, QAbstractItemView, QGraphicsDropShadowEffect, QListWidgetItem, QFrame, QTabWidget, QInputDialog, QStyledItemDelegate, QListView, QStyle, QDialog, QDialogButtonBox)
-from PyQt5.QtGui import QIcon, QPixmap, QColor, QPainter, QFont, QFontMetrics, QPen, QPainterPath, QRegion
+                             QTableWidget, QTableWidgetItem, QHeaderView, QAbstractItemView, QGraphicsDropShadowEffect, QListWidgetItem, QFrame, QTabWidget, QInputDialog, QStyledItemDelegate, QListView, QStyle, QDialog, QDialogButtonBox, QShortcut)
+from PyQt5.QtGui import QIcon, QPixmap, QColor, QPainter, QFont, QFontMetrics, QPen, QPainterPath, QRegion, QKeySequence
 from PyQt5.QtCore import Qt, QPropertyAnimation, QRect, QTimer, pyqtSignal, QEvent, QRectF, QSize
+from modify_document import ModifyDocument, SECTION_LABELS
+from nss_imports import get_import_manager
+from shell_ids import ShellIdRegistry, ShellIdModel, ShellIdFilterProxy, format_id, load_shell_ids, load_nss_ids
+
+MODIFY_WRITE_DELAY_MS = 500
+ID_SEARCH_DELAY_MS = 150
 
 
 
@@ -252,58 +258,6 @@ class RoundedInputDialog(QDialog):
         self.raise_()
         event.accept()
 
-def read_file(filepath):
-    with open(filepath, 'r') as file:
-        return file.read()
-
-def write_file(filepath, content):
-    with open(filepath, 'w') as file:
-        file.write(content)
-
-def append_to_file(filepath, line):
-    with open(filepath, 'a') as file:
-        file.write("\n" + line)
-
-def delete_from_file(filepath, elements):
-    try:
-        old_name = elements[0].strip() if len(elements) > 0 else ""
-        new_name = elements[1].strip() if len(elements) > 1 else ""
-        icon = elements[2].strip() if len(elements) > 2 else None
-
-        with open(filepath, 'r') as file:
-            lines = file.readlines()
-
-        with open(filepath, 'w') as file:
-            for line in lines:
-                if old_name in line and new_name in line and (not icon or icon in line):
-                   continue
-                file.write(line)
-    except Exception as e:
-        raise RuntimeError(f"Failed to delete modification from file: {str(e)}")
-
-def modify_from_file(filepath, original_line, new_elements):
-    print(f"modify_from_file: filepath={filepath}, original_line={original_line}, new_elements={new_elements}")
-    try:
-        new_old_name = new_elements[0].strip() if len(new_elements) > 0 else ""
-        new_new_name = new_elements[1].strip() if len(new_elements) > 1 else ""
-        new_icon = new_elements[2].strip() if len(new_elements) > 2 else ""
-
-        with open(filepath, 'r') as file:
-            lines = file.readlines()
-
-        with open(filepath, 'w') as file:
-            for line in lines:
-                if line == original_line: # Match the exact original line
-                    new_line = f"modify(find='{new_old_name}' title='{new_new_name}'"
-                    if new_icon:
-                        new_line += f" icon='{new_icon}'"
-                    new_line += ")\n"
-                    file.write(new_line)
-                else:
-                    file.write(line)
-    except Exception as e:
-       raise RuntimeError(f"Failed to modify the file: {str(e)}")
-
 def _clear_layout(layout):
     if layout is not None:
         while layout.count():
@@ -316,98 +270,82 @@ def _clear_layout(layout):
                 if sub_layout is not None:
                     _clear_layout(sub_layout)
 
-def extract_lines(content, start_marker, end_marker):
-    sections = []
-    start = content.find(start_marker)
-    while start != -1:
-        end = content.find(end_marker, start)
-        if end == -1:
-            break
-        section = content[start:end].strip().split('\n')
-        sections.extend([line.strip().rstrip(',') for line in section if line.strip().startswith("id")] )
-        start = content.find(start_marker, end)
-    return sections
-
-
-def extract_modify_lines(content):
-    lines = []
-    for line in content.split('\n'):
-        stripped_line = line.strip()
-        if stripped_line.startswith("modify(find="):
-            parts = stripped_line.split("'")
-            if len(parts) > 3:
-                old_name = parts[1]
-                new_name = parts[3]
-                icon = parts[5] if len(parts) > 5 else ""
-                lines.append((old_name, new_name, icon, line)) # Store the unstripped line
-    return lines
-
-def extract_import_lines(content):
-    lines = []
-    for line in content.split('\n'):
-        stripped_line = line.strip()
-        match = re.search(r"^import\s+'(.*\.nss)'$", stripped_line)
-        if match:
-            full_path = match.group(1)
-            file_name = os.path.basename(full_path)
-            lines.append((file_name, full_path)) # Store (filename, relative_path)
-    return lines
-
-def extract_remove_line(content):
-
-    for line in content.split('\n'):
-        if line.strip().startswith("remove(find="):
-            return line.strip()
-    return None
-
-def update_section(content, start_marker, end_marker, ids):
-    start = content.find(start_marker)
-    while start != -1:
-        end = content.find(end_marker, start)
-        if end == -1:
-            break
-        before_section = content[:start]
-        section = content[start:end]
-        after_section = content[end:]
-
-        section_lines = section.strip().split('\n')
-    
-        if len(ids) < 1:
-            msgBox = CustomMessageBox()
-            msgBox.setIcon(QMessageBox.Critical)
-            msgBox.setText("Error")
-            msgBox.setInformativeText("Each section must contain at least one ID.")
-            msgBox.setStandardButtons(QMessageBox.Ok)
-            msgBox.exec_()
-            return content
+class DragDropListWidget(QListWidget):
+    id_dropped = pyqtSignal(str)
+
+    def __init__(self, parent=None):
+        super(DragDropListWidget, self).__init__(parent)
+        self.setAcceptDrops(True)
+        self.setDragEnabled(True)
+        self.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.setObjectName("modifyList")
 
-        new_ids = [new_id.strip() for new_id in ids if new_id.strip() != '']
+    def add_id(self, id_):
+        item = QListWidgetItem(format_id(id_)); item.setData(Qt.UserRole, id_)
+        self.addItem(item)
+        return item
 
-        if len(new_ids) == 1:
-            new_ids[0] = new_ids[0].rstrip(',')
-        elif len(new_ids) > 1:
-            for i in range(len(new_ids) - 1):
-                new_ids[i] = new_ids[i].rstrip(',') + ","
-            new_ids[-1] = new_ids[-1].rstrip(',')
+    def set_ids(self, ids):
+        self.clear()
+        for id_ in ids:
+            self.add_id(id_)
+        self.original_items = ids
 
-        updated_lines = [line for line in section_lines if not line.strip().startswith("id")]
-        updated_lines.extend(new_ids)
+    def take_current_id(self):
+        item = self.currentItem()
+        if item is None:
+            return None
+        self.takeItem(self.row(item))
+        return item.data(Qt.UserRole)
+
+    def dragEnterEvent(self, event):
+        if event.source() != self:
+            event.accept()
+        else:
+            event.ignore()
 
-        updated_section = "\n".join(updated_lines)
+    def dragMoveEvent(self, event):
+        if event.source() != self:
+            event.accept()
+        else:
+            event.ignore()
 
-        content = before_section + updated_section + after_section
+    def dropEvent(self, event):
+        if event.source() != self:
+            id_ = event.source().take_current_id()
+            if id_:
+                self.add_id(id_)
+                self.id_dropped.emit(id_)
 
-        start = content.find(start_marker, start + len(updated_section))
 
-    return content
+class ShellIdListView(QListView):
+    """The available IDs, drawn from a ShellIdModel through a ShellIdFilterProxy so
+    that large ID sets are neither copied into items nor scanned per keystroke.
+    Takes part in drag and drop with DragDropListWidget."""
+    id_dropped = pyqtSignal(str)
 
-class DragDropListWidget(QListWidget):
     def __init__(self, parent=None):
-        super(DragDropListWidget, self).__init__(parent)
+        super(ShellIdListView, self).__init__(parent)
         self.setAcceptDrops(True)
         self.setDragEnabled(True)
+        self.setUniformItemSizes(True)
+        # Lay out large ID sets a batch at a time so a filter change never blocks typing.
+        self.setLayoutMode(QListView.Batched)
         self.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
         self.setObjectName("modifyList")
+        self.id_model = ShellIdModel(parent=self)
+        self.proxy = ShellIdFilterProxy(self)
+        self.proxy.setSourceModel(self.id_model)
+        self.setModel(self.proxy)
+
+    def add_id(self, id_):
+        self.id_model.add_id(id_)
+
+    def take_current_id(self):
+        index = self.currentIndex()
+        if not index.isValid():
+            return None
+        return self.id_model.take_row(self.proxy.mapToSource(index).row())
 
     def dragEnterEvent(self, event):
         if event.source() != self:
@@ -423,15 +361,10 @@ class DragDropListWidget(QListWidget):
 
     def dropEvent(self, event):
         if event.source() != self:
-            item = event.source().currentItem()
-            source_list = event.source()
-            dest_list = self
-
-            source_list.takeItem(source_list.row(item))
-
-            new_item = QListWidgetItem(item.text())
-            new_item.setData(Qt.UserRole, item.data(Qt.UserRole))
-            dest_list.addItem(new_item)
+            id_ = event.source().take_current_id()
+            if id_:
+                self.add_id(id_)
+                self.id_dropped.emit(id_)
 
 
 class EditableTableWidget(QTableWidget):
@@ -458,23 +391,25 @@ class EditableTableWidget(QTableWidget):
     def set_items(self, items):
         self.setRowCount(0)
         for item_data in items:
-            if not item_data:
-                continue
-            old_name, new_name, icon, original_line = item_data # Unpack the tuple
-            row_position = self.rowCount()
-            self.insertRow(row_position)
-            self.setItem(row_position, 0, QTableWidgetItem(old_name))
-            self.setItem(row_position, 1, QTableWidgetItem(new_name))
-            self.setItem(row_position, 2, QTableWidgetItem(icon))
-            self.setItem(row_position, 3, QTableWidgetItem(""))
-
-            self.set_icon_item(row_position, icon) # Call set_icon_item always
-
-            # Store original data and the full original line for editing
-            self.item(row_position, 0).setData(Qt.UserRole, old_name)
-            self.item(row_position, 1).setData(Qt.UserRole, new_name)
-            self.item(row_position, 2).setData(Qt.UserRole, icon)
-            self.item(row_position, 3).setData(Qt.UserRole, original_line) # Store original line here
+            if item_data:
+                self.add_item(item_data)
+
+    def add_item(self, item_data):
+        old_name, new_name, icon, rule = item_data # Unpack the tuple
+        row_position = self.rowCount()
+        self.insertRow(row_position)
+        self.setItem(row_position, 0, QTableWidgetItem(old_name))
+        self.setItem(row_position, 1, QTableWidgetItem(new_name))
+        self.setItem(row_position, 2, QTableWidgetItem(icon))
+        self.setItem(row_position, 3, QTableWidgetItem(""))
+
+        self.set_icon_item(row_position, icon) # Call set_icon_item always
+
+        # Store original data and the rule's statement for editing
+        self.item(row_position, 0).setData(Qt.UserRole, old_name)
+        self.item(row_position, 1).setData(Qt.UserRole, new_name)
+        self.item(row_position, 2).setData(Qt.UserRole, icon)
+        self.item(row_position, 3).setData(Qt.UserRole, rule) # Store the modify() statement here
 
     def set_icon_item(self, row, icon_path):
             icon_item = self.item(row, 2)
@@ -603,32 +538,47 @@ class ModifyWidget(QWidget):
         self.filepath = nss_path
         self.project_root = project_root
         self.shell_nss_path = os.path.join(self.project_root, 'shell.nss')
+        self.shell_imports = get_import_manager(self.shell_nss_path)
 
         
 
+        # Edits are kept in self.document and written together once they pause.
+        self.document = None
+        self.write_timer = QTimer(self)
+        self.write_timer.setSingleShot(True)
+        self.write_timer.setInterval(MODIFY_WRITE_DELAY_MS)
+        self.write_timer.timeout.connect(self.flush_pending_write)
+
+        self.shell_ids = ShellIdRegistry(load_shell_ids())
+        self.id_matches = None
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(ID_SEARCH_DELAY_MS)
+        self.search_timer.timeout.connect(self.filter_lists)
+
         self.main_layout = QVBoxLayout(self) # Initialize main_layout here
 
         if not os.path.exists(self.filepath):
             self.setup_placeholder_ui()
         else:
-            content = read_file(self.filepath)
-            shell_content = read_file(self.shell_nss_path)
-
-            hide_lines = extract_lines(content, "// hide\nmodify(mode=mode.multiple\nwhere=this.id(", ") vis=vis.remove)")
-            more_lines = extract_lines(content, "// more\nmodify(mode=mode.multiple\nwhere=this.id(", ") menu=title.options)")
-            shift_lines = extract_lines(content, "// shift\nmodify(mode=single\nwhere=this.id(", ") vis=key.shift())")
-            modify_lines = extract_modify_lines(content)
-            remove_line = extract_remove_line(content)
-            self.removed_items = []
-            if remove_line:
-                items_str = remove_line[remove_line.find('"') + 1:remove_line.rfind('"')]
-                if items_str:
-                    self.removed_items = items_str.split('|')
+            self.document = ModifyDocument(self.filepath)
+
+            hide_lines = self.document.section_ids('hide')
+            more_lines = self.document.section_ids('more')
+            shift_lines = self.document.section_ids('shift')
+            modify_lines = self.document.rules()
+            self.removed_items = self.document.removed_items()
+            self.shell_ids.assign_sections({'hide': hide_lines, 'more': more_lines, 'shift': shift_lines})
             
-            self.imported_items = extract_import_lines(shell_content)
+            self.imported_items = [(os.path.basename(path), path) for path in self.shell_imports.imports()]
+            # Plugins and user imports bring their own IDs along with the built-in ones.
+            self.shell_ids.add(load_nss_ids(os.path.join(self.project_root, path) for _, path in self.imported_items))
 
             self.init_ui(hide_lines, more_lines, shift_lines, modify_lines)
 
+            self.undo_shortcut = QShortcut(QKeySequence.Undo, self)
+            self.undo_shortcut.activated.connect(self.undo)
+
     def setup_placeholder_ui(self):
         _clear_layout(self.main_layout)
         error_label = QLabel(f"File not found:\n{self.filepath}\n\nPlease ensure the file exists to use this feature.")
@@ -662,10 +612,7 @@ class ModifyWidget(QWidget):
         left_layout.addWidget(self.hide_label)
 
         self.hide_list = DragDropListWidget()
-        for line in hide_lines:
-            item = QListWidgetItem(self.format_id_for_ui(line)); item.setData(Qt.UserRole, line)
-            self.hide_list.addItem(item)
-        self.hide_list.original_items = hide_lines
+        self.hide_list.set_ids(hide_lines)
         hide_frame = QFrame(); hide_frame.setObjectName("modifyFrame")
         hide_frame_layout = QVBoxLayout(hide_frame); hide_frame_layout.setContentsMargins(10,10,10,10)
         hide_frame_layout.addWidget(self.hide_list)
@@ -680,10 +627,7 @@ class ModifyWidget(QWidget):
         left_layout.addWidget(self.more_label)
 
         self.more_list = DragDropListWidget()
-        for line in more_lines:
-            item = QListWidgetItem(self.format_id_for_ui(line)); item.setData(Qt.UserRole, line)
-            self.more_list.addItem(item)
-        self.more_list.original_items = more_lines
+        self.more_list.set_ids(more_lines)
         more_frame = QFrame(); more_frame.setObjectName("modifyFrame")
         more_frame_layout = QVBoxLayout(more_frame); more_frame_layout.setContentsMargins(10,10,10,10)
         more_frame_layout.addWidget(self.more_list)
@@ -698,10 +642,7 @@ class ModifyWidget(QWidget):
         left_layout.addWidget(self.shift_label)
 
         self.shift_list = DragDropListWidget()
-        for line in shift_lines:
-            item = QListWidgetItem(self.format_id_for_ui(line)); item.setData(Qt.UserRole, line)
-            self.shift_list.addItem(item)
-        self.shift_list.original_items = shift_lines
+        self.shift_list.set_ids(shift_lines)
         shift_frame = QFrame(); shift_frame.setObjectName("modifyFrame")
         shift_frame_layout = QVBoxLayout(shift_frame); shift_frame_layout.setContentsMargins(10,10,10,10)
         shift_frame_layout.addWidget(self.shift_list)
@@ -725,53 +666,16 @@ class ModifyWidget(QWidget):
         self.search_input.setStyleSheet("background-color: rgba(255, 255, 255, 0.1); border-radius: 8px; padding: 5px; color: #FFFFFF;")
         shadow = QGraphicsDropShadowEffect(blurRadius=15, xOffset=2, yOffset=2); shadow.setColor(QColor(0, 0, 0, 160))
         self.search_input.setGraphicsEffect(shadow)
-        self.search_input.textChanged.connect(self.filter_lists)
+        self.search_input.textChanged.connect(lambda text: self.search_timer.start())
         ids_header_layout.addWidget(self.search_input)
         ids_header_layout.addStretch()
         right_layout.addLayout(ids_header_layout)
 
-        self.ids_list = DragDropListWidget()
-        placeholder_ids = ["id.add_a_network_location", "id.align_icons_to_grid", "id.arrange_by",
-                           "id.auto_arrange_icons", "id.autoplay", "id.cancel", "id.cascade_windows", "id.cast_to_device",
-                           "id.cleanup", "id.collapse", "id.collapse_all_groups", "id.collapse_group", "id.command_prompt",
-                           "id.compressed", "id.configure", "id.content", "id.control_panel", "id.copy", "id.copy_as_path",
-                           "id.copy_here", "id.copy_path", "id.copy_to", "id.copy_to_folder", "id.cortana", "id.create_shortcut",
-                           "id.create_shortcuts_here", "id.customize_notification_icons", "id.customize_this_folder",
-                           "id.cut", "id.delete", "id.desktop", "id.details", "id.device_manager", "id.disconnect",
-                           "id.disconnect_network_drive", "id.display_settings", "id.edit", "id.eject", "id.empty_recycle_bin",
-                           "id.erase_this_disc", "id.exit_explorer", "id.expand", "id.expand_all_groups", "id.expand_group",
-                           "id.extra_large_icons", "id.extract_all", "id.extract_to",
-                           "id.file_explorer", "id.folder_options", "id.format", "id.give_access_to", "id.group_by",
-                           "id.include_in_library", "id.insert_unicode_control_character", "id.install", "id.large_icons",
-                           "id.list", "id.lock_all_taskbars", "id.lock_the_taskbar", "id.make_available_offline",
-                           "id.make_available_online", "id.manage", "id.map_as_drive", "id.map_network_drive", "id.medium_icons",
-                           "id.merge", "id.more_options", "id.mount", "id.move_here", "id.move_to", "id.move_to_folder",
-                           "id.new", "id.new_folder", "id.new_item", "id.news_and_interests", "id.next_desktop_background",
-                           "id.open", "id.open_as_portable", "id.open_autoplay", "id.open_command_prompt",
-                           "id.open_command_window_here", "id.open_file_location", "id.open_folder_location",
-                           "id.open_in_new_process", "id.open_in_new_tab", "id.open_in_new_window", "id.open_new_tab",
-                           "id.open_new_window", "id.open_powershell_window_here", "id.open_windows_powershell",
-                           "id.open_with", "id.options", "id.paste", "id.paste_shortcut", "id.personalize",
-                           "id.pin_current_folder_to_quick_access", "id.pin_to_quick_access", "id.pin_to_start",
-                           "id.pin_to_taskbar", "id.play", "id.power_options",
-                           "id.preview", "id.print", "id.properties", "id.reconversion", "id.redo", "id.refresh",
-                           "id.remove_from_quick_access", "id.remove_properties", "id.rename", "id.restore",
-                           "id.restore_default_libraries", "id.restore_previous_versions", "id.rotate_left", "id.rotate_right",
-                           "id.run", "id.run_as_administrator", "id.run_as_another_user", "id.search", "id.select_all",
-                           "id.send_to", "id.set_as_desktop_background", "id.set_as_desktop_wallpaper", "id.settings",
-                           "id.share", "id.share_with", "id.shield", "id.show_cortana_button",
-                           "id.show_desktop_icons", "id.show_file_extensions", "id.show_hidden_files", "id.show_libraries",
-                           "id.show_network", "id.show_pen_button", "id.show_people_on_the_taskbar", "id.show_task_view_button",
-                           "id.show_the_desktop", "id.show_this_pc", "id.show_touch_keyboard_button", "id.show_touchpad_button",
-                           "id.show_windows_stacked", "id.small_icons", "id.sort_by", "id.store",
-                           "id.task_manager", "id.taskbar_settings", "id.tiles", "id.troubleshoot_compatibility",
-                           "id.turn_off_bitlocker", "id.turn_on_bitlocker", "id.undo", "id.unpin_from_quick_access",
-                           "id.unpin_from_start", "id.unpin_from_taskbar", "id.view"]
-        filtered_ids = self.filter_ids(placeholder_ids, hide_lines, more_lines, shift_lines)
-        for line in filtered_ids:
-            item = QListWidgetItem(self.format_id_for_ui(line)); item.setData(Qt.UserRole, line)
-            self.ids_list.addItem(item)
-        self.ids_list.original_items = filtered_ids
+        self.ids_list = ShellIdListView()
+        self.ids_list.id_model.set_ids(self.shell_ids.available())
+        for label, list_widget in self.section_lists():
+            list_widget.id_dropped.connect(lambda id_, label=label, list_widget=list_widget: self.move_id(id_, label, list_widget))
+        self.ids_list.id_dropped.connect(lambda id_: self.move_id(id_, None))
         ids_frame = QFrame(); ids_frame.setObjectName("modifyFrame")
         ids_frame_layout = QVBoxLayout(ids_frame); ids_frame_layout.setContentsMargins(10,10,10,10)
         ids_frame_layout.addWidget(self.ids_list)
@@ -951,28 +855,25 @@ class ModifyWidget(QWidget):
 
         
 
-    def filter_lists(self, text):
-        text = text.lower()
-        for list_widget in [self.hide_list, self.more_list, self.shift_list, self.ids_list]:
-            for i in range(list_widget.count()):
-                item = list_widget.item(i)
-                item.setHidden(text not in item.text().lower())
-
-    def filter_ids(self, ids, *lines_lists):
-        used_ids = set()
-        for lines in lines_lists:
-            for line in lines:
-                if line.startswith("id."):
-                    used_ids.add(line.strip().rstrip(','))
-        return [id_ for id_ in ids if id_ not in used_ids]
+    def section_lists(self):
+        return zip(SECTION_LABELS, (self.hide_list, self.more_list, self.shift_list))
 
-    def format_id_for_ui(self, id_string):
-        if id_string.startswith("id."):
-            id_string = id_string[3:]
+    def filter_lists(self):
+        """Applies the search box through the ID registry; runs once typing pauses."""
+        self.search_timer.stop()
+        self.id_matches = self.shell_ids.search(self.search_input.text())
+        self.ids_list.proxy.set_matches(self.id_matches)
+        for label, list_widget in self.section_lists():
+            for i in range(list_widget.count()):
+                self.filter_item(list_widget.item(i))
 
-        formatted_id = " ".join(word.capitalize() for word in id_string.replace("_", " ").split("."))
+    def filter_item(self, item):
+        item.setHidden(self.id_matches is not None and item.data(Qt.UserRole) not in self.id_matches)
 
-        return formatted_id
+    def move_id(self, id_, label, list_widget=None):
+        self.shell_ids.assign(id_, label)
+        if list_widget is not None:
+            self.filter_item(list_widget.item(list_widget.count() - 1))
 
     def select_icon(self):
         icon_path, _ = QFileDialog.getOpenFileName(self, "Select Icon", "", "Images (*.png *.xpm *.jpg *.ico)")
@@ -985,24 +886,17 @@ class ModifyWidget(QWidget):
         icon = self.icon_input.text().strip()
 
         if old_name and new_name:
-            modify_command = f"modify(find='{old_name}' title='{new_name}'"
-            if icon:
-                modify_command += f" icon='{icon}'"
-            modify_command += ")"
-
-            append_to_file(self.filepath, modify_command)
-            self.refresh_modification_list()
+            rule = self.document.add_rule(old_name, new_name, icon)
+            self.modification_list.add_item((old_name, new_name, icon, rule))
+            self.write_timer.start()
             self.save_label_text(f"Modified '{old_name}' to '{new_name}'")
             QTimer.singleShot(3000, self.clear_save_label)
 
     def delete_modification_item(self, row, column):
         if column == 3:
-            old_name = self.modification_list.item(row, 0).text().strip() if self.modification_list.item(row, 0) else ""
-            new_name = self.modification_list.item(row, 1).text().strip() if self.modification_list.item(row, 1) else ""
-            icon_item = self.modification_list.item(row, 2)
-            icon = icon_item.icon().name() if icon_item and icon_item.icon() else ""
-            
-            delete_from_file(self.filepath, [old_name, new_name, icon])
+            rule = self.modification_list.item(row, 3).data(Qt.UserRole)
+            self.document.delete_rule(rule)
+            self.write_timer.start()
             self.modification_list.removeRow(row)
             self.modification_list.hovered_row = -1
             self.save_label_text("Modification deleted.")
@@ -1025,29 +919,13 @@ class ModifyWidget(QWidget):
         self.update_remove_line()
 
     def update_remove_line(self):
-        content = read_file(self.filepath)
-        lines = content.split('\n')
-        new_lines = []
-        remove_line_exists = False
-        for line in lines:
-            if line.strip().startswith("remove(find="):
-                remove_line_exists = True
-                if self.removed_items:
-                    new_lines.append(f'remove(find="{"|".join(self.removed_items)}")')
-            else:
-                new_lines.append(line)
-        
-        if not remove_line_exists and self.removed_items:
-            new_lines.append(f'remove(find="{"|".join(self.removed_items)}")')
-
-        write_file(self.filepath, "\n".join(new_lines))
+        self.document.set_removed_items(self.removed_items)
+        self.write_timer.start()
         self.save_label_text("Removed items updated.")
         QTimer.singleShot(3000, self.clear_save_label)
 
     def refresh_modification_list(self):
-            content = read_file(self.filepath)
-            modify_lines = extract_modify_lines(content)
-            self.modification_list.set_items(modify_lines)
+            self.modification_list.set_items(self.document.rules())
 
     def add_remove_item(self):
         dialog = RoundedInputDialog(self, "Add Remove Item", "Enter item to remove:")
@@ -1077,7 +955,8 @@ class ModifyWidget(QWidget):
             if (file_name_only, relative_path) not in self.imported_items:
                 self.imported_items.append((file_name_only, relative_path))
                 self.import_list.addItem(file_name_only)
-                self.update_shell_nss_imports()
+                self.update_shell_nss_imports(add=[relative_path])
+                self.add_imported_ids(relative_path)
                 self.save_label_text(f"Added import: {file_name_only}")
                 QTimer.singleShot(3000, self.clear_save_label)
             else:
@@ -1090,22 +969,22 @@ class ModifyWidget(QWidget):
 
     def delete_import_item(self, item_text):
         # Find the tuple in self.imported_items that matches the filename
+        removed_paths = []
         for i, (filename, relative_path) in enumerate(self.imported_items):
             if filename == item_text:
+                removed_paths.append(relative_path)
                 del self.imported_items[i]
                 break
         for i in range(self.import_list.count()):
             if self.import_list.item(i).text() == item_text:
                 self.import_list.takeItem(i)
                 break
-        self.update_shell_nss_imports()
+        self.update_shell_nss_imports(remove=removed_paths)
         self.save_label_text(f"Removed import: {item_text}")
         QTimer.singleShot(3000, self.clear_save_label)
 
     def refresh_modification_list(self):
-            content = read_file(self.filepath)
-            modify_lines = extract_modify_lines(content)
-            self.modification_list.set_items(modify_lines)
+            self.modification_list.set_items(self.document.rules())
 
     def add_import_item(self):
         file_path, _ = QFileDialog.getOpenFileName(self, "Select .nss File", self.project_root, "NSS Files (*.nss)")
@@ -1119,7 +998,8 @@ class ModifyWidget(QWidget):
             if (file_name_only, relative_path) not in self.imported_items:
                 self.imported_items.append((file_name_only, relative_path))
                 self.import_list.addItem(file_name_only)
-                self.update_shell_nss_imports()
+                self.update_shell_nss_imports(add=[relative_path])
+                self.add_imported_ids(relative_path)
                 self.save_label_text(f"Added import: {file_name_only}")
                 QTimer.singleShot(3000, self.clear_save_label)
             else:
@@ -1132,60 +1012,32 @@ class ModifyWidget(QWidget):
 
     def delete_import_item(self, item_text):
         # Find the tuple in self.imported_items that matches the filename
+        removed_paths = []
         for i, (filename, relative_path) in enumerate(self.imported_items):
             if filename == item_text:
+                removed_paths.append(relative_path)
                 del self.imported_items[i]
                 break
         for i in range(self.import_list.count()):
             if self.import_list.item(i).text() == item_text:
                 self.import_list.takeItem(i)
                 break
-        self.update_shell_nss_imports()
+        self.update_shell_nss_imports(remove=removed_paths)
         self.save_label_text(f"Removed import: {item_text}")
         QTimer.singleShot(3000, self.clear_save_label)
 
-    def update_shell_nss_imports(self):
-        try:
-            with open(self.shell_nss_path, 'r') as f:
-                original_lines = f.readlines()
-
-            # 1. Get all import paths currently in the file
-            existing_import_paths_in_file = set()
-            for line in original_lines:
-                stripped_line = line.strip()
-                match = re.search(r"^import\s+'(.*\.nss)'$", stripped_line)
-                if match:
-                    existing_import_paths_in_file.add(match.group(1))
-
-            # 2. Determine which imports need to be removed and which need to be added
-            current_imported_paths = {path for _, path in self.imported_items}
-            imports_to_remove = existing_import_paths_in_file - current_imported_paths
-            imports_to_add = current_imported_paths - existing_import_paths_in_file
-
-            # 3. Construct the new content, preserving non-import lines and existing desired imports
-            new_content_lines = []
-            for line in original_lines:
-                stripped_line = line.strip()
-                match = re.search(r"^import\s+'(.*\.nss)'$", stripped_line)
-                
-                if match:
-                    current_import_path = match.group(1)
-                    if current_import_path not in imports_to_remove:
-                        new_content_lines.append(line)
-                else:
-                    new_content_lines.append(line)
-
-            # 4. Append any new imports that were not present in the original file
-            if imports_to_add:
-                if new_content_lines and new_content_lines[-1].strip() != "":
-                    new_content_lines.append("\n")
-                
-                for new_import_path in sorted(list(imports_to_add)):
-                    new_content_lines.append(f"import '{new_import_path}'\n")
-                
-
-            write_file(self.shell_nss_path, "".join(new_content_lines))
+    def add_imported_ids(self, relative_path):
+        count = len(self.shell_ids)
+        self.shell_ids.add(load_nss_ids([os.path.join(self.project_root, relative_path)]))
+        if len(self.shell_ids) != count:
+            self.ids_list.id_model.set_ids(self.shell_ids.available())
+            self.filter_lists()
 
+    def update_shell_nss_imports(self, add=(), remove=()):
+        # Only the imports changed on this page are applied, so imports added by
+        # plugin installs since the page was loaded are left alone.
+        try:
+            self.shell_imports.apply(add=add, remove=remove)
         except Exception as e:
             msgBox = CustomMessageBox(self)
             msgBox.setIcon(QMessageBox.Critical)
@@ -1196,18 +1048,22 @@ class ModifyWidget(QWidget):
 
     def save_changes(self):
         try:
-            content = read_file(self.filepath)
-
-            hide_ids = [self.hide_list.item(i).data(Qt.UserRole) for i in range(self.hide_list.count())]
-            content = update_section(content, "// hide\nmodify(mode=mode.multiple\nwhere=this.id(", ") vis=vis.remove)", hide_ids)
-
-            more_ids = [self.more_list.item(i).data(Qt.UserRole) for i in range(self.more_list.count())]
-            content = update_section(content, "// more\nmodify(mode=mode.multiple\nwhere=this.id(", ") menu=title.options)", more_ids)
-
-            shift_ids = [self.shift_list.item(i).data(Qt.UserRole) for i in range(self.shift_list.count())]
-            content = update_section(content, "// shift\nmodify(mode=single\nwhere=this.id(", ") vis=key.shift())", shift_ids)
-
-            write_file(self.filepath, content)
+            ids_by_label = {}
+            for label, list_widget in self.section_lists():
+                ids = [list_widget.item(i).data(Qt.UserRole) for i in range(list_widget.count())]
+                if len(ids) < 1:
+                    msgBox = CustomMessageBox()
+                    msgBox.setIcon(QMessageBox.Critical)
+                    msgBox.setText("Error")
+                    msgBox.setInformativeText("Each section must contain at least one ID.")
+                    msgBox.setStandardButtons(QMessageBox.Ok)
+                    msgBox.exec_()
+                    continue
+                ids_by_label[label] = [id_.strip().rstrip(',') for id_ in ids if id_.strip() != '']
+            self.document.set_section_ids(ids_by_label)
+
+            self.write_timer.stop()
+            self.document.flush()
             self.save_label_text("Changes saved successfully!")
             QTimer.singleShot(3000, self.clear_save_label)
         except Exception as e:
@@ -1220,7 +1076,7 @@ class ModifyWidget(QWidget):
 
 
     def save_data(self):
-        content = read_file(self.filepath)
+        content = self.document.text
 
         hide_ids = [id_ for id_ in self.hide_list.original_items]
         more_ids = [id_ for id_ in self.more_list.original_items]
@@ -1242,21 +1098,59 @@ class ModifyWidget(QWidget):
     def clear_save_label(self):
          self.save_label.setText("")
 
+    def flush_pending_write(self):
+        """Writes edits still waiting on write_timer to modify.nss now."""
+        self.write_timer.stop()
+        if self.document is None:
+            return
+        try:
+            self.document.flush()
+        except Exception as e:
+            print(f"Error writing {self.filepath}: {e}")
+            self.save_label_text("Could not save modify.nss.")
+
+    def undo(self):
+        label = self.document.undo() if self.document else None
+        if label:
+            self.refresh_from_document()
+            self.write_timer.start()
+            self.save_label_text(f"Undone: {label}")
+            QTimer.singleShot(3000, self.clear_save_label)
+
+    def refresh_from_document(self):
+        ids_by_label = {label: self.document.section_ids(label) for label in SECTION_LABELS}
+        self.shell_ids.assign_sections(ids_by_label)
+        for label, list_widget in self.section_lists():
+            list_widget.set_ids(ids_by_label[label])
+        self.ids_list.id_model.set_ids(self.shell_ids.available())
+        self.filter_lists()
+        self.modification_list.set_items(self.document.rules())
+        self.removed_items = self.document.removed_items()
+        self.remove_list.clear()
+        self.remove_list.addItems(self.removed_items)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self.document is not None and self.document.reload_if_changed():
+            self.refresh_from_document()
+
+    def hideEvent(self, event):
+        self.flush_pending_write()
+        super().hideEvent(event)
+
     def edit_modification(self, row, column, text):
        if not self.modification_list:
             return
 
-       original_line = self.modification_list.item(row, 3).data(Qt.UserRole) # Get original line
+       rule = self.modification_list.item(row, 3).data(Qt.UserRole) # Get the rule's statement
 
        current_old_name = self.modification_list.item(row, 0).text().strip()
        current_new_name = self.modification_list.item(row, 1).text().strip()
        current_icon = self.modification_list.item(row, 2).data(Qt.UserRole) # Get current icon path
 
-       new_elements = [current_old_name, current_new_name, current_icon]
-       print(f"edit_modification: original_line={original_line}, new_elements={new_elements}")
-
-       modify_from_file(self.filepath, original_line, new_elements)
-       self.refresh_modification_list()
+       rule = self.document.update_rule(rule, current_old_name, current_new_name, (current_icon or "").strip())
+       self.modification_list.item(row, 3).setData(Qt.UserRole, rule)
+       self.write_timer.start()
        self.save_label_text("Modification updated.")
        QTimer.singleShot(3000, self.clear_save_label)
 
@@ -1264,15 +1158,13 @@ class ModifyWidget(QWidget):
        if not self.modification_list:
             return
 
-       original_line = self.modification_list.item(row, 3).data(Qt.UserRole) # Get original line
+       rule = self.modification_list.item(row, 3).data(Qt.UserRole) # Get the rule's statement
 
        current_old_name = self.modification_list.item(row, 0).text().strip()
        current_new_name = self.modification_list.item(row, 1).text().strip()
 
-       new_elements = [current_old_name, current_new_name, icon_path]
-       print(f"edit_icon_modification: original_line={original_line}, new_elements={new_elements}")
-
-       modify_from_file(self.filepath, original_line, new_elements)
-       self.refresh_modification_list()
+       rule = self.document.update_rule(rule, current_old_name, current_new_name, icon_path.strip())
+       self.modification_list.item(row, 3).setData(Qt.UserRole, rule)
+       self.write_timer.start()
        self.save_label_text("Icon updated.")
        QTimer.singleShot(3000, self.clear_save_label)
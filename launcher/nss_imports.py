@@ -0,0 +1,95 @@
+import os
+import threading
+
+import nss_parser
+import tracing
+from utils import safe_file_write
+
+
+class ShellImportManager:
+    """Keeps shell.nss parsed in memory and applies import changes to it in
+    batches. Every batch is one read-modify-write under a single lock, committed
+    with one safe_file_write, and only if something actually changed. The file is
+    re-read when its mtime or size shows it was edited outside the launcher."""
+
+    def __init__(self, shell_nss_path):
+        self.shell_nss_path = shell_nss_path
+        self._lock = threading.RLock()
+        self._document = None
+        self._stat = None
+
+    def _file_stat(self):
+        try:
+            stat = os.stat(self.shell_nss_path)
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
+
+    def _load(self):
+        stat = self._file_stat()
+        if self._document is None or stat != self._stat:
+            with tracing.span('read shell.nss', 'io'), open(self.shell_nss_path, 'r') as f:
+                self._document = nss_parser.parse(f.read())
+            self._stat = stat
+        return self._document
+
+    def imports(self):
+        with self._lock:
+            return [statement.path for statement in self._load().imports()]
+
+    def apply(self, add=(), remove=()):
+        """Removes the imports in remove, then adds those in add after the last
+        existing import (or at the end of the file). Returns True if shell.nss was
+        rewritten."""
+        with self._lock:
+            document = self._load()
+            original = document.text
+            remove = set(remove)
+            present = set()
+            for statement in document.imports():
+                if statement.path in remove:
+                    document.remove(statement)
+                else:
+                    present.add(statement.path)
+
+            to_add = []
+            for path in add:
+                if path not in present and path not in to_add:
+                    to_add.append(path)
+            if to_add:
+                imports = document.imports()
+                if imports:
+                    document.insert_after(imports[-1], "".join(f"\nimport '{path}'" for path in to_add))
+                else:
+                    document.append("".join(f"import '{path}'\n" for path in to_add))
+
+            if document.text == original:
+                return False
+            try:
+                safe_file_write(self.shell_nss_path, document.text)
+            except Exception:
+                # The document was already edited; read the file again next time.
+                self._document = None
+                raise
+            self._stat = self._file_stat()
+            return True
+
+    def add(self, path):
+        return self.apply(add=[path])
+
+    def remove(self, path):
+        return self.apply(remove=[path])
+
+
+_managers = {}
+_managers_lock = threading.Lock()
+
+
+def get_import_manager(shell_nss_path):
+    """Shared manager per shell.nss, so every caller goes through the same lock and
+    in-memory copy."""
+    key = os.path.normcase(os.path.abspath(shell_nss_path))
+    with _managers_lock:
+        if key not in _managers:
+            _managers[key] = ShellImportManager(shell_nss_path)
+        return _managers[key]
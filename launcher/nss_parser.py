@@ -0,0 +1,645 @@
+"""Tokenizer and parser for Nilesoft Shell .nss files.
+
+parse() returns a concrete syntax tree that keeps every character of its input:
+whitespace and comments are tokens too, so str(document) == text, and an edit
+only changes the text of the nodes it touches. The grammar covers what the
+launcher reads and edits:
+
+    document   := statement*
+    statement  := call | assignment | import | other
+    call       := NAME ['(' argument* ')'] [block]     modify(...), menu(...) {...}, theme {...}
+    block      := '{' statement* '}'
+    assignment := key (',' key)* '=' expression       key = value, $var = ..., @a, 'b' = ...
+    import     := 'import' STRING
+    argument   := [NAME '='] expression
+    expression := term (OPERATOR term)*
+    term       := [UNARY] (STRING | NUMBER | COLOR | GLYPH | NAME | group) group*
+    group      := '(' ... ')' | '[' ... ']'
+
+Anything else is kept as an 'other' statement running to the end of its line, so
+syntax the parser does not know is carried through untouched instead of raising.
+"""
+import re
+
+import tracing
+
+# An expression embedded in a string, such as @if(theme.islight,'#fff','#000'), whose
+# quotes do not end the string. Parentheses inside it may nest one level deep. The
+# string patterns are unrolled (text run, then '@' followed by a text run) so a
+# string that is never closed fails in linear time and is left as an unknown quote.
+_QUOTED = r"'[^']*'|\"[^\"]*\""
+_EMBEDDED = rf"""@[\w.]*\((?:[^()'"]|{_QUOTED}|\((?:[^()'"]|{_QUOTED})*\))*\)"""
+_AT = rf"""(?:{_EMBEDDED}|@(?![\w.]*\())"""
+
+_TOKEN_PATTERN = re.compile(rf"""
+    (?P<whitespace>[ \t\r\n\f\v\ufeff]+)
+  | (?P<comment>//[^\n]*|/\*.*?(?:\*/|\Z))
+  | (?P<string>'[^'@]*(?:{_AT}[^'@]*)*'|"[^"@]*(?:{_AT}[^"@]*)*")
+  | (?P<color>\#[0-9A-Fa-f]+)
+  | (?P<number>\d+(?:\.\d+)?)
+  | (?P<glyph>\\u[0-9A-Fa-f]{{4}})
+  | (?P<name>[$@]?[A-Za-z_]\w*(?:[.\-][A-Za-z_]\w*)*)
+  | (?P<operator>==|!=|<=|>=|&&|\|\||[<>+\-*/%?:!&|])
+  | (?P<punct>[()\[\]{{}},=;.])
+  | (?P<unknown>.)
+""", re.VERBOSE | re.DOTALL)
+
+TRIVIA = frozenset(('whitespace', 'comment', 'unknown'))
+VALUES = frozenset(('string', 'color', 'number', 'glyph', 'name'))
+WORD_OPERATORS = frozenset(('and', 'or'))
+UNARY_OPERATORS = frozenset(('!', '-', 'not'))
+
+
+class Token:
+    __slots__ = ('kind', 'text', 'offset')
+
+    def __init__(self, kind, text, offset=None):
+        self.kind = kind
+        self.text = text
+        self.offset = offset
+
+    def __str__(self):
+        return self.text
+
+    def __repr__(self):
+        return f"Token({self.kind!r}, {self.text!r})"
+
+    def is_punct(self, chars):
+        return self.kind == 'punct' and self.text in chars
+
+    def is_operator(self):
+        return self.kind == 'operator' or (self.kind == 'name' and self.text in WORD_OPERATORS)
+
+
+def tokenize(text):
+    return [Token(match.lastgroup, match.group(), match.start()) for match in _TOKEN_PATTERN.finditer(text)]
+
+
+def unquote(text):
+    if len(text) >= 2 and text[0] in '\'"' and text[-1] == text[0]:
+        return text[1:-1]
+    return text
+
+
+class Node:
+    kind = 'node'
+
+    def __init__(self, children=None):
+        self.children = children if children is not None else []
+        self.parent = None
+
+    def _write(self, parts):
+        for child in self.children:
+            if isinstance(child, Token):
+                parts.append(child.text)
+            else:
+                child._write(parts)
+
+    @property
+    def text(self):
+        parts = []
+        self._write(parts)
+        return "".join(parts)
+
+    def __str__(self):
+        return self.text
+
+    def __repr__(self):
+        return f"<{type(self).__name__} {self.text[:40]!r}>"
+
+    def tokens(self):
+        for child in self.children:
+            if isinstance(child, Token):
+                yield child
+            else:
+                yield from child.tokens()
+
+    @property
+    def offset(self):
+        """Position in the parsed text, or None for nodes created by an edit."""
+        return next(self.tokens(), Token('', '')).offset
+
+    def _reparse(self, text, parse):
+        parser = _Parser(text)
+        node = parse(parser)
+        parser.expect_end()
+        self.children = node.children
+
+
+class Group(Node):
+    """A bracketed run of tokens, such as the id list in this.id(...)."""
+    kind = 'group'
+
+    def _split(self):
+        items = [[]]
+        for child in self.children[1:-1]:
+            if isinstance(child, Token) and child.is_punct(','):
+                items.append([])
+            else:
+                items[-1].append(child)
+        return items
+
+    def items(self):
+        """The comma-separated items, without comments or surrounding whitespace."""
+        items = []
+        for item in self._split():
+            text = "".join(str(child) for child in item
+                           if not (isinstance(child, Token) and child.kind == 'comment')).strip()
+            if text:
+                items.append(text)
+        return items
+
+    def set_items(self, items):
+        """Replaces the items, keeping the whitespace the group already uses after
+        its opening bracket, after each comma and before its closing bracket."""
+        inner = self.children[1:-1]
+        leading = "".join(child.text for child in _leading_whitespace(inner))
+        trailing = "".join(child.text for child in reversed(_leading_whitespace(reversed(inner))))
+        if len(leading) == len("".join(str(child) for child in inner)):
+            trailing = ''
+        separator = '\n' if '\n' in leading else ' '
+        for index, child in enumerate(inner[:-1]):
+            if isinstance(child, Token) and child.is_punct(','):
+                following = inner[index + 1]
+                separator = following.text if isinstance(following, Token) and following.kind == 'whitespace' else ''
+                break
+        close = self.children[-1].text if len(self.children) > 1 else ''
+        text = self.children[0].text + leading + (',' + separator).join(items) + trailing + close
+        self._reparse(text, _Parser.parse_group)
+
+
+def _leading_whitespace(children):
+    leading = []
+    for child in children:
+        if not (isinstance(child, Token) and child.kind == 'whitespace'):
+            break
+        leading.append(child)
+    return leading
+
+
+class Expression(Node):
+    kind = 'expression'
+
+    @property
+    def value(self):
+        """The expression text, with the quotes removed if it is a single string."""
+        return unquote(self.text.strip())
+
+    def is_string(self):
+        significant = [child for child in self.children if not (isinstance(child, Token) and child.kind in TRIVIA)]
+        return len(significant) == 1 and isinstance(significant[0], Token) and significant[0].kind == 'string'
+
+    def group(self):
+        return next((child for child in self.children if isinstance(child, Group)), None)
+
+    def set_text(self, text):
+        self._reparse(text, _Parser.parse_expression)
+
+    def set_string(self, value, quote=None):
+        """Replaces the expression with a string literal, in the quotes it already
+        used when it was a string unless value contains them."""
+        if quote is None:
+            quote = self.text.strip()[0] if self.is_string() else "'"
+        if quote in value:
+            quote = '"' if quote == "'" else "'"
+        self.set_text(f"{quote}{value}{quote}")
+
+
+class Argument(Node):
+    kind = 'argument'
+
+    @property
+    def name(self):
+        first = self.children[0]
+        return first.text if isinstance(first, Token) else None
+
+    @property
+    def value(self):
+        return self.children[-1]
+
+
+class Arguments(Node):
+    kind = 'arguments'
+
+    def arguments(self):
+        return [child for child in self.children if isinstance(child, Argument)]
+
+    def get(self, name):
+        return next((argument for argument in self.arguments() if argument.name == name), None)
+
+    def named(self):
+        """Named arguments by name; the first wins if one is repeated."""
+        named = {}
+        for argument in self.arguments():
+            if argument.name is not None:
+                named.setdefault(argument.name, argument)
+        return named
+
+    def add(self, text):
+        """Appends an argument, such as "icon='x'", before the closing parenthesis."""
+        close = len(self.children) - 1 if self.children[-1].text == ')' else len(self.children)
+        before = self.children[close - 1]
+        separator = '' if isinstance(before, Token) and (before.text == '(' or before.kind == 'whitespace') else ' '
+        parser = _Parser(separator + text)
+        self.children[close:close] = parser.parse_arguments(open_token=False).children
+
+    def remove(self, argument):
+        index = self.children.index(argument)
+        del self.children[index]
+        before = self.children[index - 1] if index > 0 else None
+        if isinstance(before, Token) and before.kind == 'whitespace':
+            del self.children[index - 1]
+
+
+class Statement(Node):
+    kind = 'other'
+
+
+class Call(Statement):
+    """A name followed by an argument list and/or a block: modify(...),
+    menu(...) {...}, and sections such as theme {...}."""
+    kind = 'call'
+
+    @property
+    def name(self):
+        return self.children[0].text
+
+    @property
+    def arguments(self):
+        return next((child for child in self.children if isinstance(child, Arguments)), None)
+
+    @property
+    def block(self):
+        return next((child for child in self.children if isinstance(child, Block)), None)
+
+    def argument(self, name):
+        return self.arguments.get(name) if self.arguments else None
+
+    def get(self, name, default=None):
+        """The value of a named argument, unquoted."""
+        argument = self.argument(name)
+        return argument.value.value if argument else default
+
+    def set(self, name, value, quote="'"):
+        """Sets a named argument to a string, adding it if it is missing."""
+        argument = self.argument(name)
+        if argument:
+            argument.value.set_string(value)
+        elif self.arguments:
+            self.arguments.add(f"{name}={quote}{value}{quote}")
+
+    def remove_argument(self, name):
+        argument = self.argument(name)
+        if argument:
+            self.arguments.remove(argument)
+
+    def leading_comment(self):
+        """The text of the comment directly above this statement, without the
+        comment markers, or None."""
+        return self.parent.comment_before(self) if self.parent else None
+
+
+class Assignment(Statement):
+    kind = 'assignment'
+
+    @property
+    def key(self):
+        parts = []
+        for child in self.children:
+            if isinstance(child, Token) and child.is_punct('='):
+                break
+            parts.append(str(child))
+        return "".join(parts).strip()
+
+    @property
+    def value(self):
+        return next((child for child in self.children if isinstance(child, Expression)), None)
+
+
+class Import(Statement):
+    kind = 'import'
+
+    @property
+    def path(self):
+        string = next((child for child in self.children if isinstance(child, Token) and child.kind == 'string'), None)
+        return unquote(string.text) if string else None
+
+
+class _Container(Node):
+    def statements(self):
+        return [child for child in self.children if isinstance(child, Statement)]
+
+    def calls(self, name=None):
+        return [child for child in self.children if isinstance(child, Call) and (name is None or child.name == name)]
+
+    def find(self, name):
+        return next(iter(self.calls(name)), None)
+
+    def assignments(self):
+        return [child for child in self.children if isinstance(child, Assignment)]
+
+    def imports(self):
+        return [child for child in self.children if isinstance(child, Import)]
+
+    def walk(self):
+        """Every statement, including those nested in blocks, in document order."""
+        for child in self.statements():
+            yield child
+            block = child.block if isinstance(child, Call) else None
+            if block:
+                yield from block.walk()
+
+    def commented(self):
+        """(comment, statement) for every statement, where comment is the text of
+        the comment directly above it without the comment markers, or None."""
+        comment = None
+        for child in self.children:
+            if isinstance(child, Statement):
+                yield comment, child
+                comment = None
+            elif child.kind == 'comment':
+                text = child.text
+                comment = (text[2:] if text.startswith('//') else text[2:-2]).strip()
+            elif child.kind == 'unknown':
+                comment = None
+
+    def comment_before(self, node):
+        return next((comment for comment, statement in self.commented() if statement is node), None)
+
+    def remove(self, node):
+        """Removes a statement together with the line break in front of it, so
+        a statement on its own line leaves no empty line behind."""
+        index = self.children.index(node)
+        del self.children[index]
+        before = self.children[index - 1] if index > 0 else None
+        after = self.children[index] if index < len(self.children) else None
+        # Whitespace is replaced rather than trimmed in place, so a copy of the
+        # children list taken before the edit still holds the old text.
+        if isinstance(before, Token) and before.kind == 'whitespace' and '\n' in before.text:
+            self.children[index - 1] = Token('whitespace', before.text[:before.text.rindex('\n')])
+        elif isinstance(after, Token) and after.kind == 'whitespace' and '\n' in after.text:
+            self.children[index] = Token('whitespace', after.text[after.text.index('\n') + 1:])
+
+    def replace(self, node, new_node):
+        self.children[self.children.index(node)] = new_node
+        new_node.parent = self
+
+    def _insert(self, index, text):
+        parser = _Parser(text)
+        children = []
+        parser.parse_statements(children, self)
+        self.children[index:index] = children
+        return [child for child in children if isinstance(child, Statement)]
+
+    def insert_after(self, node, text):
+        """Parses text as statements and inserts them after node. Returns them."""
+        return self._insert(self.children.index(node) + 1, text)
+
+
+class Block(_Container):
+    kind = 'block'
+
+
+class Document(_Container):
+    kind = 'document'
+
+    def append(self, text):
+        """Parses text as statements and adds them on a new line at the end."""
+        last = self.children[-1] if self.children else None
+        if last is not None and not str(last).endswith('\n'):
+            text = '\n' + text
+        return self._insert(len(self.children), text)
+
+
+class _Parser:
+    def __init__(self, text):
+        self.tokens = tokenize(text)
+        self.pos = 0
+
+    def peek(self, index=None):
+        index = self.pos if index is None else index
+        return self.tokens[index] if index < len(self.tokens) else None
+
+    def next_significant(self, index):
+        while index < len(self.tokens) and self.tokens[index].kind in TRIVIA:
+            index += 1
+        return index
+
+    def take_trivia(self, children):
+        end = self.next_significant(self.pos)
+        children.extend(self.tokens[self.pos:end])
+        self.pos = end
+
+    def expect_end(self):
+        if self.pos != len(self.tokens):
+            raise ValueError(f"Unexpected {self.tokens[self.pos].text!r} in NSS fragment")
+
+    def parse_document(self):
+        document = Document()
+        self.parse_statements(document.children, document)
+        return document
+
+    def parse_statements(self, children, parent, closing=None):
+        while self.pos < len(self.tokens):
+            token = self.tokens[self.pos]
+            if token.kind in TRIVIA:
+                children.append(token)
+                self.pos += 1
+                continue
+            if closing and token.is_punct(closing):
+                return
+            statement = self.parse_statement(closing)
+            statement.parent = parent
+            children.append(statement)
+
+    def parse_statement(self, closing):
+        token = self.tokens[self.pos]
+        if token.kind == 'name':
+            following = self.peek(self.pos + 1)
+            if following is not None and following.is_punct('('):
+                return self.parse_call()
+            significant = self.peek(self.next_significant(self.pos + 1))
+            if significant is not None:
+                if significant.is_punct('{'):
+                    return self.parse_call()
+                if token.text == 'import' and significant.kind == 'string':
+                    return self.parse_import()
+            if self._at_assignment():
+                return self.parse_assignment()
+        return self.parse_other(closing)
+
+    def _at_assignment(self):
+        index = self.pos
+        expect_name = True
+        while index < len(self.tokens):
+            token = self.tokens[index]
+            if token.kind == 'whitespace':
+                if '\n' in token.text:
+                    return False
+            elif expect_name and token.kind in ('name', 'string'):
+                expect_name = False
+            elif not expect_name and token.is_punct('='):
+                return True
+            elif not expect_name and token.is_punct(','):
+                expect_name = True
+            else:
+                return False
+            index += 1
+        return False
+
+    def parse_call(self):
+        call = Call([self.tokens[self.pos]])
+        self.pos += 1
+        if self.peek() is not None and self.peek().is_punct('('):
+            call.children.append(self.parse_arguments())
+        significant = self.peek(self.next_significant(self.pos))
+        if significant is not None and significant.is_punct('{'):
+            self.take_trivia(call.children)
+            block = Block([significant])
+            block.parent = call
+            self.pos += 1
+            self.parse_statements(block.children, block, closing='}')
+            if self.pos < len(self.tokens):
+                block.children.append(self.tokens[self.pos])
+                self.pos += 1
+            call.children.append(block)
+        return call
+
+    def parse_import(self):
+        node = Import([self.tokens[self.pos]])
+        self.pos += 1
+        self.take_trivia(node.children)
+        node.children.append(self.tokens[self.pos])
+        self.pos += 1
+        return node
+
+    def parse_assignment(self):
+        node = Assignment()
+        while not self.tokens[self.pos].is_punct('='):
+            node.children.append(self.tokens[self.pos])
+            self.pos += 1
+        node.children.append(self.tokens[self.pos])
+        self.pos += 1
+        while self.pos < len(self.tokens) and self.tokens[self.pos].kind == 'whitespace' and '\n' not in self.tokens[self.pos].text:
+            node.children.append(self.tokens[self.pos])
+            self.pos += 1
+        node.children.append(self.parse_expression(stop_at_newline=True))
+        return node
+
+    def parse_other(self, closing):
+        node = Statement([self.tokens[self.pos]])
+        self.pos += 1
+        while self.pos < len(self.tokens):
+            token = self.tokens[self.pos]
+            if (token.kind == 'whitespace' and '\n' in token.text) or (closing and token.is_punct(closing)):
+                break
+            node.children.append(token)
+            self.pos += 1
+        return node
+
+    def parse_arguments(self, open_token=True):
+        node = Arguments()
+        if open_token:
+            node.children.append(self.tokens[self.pos])
+            self.pos += 1
+        while self.pos < len(self.tokens):
+            token = self.tokens[self.pos]
+            if token.kind in TRIVIA:
+                node.children.append(token)
+                self.pos += 1
+                continue
+            if token.is_punct(')'):
+                node.children.append(token)
+                self.pos += 1
+                break
+            if token.is_punct('{}'):
+                break
+            argument = Argument()
+            equals = self.peek(self.next_significant(self.pos + 1))
+            if token.kind == 'name' and equals is not None and equals.is_punct('='):
+                argument.children.append(token)
+                self.pos += 1
+                self.take_trivia(argument.children)
+                argument.children.append(self.tokens[self.pos])
+                self.pos += 1
+                self.take_trivia(argument.children)
+            value = self.parse_expression()
+            if not value.children and not argument.children:
+                node.children.append(token)
+                self.pos += 1
+                continue
+            argument.children.append(value)
+            node.children.append(argument)
+        return node
+
+    def parse_expression(self, stop_at_newline=False):
+        expression = Expression()
+        if not self._parse_term(expression):
+            return expression
+        while True:
+            index = self.next_significant(self.pos)
+            token = self.peek(index)
+            if token is None or not token.is_operator():
+                break
+            if stop_at_newline and any('\n' in trivia.text for trivia in self.tokens[self.pos:index]):
+                break
+            expression.children.extend(self.tokens[self.pos:index + 1])
+            self.pos = index + 1
+            self.take_trivia(expression.children)
+            if not self._parse_term(expression):
+                break
+        return expression
+
+    def _parse_term(self, expression):
+        token = self.peek()
+        if token is not None and (token.kind in ('operator', 'name')) and token.text in UNARY_OPERATORS:
+            expression.children.append(token)
+            self.pos += 1
+            self.take_trivia(expression.children)
+            token = self.peek()
+        if token is None:
+            return False
+        if token.kind in VALUES:
+            expression.children.append(token)
+            self.pos += 1
+        elif token.is_punct('(['):
+            expression.children.append(self.parse_group())
+        else:
+            return False
+        while self.peek() is not None and self.peek().is_punct('(['):
+            expression.children.append(self.parse_group())
+        return True
+
+    def parse_group(self):
+        # Id lists make groups the bulk of most files, so this loop stays lean.
+        tokens = self.tokens
+        open_token = tokens[self.pos]
+        close = ')' if open_token.text == '(' else ']'
+        group = Group([open_token])
+        children = group.children
+        index = self.pos + 1
+        while index < len(tokens):
+            token = tokens[index]
+            if token.kind == 'punct':
+                text = token.text
+                if text == close:
+                    children.append(token)
+                    index += 1
+                    break
+                if text in '([':
+                    self.pos = index
+                    children.append(self.parse_group())
+                    index = self.pos
+                    continue
+                if text in ')]{}':
+                    break
+            children.append(token)
+            index += 1
+        self.pos = index
+        return group
+
+
+@tracing.traced(name='parse nss', category='io')
+def parse(text):
+    """Parses NSS source into a Document; str(document) gives back text unchanged."""
+    return _Parser(text).parse_document()
@@ -0,0 +1,347 @@
+from collections import OrderedDict
+from PyQt5.QtWidgets import QListView, QStyledItemDelegate, QAbstractItemView, QFrame
+from PyQt5.QtGui import QColor, QPixmap, QFont, QFontMetrics, QPainter, QPen
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex, QRect, QSize, QPoint, pyqtSignal
+
+CARD_WIDTH = 180
+CARD_HEIGHT = 250
+CARD_SPACING = 10
+CARD_MARGIN = 11
+ICON_CONTAINER_SIZE = 80
+ICON_SIZE = 70
+MAX_CACHED_ICONS = 512
+
+STATE_AVAILABLE = 'available'
+STATE_INSTALLED = 'installed'
+STATE_OUTDATED = 'outdated'
+STATE_QUEUED = 'queued'
+STATE_INSTALLING = 'installing'
+
+# (action, label, background, text colour) per install state, mirroring the
+# installButton/updateButton/uninstallButton/textButton rules in style.css.
+STATE_BUTTONS = {
+    STATE_AVAILABLE: [('install', "Install", "#94e2d5", "#1e2030")],
+    STATE_INSTALLED: [('uninstall', "Uninstall", "#f38ba8", "#1e2030")],
+    STATE_OUTDATED: [('uninstall', "Uninstall", "#f38ba8", "#1e2030"), ('update', "Update", "#8aadf4", "#1e2030")],
+    STATE_QUEUED: [('cancel', "Queued", "#494d64", "#ffffff")],
+    STATE_INSTALLING: [('cancel', "Cancel", "#494d64", "#ffffff")],
+}
+BUTTON_HOVER_COLOR = "#8087a2"
+
+
+class PluginListModel(QAbstractListModel):
+    """Plugin catalog for the plugins page. Install state is computed on demand by
+    state_provider(plugin), which the launcher answers from its in-memory
+    InstalledStateIndex, and cached per row until refresh_state() is called, so
+    painting a card never touches the disk. Icons are kept for the
+    most recently loaded MAX_CACHED_ICONS plugins. set_filter() limits the rows to
+    a set of catalog positions; filtering resets the model rather than going
+    through a proxy, which keeps it cheap for large catalogs."""
+    PluginRole = Qt.UserRole + 1
+    StateRole = Qt.UserRole + 2
+    ProgressRole = Qt.UserRole + 3
+    IconRole = Qt.UserRole + 4
+
+    def __init__(self, state_provider, parent=None):
+        super().__init__(parent)
+        self.state_provider = state_provider
+        self.catalog = []
+        self.filter_rows = None
+        self.plugins = []
+        self.rows = {}
+        self.states = {}
+        self.progress = {}
+        self.icons = OrderedDict()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.plugins)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        plugin = self.plugins[index.row()]
+        plugin_name = plugin['name']
+        if role == Qt.DisplayRole:
+            return plugin_name
+        if role == Qt.ToolTipRole:
+            return plugin.get('description', 'No description available.')
+        if role == self.PluginRole:
+            return plugin
+        if role == self.StateRole:
+            if plugin_name not in self.states:
+                self.states[plugin_name] = self.state_provider(plugin)
+            return self.states[plugin_name]
+        if role == self.ProgressRole:
+            return self.progress.get(plugin_name, 0)
+        if role == self.IconRole:
+            return self.icons.get(plugin_name)
+        return None
+
+    def _apply_filter(self):
+        if self.filter_rows is None:
+            self.plugins = list(self.catalog)
+        else:
+            self.plugins = [self.catalog[row] for row in sorted(self.filter_rows)]
+        self.rows = {plugin['name']: row for row, plugin in enumerate(self.plugins)}
+
+    def set_plugins(self, plugins):
+        self.beginResetModel()
+        self.catalog = list(plugins)
+        self.filter_rows = None
+        self._apply_filter()
+        self.states.clear()
+        self.icons.clear()
+        self.endResetModel()
+
+    def set_filter(self, catalog_rows):
+        """Shows only the plugins at catalog_rows (positions in the list given to
+        set_plugins), or the whole catalog for None."""
+        self.beginResetModel()
+        self.filter_rows = catalog_rows
+        self._apply_filter()
+        self.endResetModel()
+
+    def update_plugins(self, plugins):
+        """Replaces changed rows in place. Returns False without touching the model
+        when plugins were added, removed or reordered."""
+        if [p['name'] for p in plugins] != [p['name'] for p in self.catalog]:
+            return False
+        for catalog_row, plugin in enumerate(plugins):
+            if self.catalog[catalog_row] == plugin:
+                continue
+            self.catalog[catalog_row] = plugin
+            self.states.pop(plugin['name'], None)
+            self.icons.pop(plugin['name'], None)
+            row = self.rows.get(plugin['name'])
+            if row is not None:
+                self.plugins[row] = plugin
+                model_index = self.index(row)
+                self.dataChanged.emit(model_index, model_index)
+        return True
+
+    def plugin_names(self):
+        return list(self.rows)
+
+    def index_for(self, plugin_name):
+        row = self.rows.get(plugin_name)
+        return self.index(row) if row is not None else QModelIndex()
+
+    def _row_changed(self, plugin_name, roles):
+        model_index = self.index_for(plugin_name)
+        if model_index.isValid():
+            self.dataChanged.emit(model_index, model_index, roles)
+
+    def refresh_state(self, plugin_name):
+        self.states.pop(plugin_name, None)
+        self._row_changed(plugin_name, [self.StateRole])
+
+    def set_progress(self, plugin_name, value):
+        self.progress[plugin_name] = value
+        self._row_changed(plugin_name, [self.ProgressRole])
+
+    def has_icon(self, plugin_name):
+        return plugin_name in self.icons
+
+    def set_icon(self, plugin_name, pixmap):
+        self.icons[plugin_name] = pixmap
+        self.icons.move_to_end(plugin_name)
+        while len(self.icons) > MAX_CACHED_ICONS:
+            self.icons.popitem(last=False)
+        self._row_changed(plugin_name, [self.IconRole])
+
+
+class PluginCardDelegate(QStyledItemDelegate):
+    """Paints a plugin card directly instead of instantiating widgets for it."""
+
+    def __init__(self, default_icon_path, parent=None):
+        super().__init__(parent)
+        self.default_icon = QPixmap(default_icon_path)
+        if not self.default_icon.isNull():
+            self.default_icon = self.default_icon.scaled(ICON_SIZE, ICON_SIZE, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        self.title_font = QFont('Montserrat', 14, QFont.Bold)
+        self.button_font = QFont()
+        self.button_font.setBold(True)
+        self.hovered = None
+
+    def sizeHint(self, option, index):
+        return QSize(CARD_WIDTH, CARD_HEIGHT)
+
+    def card_rect(self, item_rect):
+        return QRect(item_rect.x() + (item_rect.width() - CARD_WIDTH) // 2,
+                     item_rect.y() + (item_rect.height() - CARD_HEIGHT) // 2, CARD_WIDTH, CARD_HEIGHT)
+
+    def button_rects(self, item_rect, state):
+        card = self.card_rect(item_rect)
+        metrics = QFontMetrics(self.button_font)
+        height = metrics.height() + 20
+        buttons = STATE_BUTTONS.get(state, [])
+        widths = [metrics.horizontalAdvance(label) + 24 for _, label, _, _ in buttons]
+        x = card.center().x() - (sum(widths) + 10 * (len(widths) - 1)) // 2
+        y = card.bottom() - CARD_MARGIN - height
+        rects = []
+        for (action, label, background, color), width in zip(buttons, widths):
+            rects.append((action, QRect(x, y, width, height), label, background, color))
+            x += width + 10
+        return rects
+
+    def action_at(self, item_rect, state, pos):
+        for action, rect, _, _, _ in self.button_rects(item_rect, state):
+            if rect.contains(pos):
+                return action
+        return None
+
+    def paint(self, painter, option, index):
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setRenderHint(QPainter.SmoothPixmapTransform)
+
+        card = self.card_rect(option.rect)
+        plugin = index.data(PluginListModel.PluginRole)
+        state = index.data(PluginListModel.StateRole)
+
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(QColor(0, 0, 0, 70))
+        painter.drawRoundedRect(card.translated(4, 4), 15, 15)
+        painter.setBrush(QColor("#282a3e"))
+        painter.setPen(QPen(QColor(255, 255, 255, 51), 1))
+        painter.drawRoundedRect(card.adjusted(0, 0, -1, -1), 15, 15)
+
+        content = card.adjusted(CARD_MARGIN, CARD_MARGIN, -CARD_MARGIN, -CARD_MARGIN)
+        painter.setFont(self.title_font)
+        painter.setPen(QColor("#ffffff"))
+        title_height = QFontMetrics(self.title_font).height()
+        title = QFontMetrics(self.title_font).elidedText(plugin['name'], Qt.ElideRight, content.width())
+        painter.drawText(QRect(content.x(), content.y(), content.width(), title_height), Qt.AlignCenter, title)
+
+        container = QRect(card.center().x() - ICON_CONTAINER_SIZE // 2, content.y() + title_height + 10,
+                          ICON_CONTAINER_SIZE, ICON_CONTAINER_SIZE)
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(QColor("#494d64"))
+        painter.drawEllipse(container)
+        icon = index.data(PluginListModel.IconRole)
+        if icon is None or icon.isNull():
+            icon = self.default_icon
+        if not icon.isNull():
+            icon_rect = QRect(0, 0, ICON_SIZE, ICON_SIZE)
+            icon_rect.moveCenter(container.center())
+            painter.drawPixmap(icon_rect, icon)
+
+        buttons = self.button_rects(option.rect, state)
+        bottom = buttons[0][1].top() - 10 if buttons else content.bottom()
+        if state == STATE_INSTALLING:
+            bar = QRect(content.x() + 10, bottom - 20, content.width() - 20, 20)
+            bottom = bar.top() - 6
+            painter.setPen(QPen(QColor("#5b6078"), 1))
+            painter.setBrush(QColor("#494d64"))
+            painter.drawRoundedRect(bar, 5, 5)
+            value = max(0, min(100, index.data(PluginListModel.ProgressRole) or 0))
+            if value:
+                painter.setPen(Qt.NoPen)
+                painter.setBrush(QColor("#94e2d5"))
+                painter.drawRoundedRect(QRect(bar.x(), bar.y(), bar.width() * value // 100, bar.height()), 5, 5)
+            painter.setPen(QColor("#ffffff"))
+            painter.setFont(option.font)
+            painter.drawText(bar, Qt.AlignCenter, f"{value}%")
+
+        # Clip to whole lines so wrapped descriptions never show half a line.
+        line_height = QFontMetrics(option.font).lineSpacing()
+        description_height = max(0, bottom - container.bottom() - 10) // line_height * line_height
+        description_rect = QRect(content.x(), container.bottom() + 10, content.width(), description_height)
+        painter.setPen(QColor("#ffffff"))
+        painter.setFont(option.font)
+        painter.setClipRect(description_rect)
+        painter.drawText(description_rect, Qt.AlignHCenter | Qt.AlignTop | Qt.TextWordWrap,
+                         plugin.get('description', 'No description available.'))
+        painter.setClipping(False)
+
+        painter.setFont(self.button_font)
+        for action, rect, label, background, color in buttons:
+            is_hovered = self.hovered == (index.row(), action)
+            painter.setPen(Qt.NoPen)
+            painter.setBrush(QColor(BUTTON_HOVER_COLOR if is_hovered else background))
+            painter.drawRoundedRect(rect, 10, 10)
+            painter.setPen(QColor(color))
+            painter.drawText(rect, Qt.AlignCenter, label)
+
+        painter.restore()
+
+
+class PluginGridView(QListView):
+    """Wrapping list view over PluginListModel. Only the rows inside the viewport
+    are laid out and painted; clicks on a card's buttons emit action_triggered and
+    clicks anywhere else on the card emit card_clicked with its viewport rect."""
+    card_clicked = pyqtSignal(str, QRect)
+    action_triggered = pyqtSignal(str, str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setObjectName("pluginGrid")
+        self.setViewMode(QListView.ListMode)
+        self.setFlow(QListView.LeftToRight)
+        self.setWrapping(True)
+        self.setResizeMode(QListView.Adjust)
+        self.setMovement(QListView.Static)
+        self.setUniformItemSizes(True)
+        self.setLayoutMode(QListView.Batched)
+        self.setBatchSize(256)
+        self.setGridSize(QSize(CARD_WIDTH + CARD_SPACING, CARD_HEIGHT + CARD_SPACING))
+        self.setSelectionMode(QAbstractItemView.NoSelection)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.verticalScrollBar().setSingleStep(30)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.setFocusPolicy(Qt.NoFocus)
+        self.setFrameShape(QFrame.NoFrame)
+        self.setMouseTracking(True)
+
+    def _hit(self, pos):
+        index = self.indexAt(pos)
+        if not index.isValid():
+            return index, None, False
+        item_rect = self.visualRect(index)
+        if not self.itemDelegate().card_rect(item_rect).contains(pos):
+            return QModelIndex(), None, False
+        action = self.itemDelegate().action_at(item_rect, index.data(PluginListModel.StateRole), pos)
+        return index, action, True
+
+    def _set_hovered(self, hovered):
+        delegate = self.itemDelegate()
+        if delegate.hovered == hovered:
+            return
+        for row in {h[0] for h in (delegate.hovered, hovered) if h}:
+            self.update(self.model().index(row, 0))
+        delegate.hovered = hovered
+
+    def mouseMoveEvent(self, event):
+        index, action, _ = self._hit(event.pos())
+        self._set_hovered((index.row(), action) if action else None)
+        super().mouseMoveEvent(event)
+
+    def leaveEvent(self, event):
+        self._set_hovered(None)
+        super().leaveEvent(event)
+
+    def mousePressEvent(self, event):
+        index, action, on_card = self._hit(event.pos())
+        if event.button() != Qt.LeftButton or not on_card:
+            super().mousePressEvent(event)
+            return
+        plugin_name = index.data(Qt.DisplayRole)
+        if action:
+            self.action_triggered.emit(plugin_name, action)
+        else:
+            self.card_clicked.emit(plugin_name, self.itemDelegate().card_rect(self.visualRect(index)))
+
+    def visible_plugin_names(self):
+        """Names of the cards intersecting the viewport, in row order."""
+        grid = self.gridSize()
+        viewport = self.viewport().rect()
+        rows = set()
+        for y in range(viewport.top(), viewport.bottom() + grid.height(), grid.height() // 2):
+            for x in range(viewport.left(), viewport.right() + 1, grid.width() // 2):
+                index = self.indexAt(QPoint(x, min(y, viewport.bottom())))
+                if index.isValid():
+                    rows.add(index.row())
+        if not rows:
+            return []
+        model = self.model()
+        return [model.index(row, 0).data(Qt.DisplayRole) for row in range(min(rows), max(rows) + 1)]
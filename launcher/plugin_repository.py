@@ -0,0 +1,132 @@
+import os
+from pathlib import Path
+from urllib.parse import quote
+
+from downloader import REQUEST_TIMEOUT
+
+DEFAULT_GITHUB_REPO = "iMAboud/iMA-Menu-Plugins"
+DEFAULT_BRANCH = "main"
+
+# Files a mirror keeps next to the copied repository (see mirror_sync.py).
+MIRROR_TREE_FILE = 'tree.json'
+MIRROR_RELEASE_FILE = 'release.json'
+MIRROR_FILES_DIR = 'files'
+MIRROR_ICONS_DIR = 'icons'
+MIRROR_RELEASES_DIR = 'releases'
+MIRROR_IMAGES_DIR = 'images'
+MIRROR_IMAGES_FILE = 'images.json'
+
+
+class GitHubRepository:
+    """The plugin repository on GitHub: catalog and files from raw.githubusercontent.com,
+    the file tree, tarball and releases from the REST API."""
+    sends_token = True
+
+    def __init__(self, repo=DEFAULT_GITHUB_REPO, branch=DEFAULT_BRANCH):
+        self.repo = repo
+        self.branch = branch
+        self.raw_base_url = f"https://raw.githubusercontent.com/{repo}/{branch}"
+        self.api_base_url = f"https://api.github.com/repos/{repo}"
+        self.catalog_url = f"{self.raw_base_url}/plugins.json"
+        self.release_url = f"{self.api_base_url}/releases/latest"
+        self.tarball_url = f"{self.api_base_url}/tarball/{branch}"
+
+    def __str__(self):
+        return f"github:{self.repo}"
+
+    def file_url(self, path):
+        return f"{self.raw_base_url}/{quote(path)}"
+
+    def details_url(self, plugin_name):
+        return self.file_url(f"{plugin_name}/details.md")
+
+    def icon_url(self, plugin):
+        return plugin.get('icon_url')
+
+    def image_urls(self, session):
+        """{original URL: URL to fetch it from} for images embedded in details pages."""
+        return {}
+
+    def list_files(self, session):
+        """Every blob in the repository as {'path', 'sha'} dicts."""
+        branch_res = session.get(f"{self.api_base_url}/branches/{self.branch}", timeout=REQUEST_TIMEOUT)
+        branch_res.raise_for_status()
+        root_tree_sha = branch_res.json()['commit']['commit']['tree']['sha']
+
+        tree_res = session.get(f"{self.api_base_url}/git/trees/{root_tree_sha}?recursive=true", timeout=REQUEST_TIMEOUT)
+        tree_res.raise_for_status()
+        tree_data = tree_res.json()
+        if 'tree' not in tree_data:
+            raise Exception("Malformed response from Git Trees API")
+        return [{'path': item['path'], 'sha': item['sha']} for item in tree_data['tree'] if item.get('type') == 'blob']
+
+    def list_plugin_files(self, session, plugin_name):
+        """Files of one plugin as {'url', 'path', 'sha'} dicts, paths relative to the plugin."""
+        prefix = f"{plugin_name}/"
+        return [{'url': self.file_url(item['path']), 'path': item['path'][len(prefix):], 'sha': item['sha']}
+                for item in self.list_files(session) if item['path'].startswith(prefix)]
+
+
+class MirrorRepository(GitHubRepository):
+    """A copy of the repository written by mirror_sync.py, served over HTTP or read
+    from a directory. Layout under base_url:
+
+        plugins.json            the catalog
+        tree.json               {"files": [{"path", "sha"}, ...]} for files/
+        release.json            GitHub release metadata with relative asset URLs
+        files/<repo path>       repository files
+        icons/<plugin>.png      catalog icons
+        images.json             {"<original URL>": "images/<file>"} for details.md images
+        images/<file>           images embedded in details.md
+        releases/<asset>        release assets
+
+    There is no tarball, so archive installs use the release zip or fall back to
+    per-file downloads."""
+    sends_token = False
+    tarball_url = None
+
+    def __init__(self, base_url):
+        self.base_url = base_url if base_url.endswith('/') else base_url + '/'
+        self.catalog_url = self.base_url + 'plugins.json'
+        self.release_url = self.base_url + MIRROR_RELEASE_FILE
+        self._image_urls = None
+
+    def __str__(self):
+        return self.base_url
+
+    def file_url(self, path):
+        return f"{self.base_url}{MIRROR_FILES_DIR}/{quote(path)}"
+
+    def icon_url(self, plugin):
+        if not plugin.get('icon_url'):
+            return None
+        return f"{self.base_url}{MIRROR_ICONS_DIR}/{quote(plugin['name'])}.png"
+
+    def image_urls(self, session):
+        # Fetched once; mirrors written before images were synced have no images.json.
+        if self._image_urls is None:
+            response = session.get(self.base_url + MIRROR_IMAGES_FILE, timeout=REQUEST_TIMEOUT)
+            if response.status_code == 404:
+                self._image_urls = {}
+            else:
+                response.raise_for_status()
+                self._image_urls = {url: self.base_url + quote(path) for url, path in response.json().items()}
+        return self._image_urls
+
+    def list_files(self, session):
+        response = session.get(self.base_url + MIRROR_TREE_FILE, timeout=REQUEST_TIMEOUT)
+        response.raise_for_status()
+        return response.json()['files']
+
+
+def create_repository(source=None):
+    """Repository for a source string: empty for the default GitHub repository,
+    "github:<owner>/<repo>" for another one, an http(s) URL for a mirror, or a
+    local directory holding a mirror."""
+    if not source:
+        return GitHubRepository()
+    if source.startswith('github:'):
+        return GitHubRepository(source[len('github:'):])
+    if source.startswith(('http://', 'https://', 'file://')):
+        return MirrorRepository(source)
+    return MirrorRepository(Path(os.path.abspath(source)).as_uri())
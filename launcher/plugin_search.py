@@ -0,0 +1,84 @@
+import re
+from bisect import bisect_left
+from PyQt5.QtCore import QObject, pyqtSignal
+
+import tracing
+
+WORD_PATTERN = re.compile(r"\w+")
+
+
+def _searchable_text(plugin):
+    tags = plugin.get('tags') or []
+    if isinstance(tags, str):
+        tags = [tags]
+    return " ".join([plugin.get('name', ''), plugin.get('description', ''), *tags]).lower()
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class PluginSearchIndex:
+    """Trigram index over plugin name, description and tags. Terms of three or more
+    characters are looked up through their trigrams and the candidates confirmed
+    with a substring check; shorter terms match word prefixes through a sorted word
+    list. All terms of a query must match. Results are sets of catalog positions."""
+
+    def __init__(self, plugins):
+        self.texts = [_searchable_text(plugin) for plugin in plugins]
+        self.trigrams = {}
+        word_rows = {}
+        for row, text in enumerate(self.texts):
+            for trigram in _trigrams(text):
+                postings = self.trigrams.get(trigram)
+                if postings is None:
+                    self.trigrams[trigram] = postings = set()
+                postings.add(row)
+            for word in WORD_PATTERN.findall(text):
+                rows = word_rows.get(word)
+                if rows is None:
+                    word_rows[word] = rows = set()
+                rows.add(row)
+        self.words = sorted(word_rows)
+        self.word_rows = [word_rows[word] for word in self.words]
+
+    def _match_prefix(self, prefix):
+        rows = set()
+        i = bisect_left(self.words, prefix)
+        while i < len(self.words) and self.words[i].startswith(prefix):
+            rows |= self.word_rows[i]
+            i += 1
+        return rows
+
+    def _match_substring(self, term):
+        postings = sorted((self.trigrams.get(trigram, set()) for trigram in _trigrams(term)), key=len)
+        if not postings or not postings[0]:
+            return set()
+        candidates = postings[0].intersection(*postings[1:])
+        return {row for row in candidates if term in self.texts[row]}
+
+    def search(self, query):
+        """Rows matching every term in query, or None for an empty query."""
+        terms = query.lower().split()
+        if not terms:
+            return None
+        result = None
+        for term in sorted(terms, key=len, reverse=True):
+            rows = self._match_substring(term) if len(term) >= 3 else self._match_prefix(term)
+            result = rows if result is None else result & rows
+            if not result:
+                break
+        return result
+
+
+class SearchIndexWorker(QObject):
+    finished = pyqtSignal(int, object)
+
+    def __init__(self, generation, plugins):
+        super().__init__()
+        self.generation = generation
+        self.plugins = plugins
+
+    @tracing.traced(category='worker')
+    def run(self):
+        self.finished.emit(self.generation, PluginSearchIndex(self.plugins))
@@ -0,0 +1,137 @@
+import os
+from PyQt5.QtCore import QObject, QThread, QTimer, QFileSystemWatcher, pyqtSignal
+
+import tracing
+
+NOT_INSTALLED = None
+PARTIALLY_INSTALLED = ''
+
+
+def read_install_state(install_path):
+    """Installed version from the plugin's version file, PARTIALLY_INSTALLED when the
+    directory exists without one, NOT_INSTALLED when there is no directory."""
+    version_file = os.path.join(install_path, 'version')
+    try:
+        with open(version_file, 'r') as f:
+            return f.read().strip() or PARTIALLY_INSTALLED
+    except OSError:
+        return PARTIALLY_INSTALLED if os.path.isdir(install_path) else NOT_INSTALLED
+
+
+class InstallStateScanWorker(QObject):
+    finished = pyqtSignal(dict, int)
+
+    def __init__(self, install_paths, generation):
+        super().__init__()
+        self.install_paths = install_paths
+        self.generation = generation
+
+    @tracing.traced(category='worker')
+    def run(self):
+        self.finished.emit({name: read_install_state(path) for name, path in self.install_paths.items()}, self.generation)
+
+
+class InstalledStateIndex(QObject):
+    """Installed version per plugin, kept in memory so card rendering never touches
+    the disk. The index is filled by a background scan, updated directly when the
+    launcher installs or removes a plugin, and rescanned for the affected plugins
+    when a QFileSystemWatcher reports a change in an install directory or its parent.
+    Scans are numbered, and a scan's result for a plugin is dropped if set_state()
+    updated that plugin after the scan started. changed carries the names whose
+    state differs from what was recorded."""
+    changed = pyqtSignal(list)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.install_paths = {}
+        self.states = {}
+        self.scan_threads = []
+        self.scan_generation = 0
+        self.set_generations = {}
+        self.pending_paths = set()
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self.on_directory_changed)
+        self.rescan_timer = QTimer(self)
+        self.rescan_timer.setSingleShot(True)
+        self.rescan_timer.setInterval(200)
+        self.rescan_timer.timeout.connect(self.rescan_pending)
+
+    def set_plugins(self, install_paths):
+        """install_paths maps plugin name to its install directory."""
+        self.install_paths = {name: os.path.abspath(path) for name, path in install_paths.items()}
+        self.states = {name: state for name, state in self.states.items() if name in self.install_paths}
+        watched = set(self.watcher.directories())
+        parents = {os.path.dirname(path) for path in self.install_paths.values()}
+        stale = watched - parents - set(self.install_paths.values())
+        if stale:
+            self.watcher.removePaths(list(stale))
+        new_parents = [directory for directory in parents - watched if os.path.isdir(directory)]
+        if new_parents:
+            self.watcher.addPaths(new_parents)
+        self.scan(list(self.install_paths))
+
+    def scan(self, names):
+        self.scan_generation += 1
+        thread = QThread(self)
+        worker = InstallStateScanWorker({name: self.install_paths[name] for name in names if name in self.install_paths},
+                                        self.scan_generation)
+        worker.moveToThread(thread)
+        thread.started.connect(worker.run)
+        worker.finished.connect(self.on_scan_finished)
+        worker.finished.connect(thread.quit)
+        worker.finished.connect(worker.deleteLater)
+        thread.finished.connect(lambda: self.scan_threads.remove((thread, worker)))
+        self.scan_threads.append((thread, worker))
+        thread.start()
+
+    def on_scan_finished(self, states, generation):
+        states = {name: state for name, state in states.items() if self.set_generations.get(name, 0) < generation}
+        changed = [name for name, state in states.items()
+                   if name in self.install_paths and self.states.get(name, NOT_INSTALLED) != state]
+        self.states.update({name: state for name, state in states.items() if name in self.install_paths})
+        self.watch_installed([name for name, state in states.items() if state is not NOT_INSTALLED])
+        if changed:
+            self.changed.emit(changed)
+
+    def on_directory_changed(self, path):
+        self.pending_paths.add(os.path.abspath(path))
+        self.rescan_timer.start()
+
+    def rescan_pending(self):
+        paths, self.pending_paths = self.pending_paths, set()
+        names = [name for name, install_path in self.install_paths.items()
+                 if install_path in paths or os.path.dirname(install_path) in paths]
+        if names:
+            self.scan(names)
+
+    def version(self, plugin_name):
+        """Installed version, PARTIALLY_INSTALLED or NOT_INSTALLED. Plugins the scan
+        has not reached yet are read synchronously once."""
+        if plugin_name not in self.states and plugin_name in self.install_paths:
+            self.states[plugin_name] = read_install_state(self.install_paths[plugin_name])
+        return self.states.get(plugin_name, NOT_INSTALLED)
+
+    def watch_installed(self, names):
+        watched = set(self.watcher.directories())
+        paths = {self.install_paths[name] for name in names if name in self.install_paths}
+        paths = [path for path in paths - watched if os.path.isdir(path)]
+        if paths:
+            self.watcher.addPaths(paths)
+
+    def set_state(self, plugin_name, state):
+        # Newer than anything the scans started so far have read.
+        self.set_generations[plugin_name] = self.scan_generation
+        if state is not NOT_INSTALLED:
+            self.watch_installed([plugin_name])
+        if self.states.get(plugin_name, NOT_INSTALLED) != state:
+            self.states[plugin_name] = state
+            self.changed.emit([plugin_name])
+
+    def refresh(self, plugin_name):
+        if plugin_name in self.install_paths:
+            self.set_state(plugin_name, read_install_state(self.install_paths[plugin_name]))
+
+    def shutdown(self):
+        for thread, worker in list(self.scan_threads):
+            thread.quit()
+            thread.wait(2000)
@@ -7,6 +7,7 @@ from PyQt5.QtWidgets import (QApplication, QWidget, QLabel, QListWidget, QPushBu
                              QScrollArea)
 from PyQt5.QtGui import QPalette, QColor, QDrag, QPixmap, QPainter, QFont, QFontMetrics
 from PyQt5.QtCore import Qt, QMimeData, QPoint, pyqtSignal, QTimer
+import nss_parser
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 SCRIPT_DIR = os.path.dirname(BASE_DIR)
@@ -211,27 +212,29 @@ class ShellEditor(QWidget):
     def load_data(self):
         try:
             with open(self.file_path, 'r') as file:
-                lines = file.readlines()
-                for i, line in enumerate(lines):
-                    if "remove(find=" in line:
-                        self.remove_start = i
-                        self.remove_start_line = lines[i-1] if i > 0 else ''
-                        self.remove_end_line = lines[i+1] if i < len(lines) - 1 else ''
-                        remove_line = line.strip()
-                        items_str = remove_line[remove_line.find("remove(find=\"") + len("remove(find=\"") :remove_line.rfind("\")")]
-                        self.remove_items = items_str.split('|') if items_str else []
-                        for item in self.remove_items:
-                            self.remove_list.addItem(item)
+                content = file.read()
+            lines = content.splitlines(True)
+            document = nss_parser.parse(content)
+            remove = next((statement for statement in document.walk()
+                           if isinstance(statement, nss_parser.Call) and statement.name == 'remove'), None)
+            if remove:
+                i = content.count('\n', 0, remove.offset)
+                self.remove_start = i
+                self.remove_start_line = lines[i-1] if i > 0 else ''
+                self.remove_end_line = lines[i+1] if i < len(lines) - 1 else ''
+                items_str = remove.get('find', '')
+                self.remove_items = items_str.split('|') if items_str else []
+                for item in self.remove_items:
+                    self.remove_list.addItem(item)
 
-                    if "import" in line and self.import_start == -1:
-                       self.import_start = i
-                if self.import_start != -1:
-                    for line in lines[self.import_start:]:
-                        line = line.strip()
-                        if line.startswith("import 'imports/"):
-                          file_name = line[line.rfind("/")+1:line.rfind("'")]
-                          self.import_items.append(file_name)
-                          self.import_list.addItem(file_name)
+            imports = document.imports()
+            if imports:
+                self.import_start = content.count('\n', 0, imports[0].offset)
+            for statement in imports:
+                if statement.path.startswith('imports/'):
+                    file_name = statement.path[statement.path.rfind("/")+1:]
+                    self.import_items.append(file_name)
+                    self.import_list.addItem(file_name)
         except FileNotFoundError:
             QMessageBox.critical(self, "Error", f"File not found: {self.file_path}")
             self.close()
@@ -0,0 +1,295 @@
+import json
+from bisect import bisect_left
+
+from PyQt5.QtCore import QAbstractListModel, QAbstractProxyModel, QModelIndex, Qt
+
+import nss_parser
+import tracing
+from utils import resource_path
+
+SHELL_IDS_FILE = 'shell_ids.json'
+# Sorts after any character a word can contain, so bisecting for prefix + this
+# finds the end of the run of words starting with prefix.
+_PREFIX_END = chr(0x10FFFF)
+
+
+def format_id(id_string):
+    """id.open_with -> Open With"""
+    if id_string.startswith("id."):
+        id_string = id_string[3:]
+    return " ".join(word.capitalize() for word in id_string.replace("_", " ").split("."))
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+@tracing.traced(category='io')
+def load_shell_ids(path=None):
+    """The known shell IDs from shell_ids.json, or [] if it cannot be read."""
+    path = path or resource_path(SHELL_IDS_FILE)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return [id_ for id_ in json.load(f) if isinstance(id_, str)]
+    except (OSError, ValueError) as e:
+        print(f"Error loading shell IDs from {path}: {e}")
+        return []
+
+
+@tracing.traced(category='io')
+def load_nss_ids(paths):
+    """The shell IDs named in the .nss files at paths, as in this.id(id.copy, id.cut)
+    or this.id == id.copy. Files that cannot be read are skipped."""
+    ids = set()
+    for path in paths:
+        try:
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                document = nss_parser.parse(f.read())
+        except OSError as e:
+            print(f"Error reading shell IDs from {path}: {e}")
+            continue
+        ids.update(token.text for token in document.tokens() if token.kind == 'name' and token.text.startswith('id.'))
+    return ids
+
+
+class ShellIdRegistry:
+    """Every known shell ID and the menu section (hide, more or shift) each one is
+    in. search() matches the formatted name as a substring, and for queries of
+    several words also by word prefixes in any order. As in plugin_search,
+    substrings of three or more characters are looked up through a trigram index
+    and the candidates confirmed with a substring check, while shorter queries
+    match word prefixes in a sorted word list with a parallel list of IDs. A
+    lookup only checks the IDs listed under its trigrams or word prefixes."""
+
+    def __init__(self, ids=()):
+        self.ids = []
+        self.sections = {}
+        self._known = set()
+        self._words = []
+        self._word_ids = []
+        self._names = {}
+        self._trigram_ids = {}
+        self.add(ids)
+
+    def add(self, ids):
+        new_ids = sorted({id_ for id_ in ids if id_ not in self._known})
+        if not new_ids:
+            return
+        self._known.update(new_ids)
+        self.ids = sorted(self._known)
+        entries = list(zip(self._words, self._word_ids))
+        trigram_ids = self._trigram_ids
+        for id_ in new_ids:
+            name = format_id(id_).lower()
+            self._names[id_] = name
+            entries.extend((word, id_) for word in name.split())
+            # Lists rather than sets: each ID is added once per trigram and only
+            # the shortest list is walked.
+            for trigram in _trigrams(name):
+                trigram_ids.setdefault(trigram, []).append(id_)
+        entries.sort()
+        self._words = [word for word, id_ in entries]
+        self._word_ids = [id_ for word, id_ in entries]
+
+    def __contains__(self, id_):
+        return id_ in self._known
+
+    def __len__(self):
+        return len(self.ids)
+
+    def assign(self, id_, label):
+        """Puts id_ in section label, or back among the available IDs for None."""
+        if label is None:
+            self.sections.pop(id_, None)
+        else:
+            if id_ not in self._known:
+                self.add((id_,))
+            self.sections[id_] = label
+
+    def assign_sections(self, ids_by_label):
+        """Replaces all section assignments; IDs not seen before are added."""
+        self.add(id_ for ids in ids_by_label.values() for id_ in ids)
+        self.sections = {id_: label for label, ids in ids_by_label.items() for id_ in ids}
+
+    def section(self, id_):
+        return self.sections.get(id_)
+
+    def available(self):
+        return [id_ for id_ in self.ids if id_ not in self.sections]
+
+    def _prefix_bounds(self, prefix):
+        """The slice of _words and _word_ids holding the words that start with prefix."""
+        start = bisect_left(self._words, prefix)
+        return start, bisect_left(self._words, prefix + _PREFIX_END, start)
+
+    def _match_prefixes(self, terms):
+        # Starts from the term with the fewest matching words and intersects the
+        # other terms' slices of _word_ids into it.
+        bounds = sorted((self._prefix_bounds(term) for term in terms), key=lambda span: span[1] - span[0])
+        start, end = bounds[0]
+        result = set(self._word_ids[start:end])
+        for start, end in bounds[1:]:
+            if not result:
+                break
+            result.intersection_update(self._word_ids[start:end])
+        return result
+
+    def _match_substring(self, text):
+        # Every ID containing text is listed under each of its trigrams, so the
+        # shortest of those lists holds all matches and only it is checked.
+        candidates = min((self._trigram_ids.get(trigram, ()) for trigram in _trigrams(text)), key=len)
+        names = self._names
+        return {id_ for id_ in candidates if text in names[id_]}
+
+    def search(self, query):
+        """IDs whose name contains query, ignoring case, together with those that
+        have a word starting with each term of query in any order, so "with open"
+        finds Open With. Queries under three characters only match word prefixes.
+        None for an empty query."""
+        text = query.lower()
+        terms = text.replace("_", " ").replace(".", " ").split()
+        if not terms:
+            return None
+        if len(text) < 3:
+            return self._match_prefixes(terms)
+        substring = self._match_substring(text)
+        # A word prefix is also a substring, so one plain word needs no prefix lookup.
+        if terms == [text]:
+            return substring
+        return substring | self._match_prefixes(terms)
+
+
+class ShellIdModel(QAbstractListModel):
+    """A sorted list of shell IDs shown by their formatted names. Qt.UserRole is the raw ID."""
+
+    def __init__(self, ids=(), parent=None):
+        super().__init__(parent)
+        self.ids = sorted(ids)
+        self.names = [format_id(id_) for id_ in self.ids]
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.ids)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.DisplayRole:
+            return self.names[index.row()]
+        if role == Qt.UserRole:
+            return self.ids[index.row()]
+        return None
+
+    def flags(self, index):
+        flags = super().flags(index)
+        return flags | Qt.ItemIsDragEnabled if index.isValid() else flags | Qt.ItemIsDropEnabled
+
+    def set_ids(self, ids):
+        self.beginResetModel()
+        self.ids = sorted(ids)
+        self.names = [format_id(id_) for id_ in self.ids]
+        self.endResetModel()
+
+    def add_id(self, id_):
+        row = bisect_left(self.ids, id_)
+        if row < len(self.ids) and self.ids[row] == id_:
+            return
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.ids.insert(row, id_)
+        self.names.insert(row, format_id(id_))
+        self.endInsertRows()
+
+    def take_row(self, row):
+        self.beginRemoveRows(QModelIndex(), row, row)
+        id_ = self.ids.pop(row)
+        del self.names[row]
+        self.endRemoveRows()
+        return id_
+
+
+class ShellIdFilterProxy(QAbstractProxyModel):
+    """Shows the rows of a ShellIdModel whose ID is in the set given to
+    set_matches(); None shows them all. The visible source rows are kept as one
+    sorted list, found by bisecting the sorted source IDs for each match when
+    there are few, and filtering ends in one model reset, rather than a Python
+    filterAcceptsRow() call and a rowsRemoved signal per hidden row as with
+    QSortFilterProxyModel."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.matches = None
+        self.rows = None
+        self.count = 0
+
+    def setSourceModel(self, model):
+        self.beginResetModel()
+        super().setSourceModel(model)
+        for signal in (model.modelReset, model.rowsInserted, model.rowsRemoved):
+            signal.connect(self._refilter)
+        self._update_rows()
+        self.endResetModel()
+
+    def set_matches(self, matches):
+        self.matches = matches
+        self._refilter()
+
+    def _update_rows(self):
+        ids = self.sourceModel().ids
+        if self.matches is None:
+            self.rows = None
+            self.count = len(ids)
+            return
+        # The source IDs are sorted, so a few matches are found by bisecting rather
+        # than by going through every ID. Once the matches are a large share of
+        # the IDs, one pass over them is cheaper than a bisect per match.
+        if len(self.matches) * 8 < len(ids):
+            rows = []
+            for id_ in self.matches:
+                row = bisect_left(ids, id_)
+                if row < len(ids) and ids[row] == id_:
+                    rows.append(row)
+            rows.sort()
+        else:
+            rows = [row for row, id_ in enumerate(ids) if id_ in self.matches]
+        self.rows = rows
+        self.count = len(rows)
+
+    def _refilter(self, *args):
+        self.beginResetModel()
+        self._update_rows()
+        self.endResetModel()
+
+    # The view calls index() and rowCount() for every row when it lays itself out,
+    # so they only read the cached count.
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.count
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else 1
+
+    def index(self, row, column, parent=QModelIndex()):
+        if parent.isValid() or column != 0 or not 0 <= row < self.count:
+            return QModelIndex()
+        return self.createIndex(row, column)
+
+    def parent(self, index=None):
+        # Also called as QObject.parent() with no index.
+        if index is None:
+            return super().parent()
+        return QModelIndex()
+
+    def mapToSource(self, proxy_index):
+        if not proxy_index.isValid():
+            return QModelIndex()
+        row = proxy_index.row()
+        return self.sourceModel().index(row if self.rows is None else self.rows[row], 0)
+
+    def mapFromSource(self, source_index):
+        if not source_index.isValid():
+            return QModelIndex()
+        row = source_index.row()
+        if self.rows is not None:
+            i = bisect_left(self.rows, row)
+            if i == len(self.rows) or self.rows[i] != row:
+                return QModelIndex()
+            row = i
+        return self.index(row, 0)
@@ -7,10 +7,17 @@ from PyQt5.QtWidgets import (
     QFrame, QButtonGroup, QRadioButton, QTabWidget, QScrollArea, QGraphicsDropShadowEffect, QStackedWidget, QDialog,
     QSpinBox, QAbstractSpinBox
 )
-from PyQt5.QtGui import QIcon, QColor, QFont, QPainter, QBrush
+from PyQt5.QtGui import QIcon, QColor, QFont, QPainter, QBrush, QPixmap
 from PyQt5.QtCore import Qt, pyqtSignal, QSize, QPoint, QEvent, QTimer, QObject
 
-from utils import resource_path
+from utils import resource_path, safe_file_write
+from theme_schema import Theme, SETTINGS, BOOL, INT, COLOR, COLOR_PAIR
+from theme_preview import PreviewRenderer
+import tracing
+
+# Edits arriving within this window (a slider drag, typing a value) are written together.
+THEME_WRITE_DELAY_MS = 150
+THEME_PREVIEW_SIZE = 180
 
 
 class DimmingOverlay(QWidget):
@@ -297,26 +304,33 @@ class ThemeEditorWidget(QWidget):
         self.theme_dir = theme_dir
         self.selected_theme = None
         self.default_theme_path = os.path.abspath(os.path.join(os.path.dirname(theme_path), '..', 'theme', 'default.nss'))
-        self.theme_data = {}
-        self.backup_theme_data = {}
+        self.theme = Theme.parse("")
+        self.backup_theme = self.theme.copy()
         self.is_dirty = False
-        self.slider_ranges = {
-            "border.size": (0, 10), "item.opacity": (0, 100), "item.radius": (0, 3),
-            "shadow.size": (0, 30), "shadow.opacity": (0, 100), "separator.size": (0, 40),
-            "separator.opacity": (0, 100), "background.opacity": (0, 100), "font.size": (6, 100),
-            "border.radius": (0, 3), "item.prefix": (0, 2), "font.weight": (1, 9)
-        }
         self.color_pickers = {}
+        self.written_content = None
+        self.write_timer = QTimer(self)
+        self.write_timer.setSingleShot(True)
+        self.write_timer.setInterval(THEME_WRITE_DELAY_MS)
+        self.write_timer.timeout.connect(self._write_temporary_theme)
+        # Edits are previewed right away instead of waiting for Shell to reload theme.nss.
+        self.preview_label = None
+        self.preview_renderer = PreviewRenderer(parent=self)
+        self.preview_renderer.preview_rendered.connect(self._on_preview_rendered)
         self._setup_ui()
         self._load_theme()
 
+    @tracing.traced(category='io')
     def _load_theme(self):
+        # The file on disk wins over edits that were still waiting to be written.
+        self.write_timer.stop()
         if os.path.exists(self.theme_path):
             try:
                 with open(self.theme_path, 'r') as file:
                     theme_content = file.read()
+                self.written_content = theme_content
                 self._parse_theme(theme_content)
-                self.backup_theme_data = self.theme_data.copy()
+                self.backup_theme = self.theme.copy()
                 self.is_dirty = False
                 self._create_form()
             except Exception as e:
@@ -325,26 +339,9 @@ class ThemeEditorWidget(QWidget):
             self._create_form()
 
     def _parse_theme(self, content):
-        self.theme_data = {}
-        for line in content.splitlines():
-            line = line.strip()
-            if not line or line.startswith('theme') or line.startswith('{') or line.startswith('}'):
-                continue
-            if '=' in line:
-                key, value = line.split('=', 1)
-                self.theme_data[key.strip()] = value.strip().strip('"')
-        
-        if 'dark' not in self.theme_data:
-            self.theme_data['dark'] = 'default'
-
-        new_color_keys = [
-            "item.text.normal.disabled", "item.text.select.disabled",
-            "item.back.normal", "item.back.normal.disabled", "item.back.select", "item.back.select.disabled",
-            "item.border.normal", "item.border.normal.disabled", "item.border.select", "item.border.select.disabled"
-        ]
-        for key in new_color_keys:
-            if key not in self.theme_data:
-                self.theme_data[key] = "#ffffff"
+        self.theme = Theme.parse(content)
+        for issue in self.theme.issues:
+            print(f"Invalid theme setting {issue}")
 
     def _setup_ui(self):
         main_layout = QGridLayout(self)
@@ -456,7 +453,7 @@ class ThemeEditorWidget(QWidget):
         label = QLabel(display_name)
 
         spinbox = QSpinBox()
-        spinbox.setRange(6, 100)
+        spinbox.setRange(SETTINGS[key].minimum, SETTINGS[key].maximum)
         spinbox.setButtonSymbols(QAbstractSpinBox.NoButtons)
         spinbox.setObjectName("fontSizeSpinBox")
 
@@ -470,7 +467,7 @@ class ThemeEditorWidget(QWidget):
         button_group.addButton(auto_radio)
         button_group.addButton(manual_radio)
 
-        is_auto = (str(value).lower() == "auto")
+        is_auto = (value == "auto")
         if is_auto:
             auto_radio.setChecked(True)
             spinbox.setEnabled(False)
@@ -526,6 +523,11 @@ class ThemeEditorWidget(QWidget):
         self._add_setting_with_label(self.general_layout, "dark")
         self._add_setting_with_label(self.general_layout, "item.radius")
         self._add_setting_with_label(self.general_layout, "border.radius")
+        self.general_layout.addStretch()
+        self.preview_label = QLabel()
+        self.preview_label.setAlignment(Qt.AlignCenter)
+        self.general_layout.addWidget(self.preview_label)
+        self._request_preview()
 
         self._add_setting_with_label(self.border_layout, "border.enabled")
         self._add_setting_with_label(self.border_layout, "border.size")
@@ -557,7 +559,7 @@ class ThemeEditorWidget(QWidget):
         self._add_setting_with_label(hbox, "image.enabled")
         hbox.addStretch()
         self.image_symbol_layout.addLayout(hbox)
-        self._add_setting_with_label(self.image_symbol_layout, "image.color", is_image=True)
+        self._add_setting_with_label(self.image_symbol_layout, "image.color")
         self._add_setting_with_label(self.image_symbol_layout, "symbol.normal")
 
         
@@ -602,117 +604,55 @@ class ThemeEditorWidget(QWidget):
     def _toggle_background_color(self, state, color_picker, value):
         color_picker.setEnabled(state)
         if not state:
-           self.theme_data['background.color'] = "default"
+           self._update_theme_data('background.color', "default")
            color_picker.set_color("default")
         else:
-            self.theme_data["background.color"] = value if value != "default" else "#ffffff"
+            self._update_theme_data("background.color", value if value != "default" else "#ffffff")
             color_picker.set_color(value if value != "default" else "#ffffff")
 
     def _update_background_color(self, key, color):
-            self.theme_data[key] = color
+            self._update_theme_data(key, color)
 
     def _toggle_background_default(self, state, color_picker):
          if state:
                color_picker.setEnabled(False)
                color_picker.set_color("default")
-               self.theme_data['background.color'] = 'default'
+               self._update_theme_data('background.color', 'default')
          else:
              color_picker.setEnabled(True)
 
-    def _add_setting_with_label(self, layout, key, is_image = False):
-        display_names = {
-            "name": "Theme", "border.enabled": "Enable Border",
-            "border.size": "Border Size", "border.color": "Border Color",
-            "border.opacity": "Border Opacity", "border.radius": "Border Radius",
-            "image.enabled": "Enable Image", "image.color": "Image Color",
-            "background.color": "Background Color",
-            "background.opacity": "Background Opacity", "background.effect": "Background Effect",
-            "item.radius": "Item Radius",
-            "item.text.normal": "Normal Text",
-            "item.text.normal.disabled": "Disabled Normal Text",
-            "item.text.select": "Selected Text",
-            "item.text.select.disabled": "Disabled Selected Text",
-            "item.back.normal": "Normal Background",
-            "item.back.normal.disabled": "Disabled Normal Background",
-            "item.back.select": "Selected Background",
-            "item.back.select.disabled": "Disabled Selected Background",
-            "item.border.normal": "Normal Border",
-            "item.border.normal.disabled": "Disabled Normal Border",
-            "item.border.select": "Selected Border",
-            "item.border.select.disabled": "Disabled Selected Border",
-            "font.size": "Font Size",
-            "font.name": "Font Name", "font.weight": "Bold", "font.italic": "Italic",
-            "shadow.enabled": "Enable Shadow", "shadow.size": "Shadow Size",
-            "shadow.opacity": "Shadow Opacity", "shadow.color": "Shadow Color",
-            "separator.size": "Separator Size", "separator.color": "Separator Color",
-            "separator.opacity": "Separator Opacity",  "symbol.normal": "Symbol", "dark": "Dark Mode",
-        }
-        display_name = display_names.get(key, key)
-        value = self.theme_data.get(key)
-        if value is None:
-            if key.endswith(".enabled") or key == "font.italic":
-                value = "false"
-            elif key.endswith(".size") or key.endswith(".opacity") or key.endswith(".radius") or key == "font.weight":
-                value = "0"
-            elif key.endswith(".color") or key.endswith(".normal") or key.endswith(".select"):
-                value = "#ffffff"
-            elif key == "name":
-                value = "auto"
-            elif key == "view":
-                value = "auto"
-            elif key == "font.name":
-                value = "Segoe UI Variable Text"
-            elif key == "background.effect":
-                value = "disabled"
-            else:
-                value = ""
-            self.theme_data[key] = value
+    def _add_setting_with_label(self, layout, key):
+        setting = SETTINGS[key]
+        display_name = setting.label
+        value = self.theme.get(key)
 
-        if key == "dark":
-            self._add_dropdown(layout, display_name, key, value)
-        elif key == "font.size":
+        if key == "font.size":
             self._add_font_size_widget(layout, display_name, key, value)
-        elif key in ["item.opacity", "background.opacity", "border.opacity",
-                       "shadow.opacity", "separator.opacity", "border.size",
-                       "shadow.size", "separator.size", "border.radius", "item.radius"]:
-            min_val, max_val = self.slider_ranges.get(key, (0, 100))
-            if key in ["border.size", "shadow.size", "separator.size", "border.radius", "item.radius"]:
-                min_val, max_val = self.slider_ranges.get(key, (0, 3)) if key in ["border.radius", "item.radius"] else self.slider_ranges.get(key, (0, 10))
-            self._add_slider(layout, display_name, key, int(value), min_val, max_val)
-        elif value.lower() in ["true", "false"] and key != "font.italic":
-            self._add_checkbox(layout, display_name, key, value.lower() == "true")
-        elif (value.startswith("#") or value == "default") and not is_image:
-            self._add_color_picker(layout, display_name, key, value)
-        elif key == "font.italic":
-           self._add_checkbox(layout, display_name, key, value.lower() == "true")
-        elif key in ["name","font.name", "view"]:
-            self._add_dropdown(layout, display_name, key, value)
-        elif key == "font.weight":
-            min_val, max_val = self.slider_ranges.get(key, (1, 9))
-            self._add_slider(layout, display_name, key, int(value), min_val, max_val)
-        elif is_image and key == "image.color":
-            self._add_image_color_picker(layout, display_name, key, value)
-        elif key == "background.color":
-             self._add_background_color_picker(layout, display_name, key, value)
         elif key == "background.effect":
             self._add_radio_switcher(layout, display_name, key, value)
+        elif setting.kind == BOOL or isinstance(value, bool):
+            self._add_checkbox(layout, display_name, key, value)
+        elif setting.kind == INT:
+            self._add_slider(layout, display_name, key, value, setting.minimum, setting.maximum)
+        elif setting.kind == COLOR:
+            self._add_color_picker(layout, display_name, key, value)
+        elif setting.kind == COLOR_PAIR:
+            self._add_image_color_picker(layout, display_name, key, value)
+        elif setting.options:
+            self._add_dropdown(layout, display_name, key, value)
         else:
            self._add_text_input(layout, display_name, key, value)
 
     def _add_radio_switcher(self, layout, display_name, key, value):
         hbox = QHBoxLayout()
         radio_group = QButtonGroup()
-        if key == "background.effect":
-            options = ["disabled", "transparent", "blur", "acrylic"]
-        else:
-             options = ["auto", "display", "ignore"]
-        for i, option in enumerate(options):
+        for i, option in enumerate(SETTINGS[key].options):
             radio_button = QRadioButton(option)
             radio_button.setObjectName("themeEditorRadioButton")
-            radio_button.setChecked(value == str(i) or option == value)
+            radio_button.setChecked(value == i)
             radio_group.addButton(radio_button)
             hbox.addWidget(radio_button)
-            radio_button.toggled.connect(lambda checked, k=key, v=str(i), o=option: self._update_theme_data(k, v if k == "background.effect" else o) if checked else None )
+            radio_button.toggled.connect(lambda checked, k=key, v=i: self._update_theme_data(k, v) if checked else None )
         hbox.addStretch()
         layout.addLayout(hbox)
 
@@ -740,20 +680,16 @@ class ThemeEditorWidget(QWidget):
         layout.addLayout(hbox)
 
     def _add_image_color_picker(self, layout, display_name, key, value):
-        try:
-            value = eval(value)
-        except:
-            value = ["#ffffff", "#ffffff"]
         hbox = QHBoxLayout()
         vbox1 = QVBoxLayout()
         vbox2 = QVBoxLayout()
-        color_picker_1 = ColorPickerWidget(value[0] if isinstance(value, list) and len(value) > 0 else "#ffffff", key)
+        color_picker_1 = ColorPickerWidget(value[0], key)
         color_picker_1.colorChanged.connect(lambda k, c, i=0: self._update_image_color(k, c, i))
         vbox1.addWidget(color_picker_1)
          
         label = QLabel(display_name + " 1")
         vbox1.addWidget(label, alignment=Qt.AlignCenter)
-        color_picker_2 = ColorPickerWidget(value[1] if isinstance(value, list) and len(value) > 1 else "#ffffff", key)
+        color_picker_2 = ColorPickerWidget(value[1], key)
         color_picker_2.colorChanged.connect(lambda k, c, i=1: self._update_image_color(k, c, i))
         vbox2.addWidget(color_picker_2)
         label2 = QLabel(display_name + " 2")
@@ -763,13 +699,9 @@ class ThemeEditorWidget(QWidget):
         layout.addLayout(hbox)
 
     def _update_image_color(self, key, color, index):
-        try:
-            value = eval(self.theme_data.get(key, "['#ffffff', '#ffffff']"))
-            if isinstance(value, list) and len(value) > index:
-                value[index] = color
-                self._update_theme_data(key, str(value))
-        except:
-             self._update_theme_data(key, "['#ffffff', '#ffffff']")
+        value = self.theme.get(key)
+        value[index] = color
+        self._update_theme_data(key, value)
 
     def _add_slider(self, layout, display_name, key, value, min_val, max_val):
         hbox = QHBoxLayout()
@@ -798,20 +730,13 @@ class ThemeEditorWidget(QWidget):
         hbox.addWidget(label)
         dropdown = QComboBox()
         dropdown.setObjectName("themeEditorDropdown")
-        options = []
-        if key == "name":
-            options = ["auto", "classic", "white", "black", "modern"]
-        elif key == "view":
-            options = ["auto", "compact", "small", "medium", "large", "wide"]
-        elif key == "font.name":
-            options = ["Segoe UI Variable Text", "Comic Sans MS", "Impact", "Arial", "Helvetica", "Times  New Roman", "Courier New",
-                        "Calibri", "Cambria", "Garamond", "Georgia", "Tahoma", "Trebuchet MS", "Century Gothic", "Franklin Gothic Medium", "Consolas"]
-        elif key == "dark":
-            options = ["true", "false", "default"]
+        options = SETTINGS[key].options
+        if key == "view":
+            options = [option.split('.')[-1] for option in options]
 
         dropdown.addItems(options)
         dropdown.setCurrentText(value.split('.')[-1] if key == "view" else value)
-        dropdown.currentTextChanged.connect(lambda text, k=key: self._update_theme_data(k, text if key not in ["view", "dark"] else (f"view.{text}" if key == "view" else text)))
+        dropdown.currentTextChanged.connect(lambda text, k=key: self._update_theme_data(k, f"view.{text}" if k == "view" else text))
         hbox.addWidget(dropdown)
         hbox.addStretch(1)
         layout.addLayout(hbox)
@@ -828,44 +753,49 @@ class ThemeEditorWidget(QWidget):
         layout.addLayout(hbox)
 
     def _update_theme_data(self, key, value):
-        str_value = str(value)
-        if isinstance(value, bool):
-            str_value = "true" if value else "false"
-
-        if self.theme_data.get(key) == str_value:
+        try:
+            if not self.theme.set(key, value):
+                return
+        except ValueError as e:
+            print(f"Ignoring invalid value for {key}: {e}")
             return
 
-        self.theme_data[key] = str_value
         self.is_dirty = True
-        self._write_temporary_theme()
+        self.write_timer.start()
+        self._request_preview()
+
+    def _request_preview(self):
+        self.preview_renderer.request('editor', self.theme, THEME_PREVIEW_SIZE)
+
+    def _on_preview_rendered(self, key, image):
+        if self.preview_label is not None and not image.isNull():
+            self.preview_label.setPixmap(QPixmap.fromImage(image))
 
+    def _serialize_theme(self):
+        return self.theme.serialize()
+
+    @tracing.traced(category='io')
     def _write_temporary_theme(self):
+        """Writes the theme to theme.nss now, replacing any scheduled write. The
+        file is replaced atomically and left alone when its content would not change."""
+        self.write_timer.stop()
         try:
-            with open(self.theme_path, 'w') as file:
-                file.write("theme\n{\n")
-                for key, value in self.theme_data.items():
-                   if key == 'image.color':
-                        try:
-                            color_list = eval(value)
-                            if isinstance(color_list, list):
-                                formatted_value = f"[{', '.join(c if c != 'default' else '#ffffff' for c in color_list)} ]"
-                                file.write(f"  {key} = {formatted_value}\n")
-                            else:
-                                file.write(f"  {key} = {value}\n")
-                        except:
-                            file.write(f"  {key} = {value}\n")
-                   elif key in ["name", "font.name"]:
-                        file.write(f"  {key} = \"{value}\"\n")
-                   else:
-                      file.write(f"  {key} = {value}\n")
-                file.write("}\n")
+            content = self._serialize_theme()
+            if content == self.written_content:
+                return
+            safe_file_write(self.theme_path, content)
+            self.written_content = content
         except Exception as e:
             print(f"Error in _write_temporary_theme: {e}")
 
+    def flush_pending_write(self):
+        if self.write_timer.isActive():
+            self._write_temporary_theme()
+
     def save_theme(self):
         try:
             self._write_temporary_theme()
-            self.backup_theme_data = self.theme_data.copy()
+            self.backup_theme = self.theme.copy()
             self.is_dirty = False
             return True
         except Exception as e:
@@ -873,16 +803,17 @@ class ThemeEditorWidget(QWidget):
             return False
 
     def reset_theme(self):
-        self.theme_data = self.backup_theme_data.copy()
+        self.theme = self.backup_theme.copy()
         self._write_temporary_theme()
         self.is_dirty = False
         self._create_form()
         return True
 
     def revert_changes(self):
-        self.theme_data = self.backup_theme_data.copy()
+        self.theme = self.backup_theme.copy()
         self._write_temporary_theme()
         self.is_dirty = False
+        self._request_preview()
 
     def reload_theme(self, theme_name=None):
         if theme_name:
@@ -890,4 +821,6 @@ class ThemeEditorWidget(QWidget):
         self._load_theme()
 
     def closeEvent(self, event):
+        self.flush_pending_write()
+        self.preview_renderer.shutdown()
         super().closeEvent(event)
\ No newline at end of file
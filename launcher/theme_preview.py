@@ -0,0 +1,250 @@
+import collections
+import hashlib
+import os
+import threading
+
+from PyQt5.QtCore import QObject, QRectF, QRunnable, QThreadPool, Qt, pyqtSignal
+from PyQt5.QtGui import QColor, QFont, QFontMetrics, QImage, QLinearGradient, QPainter, QPainterPath, QPen
+
+import tracing
+
+PREVIEW_CACHE_ENTRIES = 64
+MAX_PREVIEW_WORKERS = 1
+MENU_WIDTH = 200
+MENU_MARGIN = 6
+SHADOW_MARGIN = 12
+# Shell's radius settings are steps, not pixels.
+RADIUS_STEPS = (0, 4, 7, 10)
+ITEM_HEIGHTS = {'view.compact': 22, 'view.small': 24, 'view.medium': 28, 'view.large': 32, 'view.wide': 28, 'view.auto': 28}
+# Mock menu rows: (title, state), with None for a separator. The state picks the
+# normal, select or disabled colours; '>' marks a submenu.
+MENU_ITEMS = (("Open", 'normal'), ("Open with", 'select>'), None, ("Cut", 'normal'), ("Copy", 'normal'),
+              ("Paste", 'disabled'), None, ("Rename", 'normal'), ("Delete", 'normal'), None, ("Properties", 'normal'))
+DARK_DEFAULTS = {'background': "#2b2b2b", 'text': "#ffffff", 'text.disabled': "#7a7a7a", 'back.select': "#3d3d3d",
+                 'border': "#454545", 'separator': "#454545"}
+LIGHT_DEFAULTS = {'background': "#f9f9f9", 'text': "#1a1a1a", 'text.disabled': "#a0a0a0", 'back.select': "#e5e5e5",
+                  'border': "#d0d0d0", 'separator': "#d0d0d0"}
+
+
+def preview_key(theme, size=None):
+    """Cache key for theme drawn at size: a hash of its serialized text."""
+    return hashlib.sha1(f"{size}|{theme.serialize()}".encode('utf-8')).hexdigest()
+
+
+def _color(value, fallback, opacity=None):
+    color = QColor(fallback if value in (None, "default") else value)
+    if not color.isValid():
+        color = QColor(fallback)
+    # An opacity of 0 leaves the colour opaque, as in the shipped themes that only set a colour.
+    if opacity:
+        color.setAlphaF(max(0, min(100, opacity)) / 100)
+    return color
+
+
+def _font(theme):
+    font = QFont(theme.get('font.name') or "Segoe UI")
+    size = theme.get('font.size')
+    font.setPointSizeF(9 if size in (None, "auto") else size)
+    weight = theme.get('font.weight')
+    if isinstance(weight, bool):
+        font.setBold(weight)
+    elif weight:
+        font.setWeight(min(99, weight * 11))
+    font.setItalic(bool(theme.get('font.italic')))
+    return font
+
+
+@tracing.traced(name='render theme preview', category='paint')
+def render_theme(theme, size=None):
+    """Draws a mock context menu styled by theme into a QImage. Only QImage and
+    QPainter are used, so it may run on any thread. With size the image is scaled
+    to fit a size x size square."""
+    dark = theme.get('dark') != "false"
+    defaults = DARK_DEFAULTS if dark else LIGHT_DEFAULTS
+    font = _font(theme)
+    metrics = QFontMetrics(font)
+    item_height = max(ITEM_HEIGHTS.get(theme.get('view'), 28), metrics.height() + 8)
+    separator_size = max(1, theme.get('separator.size') or 1)
+    menu_width = MENU_WIDTH * (1.3 if theme.get('view') == 'view.wide' else 1)
+    menu_height = MENU_MARGIN * 2 + sum(item_height if item else separator_size + 8 for item in MENU_ITEMS)
+
+    image = QImage(int(menu_width + SHADOW_MARGIN * 2), int(menu_height + SHADOW_MARGIN * 2), QImage.Format_ARGB32_Premultiplied)
+    image.fill(Qt.transparent)
+    painter = QPainter(image)
+    painter.setRenderHint(QPainter.Antialiasing)
+    painter.setRenderHint(QPainter.TextAntialiasing)
+    menu = QRectF(SHADOW_MARGIN, SHADOW_MARGIN, menu_width, menu_height)
+    radius = RADIUS_STEPS[max(0, min(3, theme.get('border.radius') or 0))]
+
+    if theme.get('shadow.enabled'):
+        shadow = _color(theme.get('shadow.color'), "#000000")
+        steps = max(1, min(SHADOW_MARGIN, theme.get('shadow.size') or 4))
+        alpha = (theme.get('shadow.opacity') or 30) / 100
+        painter.setPen(Qt.NoPen)
+        for step in range(steps, 0, -1):
+            shadow.setAlphaF(alpha / steps)
+            painter.setBrush(shadow)
+            painter.drawRoundedRect(menu.adjusted(-step, -step + 2, step, step + 2), radius + step, radius + step)
+
+    path = QPainterPath()
+    path.addRoundedRect(menu, radius, radius)
+    painter.fillPath(path, _color(theme.get('background.color'), defaults['background'], theme.get('background.opacity')))
+    if theme.get('border.enabled'):
+        border_size = theme.get('border.size') or 1
+        pen = QPen(_color(theme.get('border.color'), defaults['border'], theme.get('border.opacity')), border_size)
+        painter.setPen(pen)
+        painter.setBrush(Qt.NoBrush)
+        painter.drawRoundedRect(menu.adjusted(border_size / 2, border_size / 2, -border_size / 2, -border_size / 2), radius, radius)
+
+    painter.setFont(font)
+    item_radius = RADIUS_STEPS[max(0, min(3, theme.get('item.radius') or 0))]
+    image_colors = theme.get('image.color') or ["#ffffff", "#ffffff"]
+    y = menu.top() + MENU_MARGIN
+    for item in MENU_ITEMS:
+        if item is None:
+            painter.fillRect(QRectF(menu.left() + MENU_MARGIN * 2, y + 4, menu.width() - MENU_MARGIN * 4, separator_size),
+                             _color(theme.get('separator.color'), defaults['separator'], theme.get('separator.opacity')))
+            y += separator_size + 8
+            continue
+        title, state = item
+        row = QRectF(menu.left() + MENU_MARGIN, y, menu.width() - MENU_MARGIN * 2, item_height)
+        selected = state.startswith('select')
+        suffix = '.disabled' if state == 'disabled' else ''
+        kind = 'select' if selected else 'normal'
+        back = theme.get(f'item.back.{kind}{suffix}')
+        if selected or back not in (None, "default"):
+            painter.setPen(Qt.NoPen)
+            painter.setBrush(_color(back, defaults['back.select'] if selected else defaults['background'], theme.get('item.opacity')))
+            painter.drawRoundedRect(row, item_radius, item_radius)
+        border = theme.get(f'item.border.{kind}{suffix}')
+        if border not in (None, "default"):
+            painter.setPen(QPen(_color(border, defaults['border']), 1))
+            painter.setBrush(Qt.NoBrush)
+            painter.drawRoundedRect(row.adjusted(0.5, 0.5, -0.5, -0.5), item_radius, item_radius)
+
+        icon_size = min(16, item_height - 8)
+        if theme.get('image.enabled'):
+            icon = QRectF(row.left() + 8, row.center().y() - icon_size / 2, icon_size, icon_size)
+            gradient = QLinearGradient(icon.topLeft(), icon.bottomRight())
+            gradient.setColorAt(0, _color(image_colors[0], "#ffffff"))
+            gradient.setColorAt(1, _color(image_colors[1], "#ffffff"))
+            painter.setPen(Qt.NoPen)
+            painter.setBrush(gradient)
+            painter.drawRoundedRect(icon, 3, 3)
+
+        text_fallback = defaults['text.disabled'] if suffix else defaults['text']
+        painter.setPen(_color(theme.get(f'item.text.{kind}{suffix}'), text_fallback))
+        painter.drawText(row.adjusted(icon_size + 16, 0, -20, 0), Qt.AlignVCenter | Qt.AlignLeft, title)
+        if state.endswith('>'):
+            painter.setPen(_color(theme.get('symbol.normal'), defaults['text']))
+            painter.drawText(row.adjusted(0, 0, -8, 0), Qt.AlignVCenter | Qt.AlignRight, "›")
+        y += item_height
+    painter.end()
+
+    if size:
+        image = image.scaled(size, size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+    return image
+
+
+class PreviewCache:
+    """Rendered previews by preview_key(): the most recent max_entries in memory
+    and, when cache_dir is set, every one as a PNG on disk."""
+
+    def __init__(self, cache_dir=None, max_entries=PREVIEW_CACHE_ENTRIES):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.images = collections.OrderedDict()
+        self._lock = threading.Lock()
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.png")
+
+    def get(self, key, memory_only=False):
+        with self._lock:
+            image = self.images.get(key)
+            if image is not None:
+                self.images.move_to_end(key)
+                return image
+        if memory_only or not self.cache_dir:
+            return None
+        image = QImage(self._path(key))
+        if image.isNull():
+            return None
+        self._remember(key, image)
+        return image
+
+    def put(self, key, image):
+        self._remember(key, image)
+        if self.cache_dir:
+            image.save(self._path(key), 'PNG')
+
+    def _remember(self, key, image):
+        with self._lock:
+            self.images[key] = image
+            self.images.move_to_end(key)
+            while len(self.images) > self.max_entries:
+                self.images.popitem(last=False)
+
+
+class _PreviewSignals(QObject):
+    finished = pyqtSignal(str, str, QImage)
+
+
+class PreviewTask(QRunnable):
+    def __init__(self, key, content_key, theme, size, renderer):
+        super().__init__()
+        self.key = key
+        self.content_key = content_key
+        self.theme = theme
+        self.size = size
+        self.renderer = renderer
+
+    def run(self):
+        # A newer request for the same key (a slider still moving) supersedes this one.
+        if self.renderer.latest.get(self.key) != self.content_key:
+            return
+        try:
+            image = self.renderer.cache.get(self.content_key)
+            if image is None:
+                image = render_theme(self.theme, self.size)
+                self.renderer.cache.put(self.content_key, image)
+        except Exception as e:
+            print(f"Error rendering theme preview {self.key}: {e}")
+            image = QImage()
+        self.renderer.signals.finished.emit(self.key, self.content_key, image)
+
+
+class PreviewRenderer(QObject):
+    """Renders theme previews off the GUI thread. preview_rendered carries the key
+    passed to request() and the image, or a null QImage if rendering failed. Only
+    the latest request per key is delivered, and a preview already in memory is
+    delivered before request() returns."""
+    preview_rendered = pyqtSignal(str, QImage)
+
+    def __init__(self, cache_dir=None, max_workers=MAX_PREVIEW_WORKERS, parent=None):
+        super().__init__(parent)
+        self.cache = PreviewCache(cache_dir)
+        self.latest = {}
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_workers)
+        self.signals = _PreviewSignals()
+        self.signals.finished.connect(self._on_finished)
+
+    def request(self, key, theme, size=None):
+        content_key = preview_key(theme, size)
+        self.latest[key] = content_key
+        image = self.cache.get(content_key, memory_only=True)
+        if image is not None:
+            self.preview_rendered.emit(key, image)
+            return
+        self.pool.start(PreviewTask(key, content_key, theme.copy(), size, self))
+
+    def _on_finished(self, key, content_key, image):
+        if self.latest.get(key) == content_key:
+            self.preview_rendered.emit(key, image)
+
+    def shutdown(self):
+        self.pool.clear()
+        self.pool.waitForDone(2000)
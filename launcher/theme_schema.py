@@ -0,0 +1,238 @@
+import functools
+import re
+
+import nss_parser
+import tracing
+
+BOOL = 'bool'
+INT = 'int'
+COLOR = 'color'
+COLOR_PAIR = 'color_pair'
+TEXT = 'text'
+CHOICE = 'choice'
+
+COLOR_PATTERN = re.compile(r"#(?:[0-9a-fA-F]{3,4}|[0-9a-fA-F]{6}|[0-9a-fA-F]{8})")
+DEFAULT_COLOR = "#ffffff"
+FONT_NAMES = ("Segoe UI Variable Text", "Comic Sans MS", "Impact", "Arial", "Helvetica", "Times  New Roman", "Courier New",
+              "Calibri", "Cambria", "Garamond", "Georgia", "Tahoma", "Trebuchet MS", "Century Gothic", "Franklin Gothic Medium", "Consolas")
+BACKGROUND_EFFECTS = ("disabled", "transparent", "blur", "acrylic")
+
+
+class Setting:
+    """One theme key: its type, default, the range of an INT, the options of a
+    CHOICE or TEXT dropdown and the label the editor shows. keywords maps words
+    an INT also accepts, such as font.size = auto, to the value they stand for."""
+
+    def __init__(self, key, kind, default, label, minimum=None, maximum=None, options=(), keywords=None):
+        self.key = key
+        self.kind = kind
+        self.default = default
+        self.label = label
+        self.minimum = minimum
+        self.maximum = maximum
+        self.options = options
+        self.keywords = keywords or {}
+
+    def parse(self, text):
+        """The typed value for text as written in a theme. Raises ValueError."""
+        text = text.strip()
+        if self.kind == TEXT:
+            return text[1:-1] if len(text) > 1 and text[0] == text[-1] and text[0] in "'\"" else text
+        return self.validate(text)
+
+    def validate(self, value):
+        """value converted to this setting's type. Raises ValueError if it does not fit."""
+        if isinstance(value, str) and value in self.keywords:
+            return self.keywords[value]
+        if self.kind == BOOL:
+            if isinstance(value, bool):
+                return value
+            if str(value).lower() in ("true", "false"):
+                return str(value).lower() == "true"
+        elif self.kind == INT:
+            # Compared by type as well, since True == 1.
+            if any(type(keyword) is type(value) and keyword == value for keyword in self.keywords.values()):
+                return value
+            if not isinstance(value, bool):
+                number = int(value)
+                if self.minimum <= number <= self.maximum:
+                    return number
+                raise ValueError(f"{number} is outside {self.minimum}..{self.maximum}")
+        elif self.kind == COLOR:
+            if value == "default" or COLOR_PATTERN.fullmatch(str(value)):
+                return value
+        elif self.kind == COLOR_PAIR:
+            if isinstance(value, str):
+                value = [part.strip() for part in value.strip().strip("[]").split(",")]
+            colors = [DEFAULT_COLOR if color == "default" else color for color in value]
+            if len(colors) == 2 and all(COLOR_PATTERN.fullmatch(color) for color in colors):
+                return colors
+        elif self.kind == CHOICE:
+            if value in self.options:
+                return value
+        elif self.kind == TEXT:
+            return str(value)
+        raise ValueError(f"{value!r} is not a valid {self.kind}")
+
+    def format(self, value):
+        if isinstance(value, bool):
+            return "true" if value else "false"
+        if self.kind == COLOR_PAIR:
+            return f"[{', '.join(value)}]"
+        if self.kind == TEXT:
+            return f'"{value}"'
+        return str(value)
+
+
+# The editor's settings, in the order a theme missing them gets them appended.
+SCHEMA = (
+    Setting("name", TEXT, "auto", "Theme", options=("auto", "classic", "white", "black", "modern")),
+    Setting("view", CHOICE, "view.auto", "View", options=tuple(f"view.{view}" for view in ("auto", "compact", "small", "medium", "large", "wide"))),
+    Setting("dark", CHOICE, "default", "Dark Mode", options=("true", "false", "default")),
+    Setting("border.enabled", BOOL, False, "Enable Border"),
+    Setting("border.size", INT, 0, "Border Size", 0, 10),
+    Setting("border.color", COLOR, DEFAULT_COLOR, "Border Color"),
+    Setting("border.opacity", INT, 0, "Border Opacity", 0, 100),
+    Setting("border.radius", INT, 0, "Border Radius", 0, 3),
+    Setting("image.enabled", BOOL, False, "Enable Image"),
+    Setting("image.color", COLOR_PAIR, [DEFAULT_COLOR, DEFAULT_COLOR], "Image Color"),
+    Setting("background.color", COLOR, DEFAULT_COLOR, "Background Color"),
+    Setting("background.opacity", INT, 0, "Background Opacity", 0, 100),
+    Setting("background.effect", INT, 0, "Background Effect", 0, len(BACKGROUND_EFFECTS) - 1, options=BACKGROUND_EFFECTS,
+            keywords={effect: i for i, effect in enumerate(BACKGROUND_EFFECTS)}),
+    Setting("item.opacity", INT, 0, "Item Opacity", 0, 100),
+    Setting("item.radius", INT, 0, "Item Radius", 0, 3),
+    Setting("item.prefix", INT, 0, "Item Prefix", 0, 2),
+    Setting("item.text.normal", COLOR, DEFAULT_COLOR, "Normal Text"),
+    Setting("item.text.normal.disabled", COLOR, DEFAULT_COLOR, "Disabled Normal Text"),
+    Setting("item.text.select", COLOR, DEFAULT_COLOR, "Selected Text"),
+    Setting("item.text.select.disabled", COLOR, DEFAULT_COLOR, "Disabled Selected Text"),
+    Setting("item.back.normal", COLOR, DEFAULT_COLOR, "Normal Background"),
+    Setting("item.back.normal.disabled", COLOR, DEFAULT_COLOR, "Disabled Normal Background"),
+    Setting("item.back.select", COLOR, DEFAULT_COLOR, "Selected Background"),
+    Setting("item.back.select.disabled", COLOR, DEFAULT_COLOR, "Disabled Selected Background"),
+    Setting("item.border.normal", COLOR, DEFAULT_COLOR, "Normal Border"),
+    Setting("item.border.normal.disabled", COLOR, DEFAULT_COLOR, "Disabled Normal Border"),
+    Setting("item.border.select", COLOR, DEFAULT_COLOR, "Selected Border"),
+    Setting("item.border.select.disabled", COLOR, DEFAULT_COLOR, "Disabled Selected Border"),
+    Setting("font.size", INT, "auto", "Font Size", 6, 100, keywords={"auto": "auto"}),
+    Setting("font.name", TEXT, "Segoe UI Variable Text", "Font Name", options=FONT_NAMES),
+    # Shipped themes write font.weight as a bold flag; numeric weights are kept too.
+    Setting("font.weight", INT, False, "Bold", 1, 9, keywords={"true": True, "false": False}),
+    Setting("font.italic", BOOL, False, "Italic"),
+    Setting("shadow.enabled", BOOL, False, "Enable Shadow"),
+    Setting("shadow.size", INT, 0, "Shadow Size", 0, 30),
+    Setting("shadow.opacity", INT, 0, "Shadow Opacity", 0, 100),
+    Setting("shadow.color", COLOR, DEFAULT_COLOR, "Shadow Color"),
+    Setting("separator.size", INT, 0, "Separator Size", 0, 40),
+    Setting("separator.color", COLOR, DEFAULT_COLOR, "Separator Color"),
+    Setting("separator.opacity", INT, 0, "Separator Opacity", 0, 100),
+    Setting("symbol.normal", COLOR, DEFAULT_COLOR, "Symbol"),
+)
+SETTINGS = {setting.key: setting for setting in SCHEMA}
+# Keys the editor has no control for; a theme only gets them when it sets them.
+OPTIONAL_KEYS = {"item.prefix"}
+
+
+class ThemeIssue:
+    def __init__(self, key, text, message):
+        self.key = key
+        self.text = text
+        self.message = message
+
+    def __str__(self):
+        return f"{self.key} = {self.text}: {self.message}"
+
+
+@functools.lru_cache(maxsize=32)
+def _parse_entries(content):
+    """(key, value, raw text) for each assignment in the theme block, plus issues.
+    value is typed for schema keys and None for keys outside the schema or with
+    a bad value. Cached by content since editing and switching themes re-read the
+    same few files."""
+    document = nss_parser.parse(content)
+    theme = document.find('theme')
+    section = theme.block if theme and theme.block else document
+    entries = []
+    issues = []
+    for assignment in section.assignments():
+        key, text = assignment.key, assignment.value.text.strip()
+        setting = SETTINGS.get(key)
+        value = None
+        if setting is not None:
+            try:
+                value = setting.parse(text)
+            except ValueError as e:
+                issues.append(ThemeIssue(key, text, str(e)))
+        entries.append((key, value, text))
+    return tuple(entries), tuple(issues)
+
+
+class Theme:
+    """A theme block as typed values. Keys keep their order from the file and
+    schema keys it lacks follow with their defaults. Keys outside the schema and
+    values that failed validation are written back as they were read until they
+    are set. The serialized text is cached until the next change."""
+
+    def __init__(self):
+        self.values = {}
+        self.raw = {}
+        self.issues = []
+        self._text = None
+
+    @classmethod
+    @tracing.traced(name='parse theme', category='io')
+    def parse(cls, content):
+        theme = cls()
+        entries, issues = _parse_entries(content)
+        for key, value, text in entries:
+            if value is None:
+                theme.raw[key] = text
+                setting = SETTINGS.get(key)
+                value = setting.default if setting else text
+            else:
+                theme.raw.pop(key, None)
+            theme.values[key] = value
+        theme.issues = list(issues)
+        for setting in SCHEMA:
+            if setting.key not in theme.values and setting.key not in OPTIONAL_KEYS:
+                theme.values[setting.key] = setting.default
+        return theme
+
+    def copy(self):
+        theme = Theme()
+        theme.values = {key: list(value) if isinstance(value, list) else value for key, value in self.values.items()}
+        theme.raw = dict(self.raw)
+        theme.issues = list(self.issues)
+        theme._text = self._text
+        return theme
+
+    def get(self, key):
+        value = self.values.get(key)
+        return list(value) if isinstance(value, list) else value
+
+    def set(self, key, value):
+        """Validates and stores value. Returns True if the theme changed; raises
+        ValueError for a value the key's setting does not accept."""
+        setting = SETTINGS.get(key)
+        value = setting.validate(value) if setting else str(value)
+        if self.values.get(key) == value and key not in self.raw:
+            return False
+        self.values[key] = value
+        self.raw.pop(key, None)
+        self._text = None
+        return True
+
+    def format_value(self, key):
+        if key in self.raw:
+            return self.raw[key]
+        setting = SETTINGS.get(key)
+        return setting.format(self.values[key]) if setting else self.values[key]
+
+    def serialize(self):
+        if self._text is None:
+            lines = ["theme\n{\n"]
+            lines.extend(f"  {key} = {self.format_value(key)}\n" for key in self.values)
+            lines.append("}\n")
+            self._text = "".join(lines)
+        return self._text
@@ -0,0 +1,176 @@
+import hashlib
+import json
+import os
+
+import tracing
+from theme_schema import SCHEMA, OPTIONAL_KEYS, Theme
+from utils import safe_file_write
+
+THEME_INDEX_VERSION = 2
+THEME_EXTENSION = '.nss'
+PREVIEW_EXTENSION = '.png'
+
+
+def _content_hash(data):
+    return hashlib.sha1(data).hexdigest()
+
+
+# The index caches Theme.parse() output, so it is only valid for the schema that
+# produced it.
+SCHEMA_HASH = _content_hash(repr((
+    [(setting.key, setting.kind, setting.default, setting.minimum, setting.maximum, setting.options,
+      sorted(setting.keywords.items())) for setting in SCHEMA],
+    sorted(OPTIONAL_KEYS))).encode('utf-8'))
+
+
+class ThemeEntry:
+    """A distinct theme: its name, the hashes of its .nss and preview, and the names
+    of byte-identical copies (black.nss next to Black.nss) listed as aliases."""
+
+    def __init__(self, name, theme_hash, preview_hash, aliases):
+        self.name = name
+        self.theme_hash = theme_hash
+        self.preview_hash = preview_hash
+        self.aliases = aliases
+
+
+class ThemeStore:
+    """The themes in theme_dir, content-addressed. Each file is hashed once and
+    remembered by mtime and size in a JSON index at index_path, together with the
+    theme's text and parsed values keyed by hash. Unchanged files are therefore
+    not read again, across runs as well, and themes whose .nss and preview are
+    byte-identical are listed once. With index_path=None the index is kept in
+    memory only."""
+
+    def __init__(self, theme_dir, index_path=None):
+        self.theme_dir = theme_dir
+        self.index_path = index_path
+        self.files = {}
+        self.themes = {}
+        self.entries = []
+        self._by_name = {}
+        self._parsed = {}
+        self._dirty = False
+        self._load_index()
+
+    def _load_index(self):
+        if not self.index_path or not os.path.exists(self.index_path):
+            return
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error reading theme index {self.index_path}: {e}")
+            return
+        if (index.get('version') != THEME_INDEX_VERSION or index.get('schema') != SCHEMA_HASH
+                or index.get('theme_dir') != os.path.abspath(self.theme_dir)):
+            return
+        self.files = index.get('files', {})
+        self.themes = index.get('themes', {})
+
+    def _hash_file(self, filename, stat):
+        """The content hash of filename, read only if its stat changed since it was indexed."""
+        record = self.files.get(filename)
+        if record and record['mtime_ns'] == stat.st_mtime_ns and record['size'] == stat.st_size:
+            return record['hash']
+        with open(os.path.join(self.theme_dir, filename), 'rb') as f:
+            data = f.read()
+        content_hash = _content_hash(data)
+        if filename.endswith(THEME_EXTENSION) and content_hash not in self.themes:
+            # surrogateescape keeps bytes that are not UTF-8, so the text encodes back
+            # to exactly the file's bytes; only the parser sees normalised newlines.
+            content = data.decode('utf-8', errors='surrogateescape')
+            theme = Theme.parse(content.replace('\r\n', '\n'))
+            self.themes[content_hash] = {'content': content, 'values': theme.values, 'raw': theme.raw}
+        self.files[filename] = {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'hash': content_hash}
+        self._dirty = True
+        return content_hash
+
+    @tracing.traced(category='io')
+    def refresh(self):
+        """Re-lists theme_dir and returns the distinct themes, sorted by name."""
+        stats = {}
+        try:
+            with os.scandir(self.theme_dir) as it:
+                for dir_entry in it:
+                    if dir_entry.name.endswith((THEME_EXTENSION, PREVIEW_EXTENSION)) and dir_entry.is_file():
+                        stats[dir_entry.name] = dir_entry.stat()
+        except OSError as e:
+            print(f"Error listing themes in {self.theme_dir}: {e}")
+
+        groups = {}
+        for filename in sorted(stats):
+            if not filename.endswith(THEME_EXTENSION):
+                continue
+            name = filename[:-len(THEME_EXTENSION)]
+            preview = name + PREVIEW_EXTENSION
+            try:
+                theme_hash = self._hash_file(filename, stats[filename])
+                preview_hash = self._hash_file(preview, stats[preview]) if preview in stats else None
+            except OSError as e:
+                print(f"Error reading theme {filename}: {e}")
+                continue
+            groups.setdefault((theme_hash, preview_hash), []).append(name)
+
+        for filename in [filename for filename in self.files if filename not in stats]:
+            del self.files[filename]
+            self._dirty = True
+        used = {record['hash'] for record in self.files.values()}
+        for theme_hash in [theme_hash for theme_hash in self.themes if theme_hash not in used]:
+            del self.themes[theme_hash]
+            self._parsed.pop(theme_hash, None)
+            self._dirty = True
+
+        self.entries = sorted((ThemeEntry(names[0], theme_hash, preview_hash, names[1:])
+                               for (theme_hash, preview_hash), names in groups.items()),
+                              key=lambda entry: entry.name.casefold())
+        self._by_name = {name: entry for entry in self.entries for name in [entry.name, *entry.aliases]}
+        self.flush()
+        return self.entries
+
+    def entry(self, name):
+        return self._by_name.get(name)
+
+    def preview_path(self, name):
+        entry = self._by_name.get(name)
+        if entry is None or entry.preview_hash is None:
+            return None
+        return os.path.join(self.theme_dir, entry.name + PREVIEW_EXTENSION)
+
+    def content(self, name):
+        """The text of theme name, or None if it no longer exists. The file is only
+        read again if it changed on disk since it was indexed. Encoded as UTF-8 with
+        errors='surrogateescape' it gives back the file's bytes."""
+        filename = name + THEME_EXTENSION
+        try:
+            theme_hash = self._hash_file(filename, os.stat(os.path.join(self.theme_dir, filename)))
+        except OSError:
+            return None
+        self.flush()
+        return self.themes[theme_hash]['content']
+
+    def theme(self, name):
+        """A copy of theme name's parsed Theme, or None."""
+        entry = self._by_name.get(name)
+        if entry is None:
+            return None
+        theme = self._parsed.get(entry.theme_hash)
+        if theme is None:
+            record = self.themes[entry.theme_hash]
+            theme = Theme()
+            theme.values = record['values']
+            theme.raw = record['raw']
+            self._parsed[entry.theme_hash] = theme
+        return theme.copy()
+
+    def flush(self):
+        if not self._dirty or not self.index_path:
+            return
+        index = {'version': THEME_INDEX_VERSION, 'schema': SCHEMA_HASH, 'theme_dir': os.path.abspath(self.theme_dir),
+                 'files': self.files, 'themes': self.themes}
+        try:
+            os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+            safe_file_write(self.index_path, json.dumps(index))
+            self._dirty = False
+        except OSError as e:
+            print(f"Error writing theme index {self.index_path}: {e}")
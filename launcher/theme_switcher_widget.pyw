@@ -1,5 +1,4 @@
 import sys
-import os
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel,
     QScrollArea, QFrame, QButtonGroup, QGridLayout, QPushButton, QGraphicsDropShadowEffect
@@ -7,29 +6,36 @@ from PyQt5.QtWidgets import (
 from PyQt5.QtGui import QPixmap, QIcon, QCursor, QColor
 from PyQt5.QtCore import Qt, QSize, pyqtSignal
 
+import tracing
+from theme_preview import PreviewRenderer
+from theme_store import ThemeStore
+from theme_thumbnails import ThumbnailLoader, THUMBNAIL_SIZE
 
 
 class ThemeSwitcherWidget(QWidget):
     theme_selected = pyqtSignal(str)
 
-    def __init__(self, theme_dir, theme_nss_path):
+    def __init__(self, theme_dir, theme_nss_path, thumbnail_cache_dir=None, theme_index_path=None, preview_cache_dir=None):
         super().__init__()
         self.theme_dir = theme_dir
         self.theme_nss_path = theme_nss_path
         self.selected_theme = None
         self.selected_button = None
-
-        self.theme_files = self._find_theme_files()
+        self.image_labels = {}
+        self.placeholder_pixmap = QPixmap(THUMBNAIL_SIZE, THUMBNAIL_SIZE)
+        self.placeholder_pixmap.fill(Qt.gray)
+        # Previews are scaled on a worker pool; cards show a placeholder until then.
+        self.thumbnail_loader = ThumbnailLoader(thumbnail_cache_dir, parent=self)
+        self.thumbnail_loader.thumbnail_loaded.connect(self._on_thumbnail_loaded)
+        # Themes without a usable preview image get one rendered from their settings.
+        self.preview_renderer = PreviewRenderer(preview_cache_dir, parent=self)
+        self.preview_renderer.preview_rendered.connect(self._on_preview_rendered)
+
+        # Identical copies of a theme are listed once; unchanged files are not re-read.
+        self.theme_store = ThemeStore(theme_dir, theme_index_path)
+        self.theme_entries = self.theme_store.refresh()
         self._setup_ui()
 
-    def _find_theme_files(self):
-        theme_files = []
-        if os.path.exists(self.theme_dir):
-            for filename in os.listdir(self.theme_dir):
-                if filename.endswith(".nss"):
-                    theme_files.append(filename)
-        return theme_files
-
     def _setup_ui(self):
         main_layout = QVBoxLayout(self)
         scroll_area = QScrollArea()
@@ -45,9 +51,8 @@ class ThemeSwitcherWidget(QWidget):
         self.button_group.setExclusive(True)
 
         row, col = 0, 0
-        for i, theme_file in enumerate(self.theme_files):
-            theme_name = os.path.splitext(theme_file)[0]
-            self._add_theme_option(grid_layout, theme_name, row, col, i)
+        for i, entry in enumerate(self.theme_entries):
+            self._add_theme_option(grid_layout, entry.name, row, col, i)
             col += 1
             if col > 4:
                 col = 0
@@ -69,20 +74,16 @@ class ThemeSwitcherWidget(QWidget):
         frame_layout.setAlignment(Qt.AlignHCenter | Qt.AlignTop)
         frame_layout.setContentsMargins(5, 5, 5, 5)
 
-        image_path = os.path.join(self.theme_dir, f"{theme_name}.png")
-        if os.path.exists(image_path):
-            pixmap = QPixmap(image_path)
-            target_width = 128
-            target_height = 128
-            pixmap = pixmap.scaled(target_width, target_height, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-        else:
-            pixmap = QPixmap(128, 128)
-            pixmap.fill(Qt.gray)
-
         image_label = QLabel()
-        image_label.setPixmap(pixmap)
+        image_label.setPixmap(self.placeholder_pixmap)
         image_label.setAlignment(Qt.AlignCenter)
         frame_layout.addWidget(image_label)
+        self.image_labels[theme_name] = image_label
+        preview_path = self.theme_store.preview_path(theme_name)
+        if preview_path:
+            self.thumbnail_loader.request(theme_name, preview_path)
+        else:
+            self._render_preview(theme_name)
 
         theme_button = QPushButton(theme_name.replace("theme_", "").replace("_", " ").title())
         theme_button.setObjectName("themeOptionButton")
@@ -98,6 +99,22 @@ class ThemeSwitcherWidget(QWidget):
         layout.addWidget(frame, row, col)
         self.update_frame_style(frame)
 
+    def _on_thumbnail_loaded(self, theme_name, image):
+        if image.isNull():
+            self._render_preview(theme_name)
+        else:
+            self._on_preview_rendered(theme_name, image)
+
+    def _render_preview(self, theme_name):
+        theme = self.theme_store.theme(theme_name)
+        if theme is not None:
+            self.preview_renderer.request(theme_name, theme, THUMBNAIL_SIZE)
+
+    def _on_preview_rendered(self, theme_name, image):
+        image_label = self.image_labels.get(theme_name)
+        if image_label is not None and not image.isNull():
+            image_label.setPixmap(QPixmap.fromImage(image))
+
     def update_frame_style(self, frame):
         if frame.property("selected"):
             frame.setObjectName("themeOptionFrameSelected")
@@ -119,13 +136,12 @@ class ThemeSwitcherWidget(QWidget):
         self._apply_theme(theme_name)
         self.theme_selected.emit(theme_name)
 
+    @tracing.traced(category='io')
     def _apply_theme(self, theme_name):
-        source_path = os.path.join(self.theme_dir, f"{theme_name}.nss")
-        if os.path.exists(source_path):
+        theme_content = self.theme_store.content(theme_name)
+        if theme_content is not None:
             try:
-                with open(source_path, 'r') as source_file:
-                    theme_content = source_file.read()
-                with open(self.theme_nss_path, 'w') as dest_file:
+                with open(self.theme_nss_path, 'w', encoding='utf-8', errors='surrogateescape', newline='') as dest_file:
                     dest_file.write(theme_content)
                 print(f"Theme applied: {theme_name}")
             except Exception as e:
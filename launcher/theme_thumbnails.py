@@ -0,0 +1,96 @@
+import hashlib
+import os
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, Qt, pyqtSignal
+from PyQt5.QtGui import QImage
+
+import tracing
+
+THUMBNAIL_SIZE = 128
+MAX_THUMBNAIL_WORKERS = 2
+
+
+class ThumbnailCache:
+    """Theme preview thumbnails scaled once and kept as PNGs in cache_dir. A file is
+    named after the source path, mtime and size, so an edited preview gets a new
+    thumbnail and the stale one is removed. With cache_dir=None thumbnails are only
+    scaled, never stored."""
+
+    def __init__(self, cache_dir, size=THUMBNAIL_SIZE):
+        self.cache_dir = cache_dir
+        self.size = size
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def _cache_path(self, image_path, stat):
+        path_key = hashlib.sha1(os.path.normcase(os.path.abspath(image_path)).encode('utf-8')).hexdigest()
+        return path_key, os.path.join(self.cache_dir, f"{path_key}-{stat.st_mtime_ns}-{stat.st_size}-{self.size}.png")
+
+    def load(self, image_path):
+        """Thumbnail for image_path, generated if needed; a null QImage on failure."""
+        try:
+            stat = os.stat(image_path)
+        except OSError:
+            return QImage()
+        cache_path = None
+        if self.cache_dir:
+            path_key, cache_path = self._cache_path(image_path, stat)
+            image = QImage(cache_path)
+            if not image.isNull():
+                return image
+
+        image = QImage(image_path)
+        if image.isNull():
+            return image
+        image = image.scaled(self.size, self.size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        if cache_path:
+            for name in os.listdir(self.cache_dir):
+                if name.startswith(f"{path_key}-"):
+                    try:
+                        os.remove(os.path.join(self.cache_dir, name))
+                    except OSError:
+                        pass
+            image.save(cache_path, 'PNG')
+        return image
+
+
+class _ThumbnailSignals(QObject):
+    finished = pyqtSignal(str, QImage)
+
+
+class ThumbnailTask(QRunnable):
+    def __init__(self, key, image_path, cache, signals):
+        super().__init__()
+        self.key = key
+        self.image_path = image_path
+        self.cache = cache
+        self.signals = signals
+
+    @tracing.traced(category='io')
+    def run(self):
+        try:
+            image = self.cache.load(self.image_path)
+        except Exception as e:
+            print(f"Error loading theme thumbnail {self.image_path}: {e}")
+            image = QImage()
+        self.signals.finished.emit(self.key, image)
+
+
+class ThumbnailLoader(QObject):
+    """Loads thumbnails off the GUI thread. thumbnail_loaded carries the key passed
+    to request() and a null QImage when the preview could not be read."""
+    thumbnail_loaded = pyqtSignal(str, QImage)
+
+    def __init__(self, cache_dir=None, size=THUMBNAIL_SIZE, max_workers=MAX_THUMBNAIL_WORKERS, parent=None):
+        super().__init__(parent)
+        self.cache = ThumbnailCache(cache_dir, size)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_workers)
+        self.signals = _ThumbnailSignals()
+        self.signals.finished.connect(self.thumbnail_loaded)
+
+    def request(self, key, image_path):
+        self.pool.start(ThumbnailTask(key, image_path, self.cache, self.signals))
+
+    def shutdown(self):
+        self.pool.clear()
+        self.pool.waitForDone(2000)
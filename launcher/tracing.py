@@ -0,0 +1,152 @@
+"""Opt-in tracing of startup and hot paths, written as Chrome trace event JSON that
+chrome://tracing and https://ui.perfetto.dev open directly.
+
+Tracing is switched on by setting IMA_MENU_TRACE (to an output path, or to 1 for
+DEFAULT_TRACE_FILE) or by passing --trace [path] to the launcher. It has to be
+decided before the launcher's own imports run, so this module reads both when it
+is first imported; import it ahead of everything else. The trace is written when
+the process exits.
+
+When tracing is off, span() hands back a shared no-op context manager and traced()
+returns the function unchanged, so instrumented code costs next to nothing.
+"""
+import atexit
+import builtins
+import functools
+import json
+import os
+import sys
+import threading
+import time
+
+TRACE_ENV = 'IMA_MENU_TRACE'
+TRACE_FLAG = '--trace'
+DEFAULT_TRACE_FILE = 'launcher-trace.json'
+
+_start_ns = time.perf_counter_ns()
+_events = []
+_thread_names = {}
+_lock = threading.Lock()
+_output_path = None
+_original_import = builtins.__import__
+
+
+def _now_us():
+    return (time.perf_counter_ns() - _start_ns) / 1000
+
+
+def _thread_id():
+    ident = threading.get_ident()
+    if ident not in _thread_names:
+        with _lock:
+            _thread_names[ident] = threading.current_thread().name
+    return ident
+
+
+class _Span:
+    __slots__ = ('name', 'category', 'args', 'start')
+
+    def __init__(self, name, category, args):
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def __enter__(self):
+        self.start = _now_us()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        event = {'name': self.name, 'cat': self.category, 'ph': 'X', 'ts': self.start,
+                 'dur': _now_us() - self.start, 'pid': os.getpid(), 'tid': _thread_id()}
+        if exc_type is not None:
+            self.args['error'] = f"{exc_type.__name__}: {exc}"
+        if self.args:
+            event['args'] = self.args
+        _events.append(event)
+        return False
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+def is_enabled():
+    return _output_path is not None
+
+
+def span(name, category='launcher', **args):
+    """Context manager timing the enclosed block as one trace event."""
+    if _output_path is None:
+        return _NO_SPAN
+    return _Span(name, category, args)
+
+
+def traced(name=None, category='launcher'):
+    """Decorator recording every call as a span named name (default: the qualified
+    function name). Functions decorated while tracing is off are left untouched."""
+    def decorate(function):
+        if _output_path is None:
+            return function
+        span_name = name or function.__qualname__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with _Span(span_name, category, {}):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def _traced_import(name, globals=None, locals=None, fromlist=(), level=0):
+    if level or name in sys.modules:
+        return _original_import(name, globals, locals, fromlist, level)
+    with _Span(f"import {name}", 'import', {}):
+        return _original_import(name, globals, locals, fromlist, level)
+
+
+def write():
+    """Writes the events recorded so far to the output file."""
+    if _output_path is None:
+        return
+    pid = os.getpid()
+    metadata = [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': ident, 'args': {'name': thread_name}}
+                for ident, thread_name in list(_thread_names.items())]
+    metadata.append({'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': 0, 'args': {'name': 'iMA Menu launcher'}})
+    with open(_output_path, 'w') as f:
+        json.dump({'traceEvents': metadata + list(_events), 'displayTimeUnit': 'ms'}, f)
+    print(f"Trace written to {_output_path}")
+
+
+def enable(path=DEFAULT_TRACE_FILE):
+    """Starts recording into path. Module imports are traced from here on."""
+    global _output_path
+    if _output_path is None:
+        builtins.__import__ = _traced_import
+        atexit.register(write)
+    _output_path = os.path.abspath(path)
+
+
+def _requested_path(argv, environ):
+    if TRACE_FLAG in argv:
+        index = argv.index(TRACE_FLAG)
+        if index + 1 < len(argv) and not argv[index + 1].startswith('-'):
+            return argv[index + 1]
+        return DEFAULT_TRACE_FILE
+    value = environ.get(TRACE_ENV, '')
+    if value.lower() in ('', '0', 'false', 'no'):
+        return None
+    return DEFAULT_TRACE_FILE if value.lower() in ('1', 'true', 'yes') else value
+
+
+_path = _requested_path(sys.argv, os.environ)
+if _path:
+    enable(_path)
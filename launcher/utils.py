@@ -3,6 +3,8 @@ import os
 import tempfile
 import shutil
 
+import tracing
+
 def resource_path(relative_path):
     try:
         base_path = sys._MEIPASS
@@ -10,11 +12,12 @@ def resource_path(relative_path):
         base_path = os.path.abspath(".")
     return os.path.join(base_path, relative_path)
 
+@tracing.traced(category='io')
 def safe_file_write(filepath, content):
     temp_dir = os.path.dirname(os.path.abspath(filepath))
     temp_fd, temp_path = tempfile.mkstemp(dir=temp_dir)
     try:
-        with os.fdopen(temp_fd, 'w') as temp_file:
+        with os.fdopen(temp_fd, 'wb' if isinstance(content, bytes) else 'w') as temp_file:
             temp_file.write(content)
         shutil.move(temp_path, filepath)
     except Exception as e: